@@ -0,0 +1,146 @@
+import time
+import bisect
+import datetime
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+DAY = 86400
+# Upper edges of the duration histogram bins, in seconds; the last bin is open-ended
+DURATION_EDGES = [
+    300, 900, 1800, 3600, 2 * 3600, 4 * 3600, 8 * 3600, 12 * 3600,
+    DAY, 2 * DAY, 3 * DAY, 5 * DAY, 7 * DAY, 14 * DAY, 30 * DAY,
+]
+
+def parse_github_time(value: Optional[str]) -> Optional[float]:
+    """Parse a GitHub ISO 8601 timestamp ('2024-05-01T12:00:00Z') to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def format_duration(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 2 * DAY:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / DAY:.1f}d"
+
+class DayBucket:
+    """One day of activity for one repo in one channel."""
+
+    __slots__ = ("day", "opened", "merged", "closed", "merge_times", "review_times")
+
+    def __init__(self, day: int):
+        self.day = day
+        self.opened = 0
+        self.merged = 0
+        self.closed = 0
+        # Histogram counts per DURATION_EDGES bin (plus the open-ended one)
+        self.merge_times = [0] * (len(DURATION_EDGES) + 1)
+        self.review_times = [0] * (len(DURATION_EDGES) + 1)
+
+class ActivityStats:
+    """Rolling per-repo, per-channel PR throughput in fixed memory.
+
+    Each (repository, channel) series is a ring of `days` daily buckets,
+    reused in place as days roll over, so an event is an O(1) update and a
+    series never grows. Open-to-merge and time-to-first-review are kept as
+    histograms rather than samples, so medians are estimates within a bin.
+    A report reads at most `days` buckets per series.
+    """
+
+    def __init__(self, days: int = 90, reviewed_memory: int = 10000):
+        self.days = days
+        self.reviewed_memory = reviewed_memory
+        # (repository, channel ID) -> ring of buckets indexed by day % days
+        self._series: Dict[Tuple[str, int], List[Optional[DayBucket]]] = {}
+        # PRs whose first review has been counted, bounded LRU
+        self._reviewed: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+
+    def _bucket(self, repository: str, channel_id: int, now: float = None) -> DayBucket:
+        day = int((now or time.time()) // DAY)
+        ring = self._series.get((repository, channel_id))
+        if ring is None:
+            ring = self._series[(repository, channel_id)] = [None] * self.days
+        bucket = ring[day % self.days]
+        if bucket is None or bucket.day != day:
+            bucket = ring[day % self.days] = DayBucket(day)
+        return bucket
+
+    @staticmethod
+    def _add_duration(histogram: List[int], seconds: float) -> None:
+        histogram[bisect.bisect_left(DURATION_EDGES, max(0.0, seconds))] += 1
+
+    def record_opened(self, repository: str, channel_id: int, now: float = None) -> None:
+        self._bucket(repository, channel_id, now).opened += 1
+
+    def record_closed(self, repository: str, channel_id: int, merged: bool,
+                      created_at: Optional[float], merged_at: Optional[float], now: float = None) -> None:
+        bucket = self._bucket(repository, channel_id, now)
+        if not merged:
+            bucket.closed += 1
+            return
+        bucket.merged += 1
+        if created_at and merged_at:
+            self._add_duration(bucket.merge_times, merged_at - created_at)
+
+    def record_review(self, repository: str, pr_number: str, channel_id: int,
+                      created_at: Optional[float], submitted_at: Optional[float], now: float = None) -> None:
+        """Count the time to a PR's first review; later reviews are ignored."""
+        key = (repository, pr_number)
+        if key in self._reviewed or not (created_at and submitted_at):
+            return
+        self._reviewed[key] = None
+        while len(self._reviewed) > self.reviewed_memory:
+            self._reviewed.popitem(last=False)
+        self._add_duration(self._bucket(repository, channel_id, now).review_times, submitted_at - created_at)
+
+    def repositories(self, channel_id: int) -> List[str]:
+        return sorted(repo for repo, cid in self._series if cid == channel_id)
+
+    def report(self, channel_id: int, window_days: int, repository: str = None,
+               now: float = None) -> Dict[str, object]:
+        """Totals and median estimates for the last window_days days in a channel."""
+        window_days = max(1, min(window_days, self.days))
+        today = int((now or time.time()) // DAY)
+        first_day = today - window_days + 1
+        totals = {"opened": 0, "merged": 0, "closed": 0}
+        merge_times = [0] * (len(DURATION_EDGES) + 1)
+        review_times = [0] * (len(DURATION_EDGES) + 1)
+
+        for (repo, cid), ring in self._series.items():
+            if cid != channel_id or (repository and repo.lower() != repository.lower()):
+                continue
+            for day in range(first_day, today + 1):
+                bucket = ring[day % self.days]
+                if bucket is None or bucket.day != day:
+                    continue
+                totals["opened"] += bucket.opened
+                totals["merged"] += bucket.merged
+                totals["closed"] += bucket.closed
+                for i in range(len(merge_times)):
+                    merge_times[i] += bucket.merge_times[i]
+                    review_times[i] += bucket.review_times[i]
+
+        return dict(totals, days=window_days,
+                    median_merge=self.histogram_median(merge_times),
+                    median_review=self.histogram_median(review_times))
+
+    @staticmethod
+    def histogram_median(histogram: List[int]) -> Optional[float]:
+        """Estimate the median by interpolating inside the bin that holds it."""
+        total = sum(histogram)
+        if not total:
+            return None
+        half = total / 2
+        seen = 0
+        for i, count in enumerate(histogram):
+            if count and seen + count >= half:
+                if i == len(DURATION_EDGES):
+                    return float(DURATION_EDGES[-1])
+                low = DURATION_EDGES[i - 1] if i else 0
+                return low + (DURATION_EDGES[i] - low) * (half - seen) / count
+            seen += count
+        return None
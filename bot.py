@@ -1,35 +1,278 @@
+import time
+# Taken before the other imports so the startup report covers them
+_IMPORT_STARTED = time.perf_counter()
+
 import os
+import signal
+import asyncio
 import threading
+from collections import Counter
+from typing import Optional
+
 import discord
 from dotenv import load_dotenv
 
 from config_manager import ConfigManager
 from pr_handler import PRHandler
 from command_handler import CommandHandler
-from webhook_server import set_bot_instance, run_webhook_server, get_public_url
+from github_client import GitHubClient
+from webhook_journal import WebhookJournal
+from event_queue import PriorityEventQueue
+from reminders import ReminderScheduler
+from member_links import MemberDirectory
+from slash_commands import build_command_tree
+from activity_stats import ActivityStats
+from push_summary import PushSummaries
+from retries import RetryingWriter
+from guild_budget import GuildBudgets
+from leader_lease import SharedState, LeaderLease
+from diagnostics import LoopLagMonitor, StartupTimer, enable_slow_callback_reporting
+from webhook_server import (
+    set_bot_instance, run_webhook_server, get_public_url, replay_journal,
+    stop_accepting_webhooks, stop_webhook_server, drain_inflight, adopt_inbox, hand_over_journal
+)
+
+# Phase timings from process start, printed once the bot is ready
+STARTUP = StartupTimer(_IMPORT_STARTED)
+STARTUP.end("import", _IMPORT_STARTED)
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a true/false style environment variable."""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def env_seconds(name: str, default: float) -> Optional[float]:
+    """Read a duration in seconds from the environment; a negative value means disabled."""
+    value = os.getenv(name)
+    seconds = float(value) if value and value.strip() else default
+    return None if seconds < 0 else seconds
 
 class PRBot(discord.Client):
     """Discord bot for managing GitHub pull request notifications."""
     
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        super().__init__(intents=intents)
+        # Only what the bot uses: the guild/channel/thread cache to resolve
+        # webhook targets. Commands are slash commands, so guild messages and
+        # their content are only subscribed to if the old !prbot/!pr text
+        # commands are turned back on.
+        self.text_commands = env_flag('TEXT_COMMANDS', False)
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = self.text_commands
+        intents.message_content = self.text_commands
+        # PR cards are tracked by ID (see PRRecord), so the message cache and
+        # member cache would only hold objects nothing reads
+        super().__init__(
+            intents=intents,
+            max_messages=None,
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+        )
         
         # Initialize components
         self.config_manager = ConfigManager()
-        self.pr_handler = PRHandler()
+        # Discord calls per guild per minute, and what to do when one goes over
+        self.budgets = GuildBudgets(self.config_manager, per_minute=int(os.getenv('GUILD_API_BUDGET', '300')))
+        self.pr_handler = PRHandler(
+            self,
+            lazy_threads=env_flag('LAZY_THREADS', False),
+            thread_intro=env_flag('THREAD_INTRO', True),
+            archive_grace=env_seconds('THREAD_ARCHIVE_GRACE', 3600),
+            archive_path="thread_archives.json",
+            writes=RetryingWriter(
+                attempts=int(os.getenv('DISCORD_RETRY_ATTEMPTS', '4')),
+                dead_letter_size=int(os.getenv('DEAD_LETTER_SIZE', '200')),
+                budgets=self.budgets,
+            ),
+        )
+        self.pr_handler.budgets = self.budgets
+        stale_days = float(os.getenv('STALE_PR_DAYS', '3'))
+        self.reminders = ReminderScheduler(self.pr_handler, stale_after=stale_days * 86400 if stale_days > 0 else None)
+        # GitHub login -> Discord member links, for review request pings
+        self.members = MemberDirectory(self.config_manager, ttl=float(os.getenv('MEMBER_CACHE_TTL', '3600')))
+        # Rolling PR throughput per repo and channel, for /prbot stats
+        self.stats = ActivityStats()
+        # Push bursts per branch, coalesced into one edited message each
+        self.pushes = PushSummaries(
+            self.pr_handler,
+            window=float(os.getenv('PUSH_COALESCE_WINDOW', '600')),
+            edit_interval=float(os.getenv('PUSH_EDIT_INTERVAL', '15')),
+        )
         self.command_handler = CommandHandler(self)
+        self.tree = build_command_tree(self)
+        self.github = GitHubClient(token=os.getenv('GITHUB_TOKEN'))
+        # Active/standby: instances sharing HA_STATE_DB elect a leader through
+        # a lease there, and only the leader connects to Discord
+        ha_state_db = os.getenv('HA_STATE_DB')
+        self.instance_id = os.getenv('INSTANCE_ID')
+        if ha_state_db and not self.instance_id:
+            # A default like the hostname would give two instances on one host
+            # the same journal file
+            raise SystemExit("HA_STATE_DB needs INSTANCE_ID set to a name unique to this instance")
+        self.shared_state = SharedState(ha_state_db) if ha_state_db else None
+        self.lease = None
+        if self.shared_state:
+            self.lease = LeaderLease(self.shared_state, f"{self.instance_id}:{os.getpid()}",
+                                     ttl=float(os.getenv('LEASE_TTL', '10')))
+            self.pr_handler.store = self.shared_state
+        # Until the first on_ready, webhooks go to the shared inbox for the leader
+        self.standby = self.lease is not None
+        self._lease_lost = False
+        # Each instance journals separately; the inbox is what they share
+        self.webhook_journal = WebhookJournal(
+            path=f"webhook_journal.{self.instance_id}.jsonl" if self.shared_state else None
+        )
+        # Webhook events run here, merges and closes ahead of comment chatter
+        self.event_queue = PriorityEventQueue(
+            workers=int(os.getenv('EVENT_WORKERS', '8')),
+            max_wait=float(os.getenv('EVENT_MAX_WAIT', '5')),
+        )
+        # on_ready fires again on every reconnect; the journal replays only once
+        self._journal_replayed = False
+        self._shutting_down = False
+        # Seconds to let in-flight Discord work finish on shutdown; keep it
+        # under systemd's TimeoutStopSec (90s by default)
+        self.drain_timeout = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '25'))
+        # Event loop health, reported by !prbot status
+        self.loop_monitor = LoopLagMonitor(warn_threshold=float(os.getenv('LOOP_LAG_WARN_MS', '250')) / 1000)
+        self.slow_callbacks = None
+        # Gateway events received, by type, to see what the intents cost us
+        self.gateway_events: Counter = Counter()
         
         # Load existing configuration
+        self.startup = STARTUP
+        self.startup.begin("config load")
         self.config_manager.load_config()
+        self.webhook_journal.open()
+        self.startup.end("config load")
         
         # Set this bot instance for the webhook server
         set_bot_instance(self)
     
+    def wait_for_leadership(self) -> None:
+        """Block as the standby until this instance holds the leader lease.
+
+        Runs before bot.run(), so a standby never opens a gateway connection.
+        Meanwhile the webhook server keeps accepting deliveries into the shared
+        inbox, checked against the leader's latest config.
+        """
+        if not self.lease.try_acquire():
+            leader = self.lease.leader()
+            print(f"Standing by: {leader[0] if leader else 'another instance'} holds the leader lease")
+            # Whatever our last run left unfinished is the leader's to run now
+            hand_over_journal()
+            config_mtime = self._config_mtime()
+            while not self.lease.try_acquire():
+                time.sleep(self.lease.heartbeat)
+                mtime = self._config_mtime()
+                if mtime != config_mtime:
+                    config_mtime = mtime
+                    self.config_manager.load_config()
+            print(f"Took over the leader lease as {self.lease.holder}")
+            self.config_manager.load_config()
+        
+        restored = self.pr_handler.restore_cards(self.shared_state.load_cards())
+        print(f"Restored {restored} PR cards from the shared state")
+    
+    def _config_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config_manager.CONFIG_FILE)
+        except OSError:
+            return None
+    
+    async def _hold_lease(self) -> None:
+        """Renew the leader lease, adopt the standby's deliveries, and step down if the lease is lost."""
+        loop = asyncio.get_running_loop()
+        while not self._shutting_down:
+            await asyncio.sleep(self.lease.heartbeat)
+            if not await loop.run_in_executor(None, self.lease.try_acquire):
+                # Our claim lapsed (a stalled loop or a lost disk) and the other
+                # instance is leader now; stop touching Discord at once
+                print("Lost the leader lease to another instance, stepping down")
+                self._lease_lost = True
+                self.drain_timeout = 0
+                await self.shutdown("lost leader lease")
+                return
+            if not self.standby:
+                await adopt_inbox()
+    
     async def setup_hook(self) -> None:
         """Called when the client is done preparing the data received from Discord."""
         print(f"Bot is ready and logged in as {self.user}")
+        
+        # systemd stops the service with SIGTERM, which would otherwise kill
+        # in-flight card edits and leave cards without threads behind
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, lambda s=sig: asyncio.create_task(self.shutdown(s.name)))
+            except (NotImplementedError, RuntimeError):
+                # Signal handlers aren't available on this platform/thread
+                pass
+        
+        self.loop_monitor.start()
+        if self.lease:
+            self._lease_task = asyncio.create_task(self._hold_lease())
+        
+        # Registering commands is rate limited, so deployments that haven't
+        # changed them can skip it with SYNC_COMMANDS=false
+        if env_flag('SYNC_COMMANDS', True):
+            try:
+                synced = await self.tree.sync()
+                print(f"Synced {len(synced)} slash commands")
+            except discord.HTTPException as e:
+                print(f"Failed to sync slash commands: {e}")
+        self.reminders.load()
+        self.pr_handler.load_archives()
+        if env_flag('ASYNCIO_DEBUG', False):
+            threshold = float(os.getenv('SLOW_CALLBACK_MS', '100')) / 1000
+            self.slow_callbacks = enable_slow_callback_reporting(loop, threshold)
+            print(f"asyncio debug mode on: reporting callbacks slower than {threshold * 1000:.0f}ms")
+    
+    async def shutdown(self, reason: str = "shutdown") -> None:
+        """Stop taking webhooks, drain in-flight work, persist state, then disconnect."""
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+        print(f"Shutting down ({reason}): journaling new webhooks for the next start, "
+              f"draining for up to {self.drain_timeout:.0f}s")
+        
+        stop_accepting_webhooks()
+        drained, abandoned = await drain_inflight(self.drain_timeout)
+        if not self._lease_lost:
+            # Collapsed edits still waiting for their window; nothing would replay them
+            try:
+                flushed = await asyncio.wait_for(self.pr_handler.flush_deferred(), max(self.drain_timeout, 1))
+                if flushed:
+                    print(f"Applied {flushed} held-back Discord writes")
+            except asyncio.TimeoutError:
+                print("Timed out applying held-back Discord writes")
+        await self.pr_handler.timers.stop()
+        await self.pr_handler.flush_cards()
+        self.reminders.save()
+        self.pr_handler.save_archives()
+        self.loop_monitor.stop()
+        
+        # Stop taking connections before the journal closes, so every delivery
+        # we acknowledged is on disk for the next process to replay
+        await asyncio.get_running_loop().run_in_executor(None, stop_webhook_server)
+        self.config_manager.save_config()
+        if self.lease:
+            # The standby runs what's left and takes over now rather than
+            # once our lease would have lapsed
+            hand_over_journal()
+            if not self._lease_lost:
+                self.lease.release()
+        self.webhook_journal.close()
+        if self.shared_state:
+            self.shared_state.close()
+        await self.github.close()
+        
+        print(f"Shutdown drain complete: {drained} finished, {abandoned} abandoned"
+              + (" (left in the journal for replay)" if abandoned else ""))
+        await self.close()
     
     async def on_ready(self) -> None:
         """Called when the client is done preparing the data received from Discord."""
@@ -45,11 +288,28 @@ class PRBot(discord.Client):
                     self.config_manager.save_config()
         else:
             print("No guilds found. The bot isn't in any server.")
+        
+        # Replay after the guild cache is populated so processors can resolve channels
+        if not self._journal_replayed:
+            self.startup.end("gateway login")
+            print(f"Startup: {self.startup.summary()}")
+            self._journal_replayed = True
+            self.standby = False
+            await replay_journal()
+            await adopt_inbox()
+    
+    def dispatch(self, event: str, /, *args, **kwargs) -> None:
+        # Count every gateway event here rather than through an
+        # on_socket_event_type listener, which would cost a task per event
+        if event == 'socket_event_type':
+            self.gateway_events[args[0]] += 1
+            return
+        super().dispatch(event, *args, **kwargs)
     
     async def on_message(self, message: discord.Message) -> None:
         """Process incoming messages."""
         # Avoid processing messages sent by the bot itself
-        if message.author == self.user:
+        if not self.text_commands or message.author == self.user:
             return
         
         # Get guild configuration
@@ -86,7 +346,11 @@ if __name__ == "__main__":
         daemon=True
     )
     webhook_thread.start()
-
+    
+    # As the standby, wait here without a gateway connection until the leader goes away
+    if bot.lease:
+        bot.wait_for_leadership()
     
     # Run the Discord bot
+    STARTUP.begin("gateway login")
     bot.run(TOKEN)
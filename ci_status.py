@@ -0,0 +1,103 @@
+from typing import Dict, Hashable, Optional, Tuple
+
+# check_run conclusions that count as a failed check
+FAILING_CONCLUSIONS = ('failure', 'timed_out', 'cancelled', 'action_required', 'startup_failure', 'stale')
+# ...and ones that don't count either way
+SKIPPED_CONCLUSIONS = ('neutral', 'skipped')
+
+def check_outcome(status: str, conclusion: Optional[str]) -> str:
+    """Reduce a check's status/conclusion pair to pending, success, failure or skipped."""
+    if status != 'completed':
+        return 'pending'
+    if conclusion == 'success':
+        return 'success'
+    if conclusion in SKIPPED_CONCLUSIONS:
+        return 'skipped'
+    return 'failure'
+
+class CIAggregator:
+    """Per-PR rollup of check runs for the PR's current head commit.
+
+    Each check_run event overwrites one entry, so a PR with dozens of checks
+    costs one small dict and the card shows a single summary line. Suites are
+    counted as one entry only until one of their runs is seen, which covers
+    check_suite-only integrations without double counting Actions runs.
+
+    The head is set from pull_request events. Check events for any other sha
+    are late results for an older commit and are ignored; only a PR whose head
+    isn't known yet (tracked before a restart) takes its head from them.
+    """
+
+    def __init__(self):
+        # key: (repository, pr_number), value: (head sha, {entry id: outcome})
+        self._heads: Dict[Tuple[str, str], Tuple[str, Dict[Hashable, str]]] = {}
+        # check_suite ids that have reported at least one run
+        self._suites_with_runs: Dict[Tuple[str, str], set] = {}
+
+    def note_head(self, key: Tuple[str, str], head_sha: str) -> bool:
+        """Start a fresh rollup if the PR moved to a new head; returns whether it did."""
+        current = self._heads.get(key)
+        if current and current[0] == head_sha:
+            return False
+        self._heads[key] = (head_sha, {})
+        self._suites_with_runs[key] = set()
+        return True
+
+    def _is_head(self, key: Tuple[str, str], head_sha: str) -> bool:
+        current = self._heads.get(key)
+        if current is None:
+            self.note_head(key, head_sha)
+            return True
+        return current[0] == head_sha
+
+    def record_run(self, key: Tuple[str, str], head_sha: str, run_id: int,
+                   suite_id: Optional[int], outcome: str) -> bool:
+        """Record the latest outcome of one check run; False if it's for an older commit."""
+        if not self._is_head(key, head_sha):
+            return False
+        runs = self._heads[key][1]
+        if suite_id is not None:
+            runs.pop(('suite', suite_id), None)
+            self._suites_with_runs[key].add(suite_id)
+        runs[('run', run_id)] = outcome
+        return True
+
+    def record_suite(self, key: Tuple[str, str], head_sha: str, suite_id: int, outcome: str) -> bool:
+        """Record a check suite, unless its individual runs are already counted.
+
+        Returns False if it's for an older commit.
+        """
+        if not self._is_head(key, head_sha):
+            return False
+        if suite_id not in self._suites_with_runs[key]:
+            self._heads[key][1][('suite', suite_id)] = outcome
+        return True
+
+    def forget(self, key: Tuple[str, str]) -> None:
+        """Drop a PR's rollup once it's merged or closed."""
+        self._heads.pop(key, None)
+        self._suites_with_runs.pop(key, None)
+
+    def summary(self, key: Tuple[str, str]) -> Optional[str]:
+        """Render the rollup as e.g. '❌ 12/14 passing (1 failing, 1 pending)'."""
+        current = self._heads.get(key)
+        if not current or not current[1]:
+            return None
+        outcomes = [o for o in current[1].values() if o != 'skipped']
+        if not outcomes:
+            return "⚪ All checks skipped"
+
+        passing = outcomes.count('success')
+        failing = outcomes.count('failure')
+        pending = outcomes.count('pending')
+        icon = "❌" if failing else "⏳" if pending else "✅"
+
+        text = f"{icon} {passing}/{len(outcomes)} passing"
+        details = []
+        if failing:
+            details.append(f"{failing} failing")
+        if pending:
+            details.append(f"{pending} pending")
+        if details:
+            text += f" ({', '.join(details)})"
+        return text
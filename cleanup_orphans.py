@@ -23,7 +23,7 @@ import asyncio
 import discord
 from dotenv import load_dotenv
 
-from utils import get_status_color, get_status_icon
+from utils import get_status_color, get_status_icon, archive_and_lock_thread
 
 PR_FOOTER_RE = re.compile(r'PR #(\d+)')
 
@@ -108,11 +108,7 @@ async def run():
                     print(f"    ! card edit failed: {e}")
                 if thread:
                     try:
-                        # An already-archived thread can't be edited until it's
-                        # unarchived, so unarchive first, then lock + re-archive.
-                        if thread.archived:
-                            await thread.edit(archived=False)
-                        await thread.edit(locked=True, archived=True)
+                        await archive_and_lock_thread(thread)
                         found[prn]["threads"] += 1
                     except Exception as e:
                         found[prn]["thread_fail"] += 1
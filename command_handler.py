@@ -1,25 +1,54 @@
 from typing import Dict, Optional, Any
+import re
+import time
 import uuid
+import asyncio
 
+import aiohttp
 import discord
-from webhook_server import get_public_url
+from diagnostics import parse_duration, sample_stacks, write_folded, top_frames
+from activity_stats import format_duration
+from github_client import GitHubError
+from webhook_server import get_public_url, resolve_pr_state
+from utils import reply
 
 class CommandHandler:
     """Handles command processing for the bot."""
     
+    REPO_PATTERN = re.compile(r'^[\w.-]+/[\w.-]+$')
+    # Cards created at once by !prbot backfill
+    BACKFILL_CONCURRENCY = 4
+    # Longest !prbot profile run, in seconds
+    MAX_PROFILE_SECONDS = 300
+    PROFILE_DIR = "profiles"
+    # Results listed by !prbot find
+    FIND_LIMIT = 10
+    # Dead letters listed by !prbot deadletters
+    DEAD_LETTER_LIMIT = 10
+    
     def __init__(self, bot):
         """Initialize with a reference to the bot client."""
         self.bot = bot
+        self._profiling = False
     
     async def handle_admin_commands(self, message: discord.Message, 
                                    config: Dict[str, Any], guild_id: int) -> None:
         """Handle administrative bot configuration commands."""
+        parts = message.content.split()
+        # Anyone may link their own GitHub login; linking someone else is for admins
+        if len(parts) == 3 and parts[1].lower() == "link" and not message.mentions:
+            await self.link_github(message, guild_id, parts)
+            return
+        # Searching tracked PRs is read-only, so it's open to everyone too
+        if len(parts) >= 2 and parts[1].lower() == "find":
+            await self.find_pr(message, guild_id, parts)
+            return
+        
         # Check for admin permissions
         if not message.author.guild_permissions.administrator:
-            await message.channel.send("You need administrator permissions to configure the bot.")
+            await reply(message, "You need administrator permissions to configure the bot.")
             return
         
-        parts = message.content.split()
         if len(parts) < 2:
             await self.show_help(message)
             return
@@ -30,17 +59,47 @@ class CommandHandler:
             await self.show_status(message, config)
         elif command == "webhook":
             await self.generate_webhook_url(message, config, guild_id)
+        elif command == "backfill":
+            await self.backfill(message, parts)
+        elif command == "mirror":
+            await self.configure_mirror(message, config, guild_id, parts)
+        elif command == "profile":
+            await self.profile(message, parts)
+        elif command == "link":
+            await self.link_github(message, guild_id, parts)
+        elif command == "unlink":
+            await self.unlink_github(message, guild_id, parts)
+        elif command == "stats":
+            await self.show_stats(message, parts)
+        elif command == "pushes":
+            await self.configure_pushes(message, config, guild_id, parts)
+        elif command == "deadletters":
+            await self.dead_letters(message, parts)
+        elif command == "budget":
+            await self.configure_budget(message, guild_id, parts)
     
     async def show_help(self, message: discord.Message) -> None:
         """Show help information for bot commands."""
         help_text = (
             "Available commands:\n"
             "!prbot status - Show current configuration\n"
-            "!prbot webhook - Generate a GitHub webhook URL for the current channel\n\n"
+            "!prbot webhook - Generate a GitHub webhook URL for the current channel\n"
+            "!prbot backfill owner/repo - Post cards for a repo's already-open PRs in this channel\n"
+            "!prbot mirror [add|remove] #channel - Also post this channel's PR cards to another channel\n"
+            "!prbot profile [30s] - Sample the bot's stacks and save a flamegraph profile\n"
+            "!prbot link [github-login @member] - List links, or link a GitHub login to a member\n"
+            "!prbot unlink github-login - Remove a GitHub login's link\n"
+            "!prbot stats [owner/repo] [7d] - PR throughput and review latency for this channel\n"
+            "!prbot pushes [#channel|reset] - Show or set where push and release summaries go\n"
+            "!prbot deadletters [redrive [id|all]|clear] - Inspect or retry Discord writes that failed\n"
+            "!prbot budget [calls-per-minute|reset] - Show or set this server's Discord API budget\n\n"
             "Other commands:\n"
-            "!pr [content] - Create a manual PR notification"
+            "!prbot link github-login - Link your own GitHub login to get review request pings\n"
+            "!prbot find <text|#number|author> - Jump to a tracked PR's card and thread\n"
+            "!pr [content] - Create a manual PR notification\n\n"
+            "Every command is also a slash command: /prbot status, /prlink, /prfind, /pr and so on."
         )
-        await message.channel.send(help_text)
+        await reply(message, help_text)
     
     async def show_status(self, message: discord.Message, config: Dict[str, Any]) -> None:
         """Show current bot configuration status."""
@@ -48,7 +107,39 @@ class CommandHandler:
         
         status = "Current configuration:\n"
         status += f"Webhook token: {'Configured' if webhook_token != 'Not configured' else 'Not configured'}"
-        await message.channel.send(status)
+        
+        handler = self.bot.pr_handler
+        status += "\n\nEvent loop health:\n"
+        status += f"Startup: {self.bot.startup.summary()}\n"
+        status += f"Loop lag: {self.bot.loop_monitor.lag.summary()}\n"
+        if self.bot.slow_callbacks:
+            status += f"Slow callbacks: {self.bot.slow_callbacks.count}\n"
+        status += f"Card lock waits: {handler.lock_waits.summary()}\n"
+        status += f"Card edits (Discord): {handler.card_edits.summary()}\n"
+        status += f"Discord writes: {handler.writes.summary()}\n"
+        if message.guild:
+            status += f"API budget (this server): {self.bot.budgets.summary(message.guild.id)}\n"
+        busiest = self.bot.budgets.busiest()
+        if busiest:
+            status += "Busiest servers: " + ", ".join(f"{guild_id} ({calls}/min)" for guild_id, calls in busiest) + "\n"
+        status += f"\nEvent queue:\n{self.bot.event_queue.summary()}\n"
+
+        lease = getattr(self.bot, 'lease', None)
+        if lease:
+            # SQLite may wait on the standby's lock; keep that off the event loop
+            loop = asyncio.get_running_loop()
+            leader = await loop.run_in_executor(None, lease.leader)
+            inbox = await loop.run_in_executor(None, self.bot.shared_state.inbox_size)
+            holder = leader[0] if leader else "nobody"
+            status += (f"Leader lease: {holder}"
+                       f"{' (this instance)' if holder == lease.holder else ''}, "
+                       f"{len(self.bot.pr_handler.pr_records)} PRs shared, "
+                       f"{inbox} deliveries in the standby inbox\n")
+
+        events = self.bot.gateway_events
+        top = ", ".join(f"{name} {count}" for name, count in events.most_common(5))
+        status += f"\nGateway events received: {sum(events.values())}" + (f" ({top})" if top else "")
+        await reply(message, status)
         
     def get_target_channel(self, message: discord.Message, parts: list) -> Optional[discord.TextChannel]:
         """Parse and return a target channel from command parts."""
@@ -71,7 +162,7 @@ class CommandHandler:
         channel_id = message.channel.id
         
         if not guild_id:
-            await message.channel.send("This command only works in servers.")
+            await reply(message, "This command only works in servers.")
             return
             
         # Generate a simple token if one doesn't exist
@@ -86,7 +177,7 @@ class CommandHandler:
         base_url = get_public_url()
         
         if base_url.startswith('https://your-bot-domain.com'):
-            await message.channel.send("⚠️ No public URL configured. Please set WEBHOOK_BASE_URL in .env or install pyngrok.")
+            await reply(message, "⚠️ No public URL configured. Please set WEBHOOK_BASE_URL in .env or install pyngrok.")
             return
         
         # Generate the webhook URL
@@ -100,7 +191,8 @@ class CommandHandler:
                 f"2. Enter this Payload URL:\n"
                 f"```\n{webhook_url}\n```\n\n"
                 f"3. Set Content type to: `application/json`\n\n"
-                f"4. For events, select 'Let me select individual events' and choose at least 'Pull requests'\n\n"
+                f"4. For events, select 'Let me select individual events' and choose at least 'Pull requests'. "
+                f"Add 'Check runs' and 'Check suites' to show CI status on PR cards\n\n"
                 f"5. Click 'Add webhook'\n\n"
                 f"GitHub will send a test 'ping' event - the bot should respond with success."
             )
@@ -108,8 +200,307 @@ class CommandHandler:
             # Send instructions via DM to keep the URL somewhat private
             await message.author.send(instructions)
             
-            await message.channel.send(f"I've sent the webhook setup instructions to your DMs, {message.author.mention}! "
+            await reply(message, f"I've sent the webhook setup instructions to your DMs, {message.author.mention}! "
                                     f"Check your direct messages.")
         except discord.Forbidden:
             # Cannot send DMs to the user, send in channel instead
-            await message.channel.send(f"{message.author.mention}, I couldn't send you a DM. Here's the webhook URL:\n{webhook_url}")
+            await reply(message, f"{message.author.mention}, I couldn't send you a DM. Here's the webhook URL:\n{webhook_url}")
+
+    async def profile(self, message: discord.Message, parts: list) -> None:
+        """Sample every thread's stack for a while and save a collapsed-stack profile."""
+        seconds = parse_duration(parts[2]) if len(parts) >= 3 else 30.0
+        if not seconds or seconds > self.MAX_PROFILE_SECONDS:
+            await reply(message, f"Usage: !prbot profile [duration], e.g. 30s or 2m (max {self.MAX_PROFILE_SECONDS}s)")
+            return
+        if self._profiling:
+            await reply(message, "A profile is already running.")
+            return
+        
+        self._profiling = True
+        try:
+            await reply(message, f"⏱️ Profiling for {seconds:g}s...")
+            # The sampler sleeps between samples, so it runs in a worker thread
+            # where it can watch the event loop without blocking it
+            loop = asyncio.get_running_loop()
+            counts = await loop.run_in_executor(None, sample_stacks, seconds)
+            path = await loop.run_in_executor(None, write_folded, counts, self.PROFILE_DIR)
+        finally:
+            self._profiling = False
+        
+        total = sum(counts.values())
+        top = "\n".join(f"{count * 100 / total:.0f}% {frame}" for frame, count in top_frames(counts)) if total else ""
+        await reply(message, 
+            f"Profile saved to `{path}` ({total} samples). Render it with flamegraph.pl or speedscope."
+            + (f"\nTop frames:\n```\n{top}\n```" if top else "")
+        )
+    
+    async def configure_mirror(self, message: discord.Message, config: Dict[str, Any],
+                               guild_id: int, parts: list) -> None:
+        """List, add or remove channels that mirror this channel's PR cards."""
+        if not guild_id:
+            await reply(message, "This command only works in servers.")
+            return
+        
+        # JSON config keys are strings
+        source = str(message.channel.id)
+        mirrors = {k: list(v) for k, v in config.get("mirrors", {}).items()}
+        targets = mirrors.get(source, [])
+        
+        action = parts[2].lower() if len(parts) >= 3 else "list"
+        if action == "list":
+            if targets:
+                listed = ", ".join(f"<#{channel_id}>" for channel_id in targets)
+                await reply(message, f"PR cards from this channel are mirrored to: {listed}")
+            else:
+                await reply(message, "This channel has no mirrors. Use `!prbot mirror add #channel`.")
+            return
+        
+        # Channel argument follows the add/remove subcommand
+        target = self.get_target_channel(message, parts[1:])
+        if action not in ("add", "remove") or not target:
+            await reply(message, "Usage: !prbot mirror [add|remove] #channel")
+            return
+        
+        if action == "add":
+            if target.id == message.channel.id or target.id in targets:
+                await reply(message, f"{target.mention} already gets these PR cards.")
+                return
+            targets.append(target.id)
+            confirmation = f"PR cards from this channel will also be posted to {target.mention}."
+        else:
+            if target.id not in targets:
+                await reply(message, f"{target.mention} isn't a mirror of this channel.")
+                return
+            targets.remove(target.id)
+            confirmation = f"Stopped mirroring PR cards to {target.mention}."
+        
+        if targets:
+            mirrors[source] = targets
+        else:
+            mirrors.pop(source, None)
+        self.bot.config_manager.update_guild_config(guild_id, "mirrors", mirrors)
+        await reply(message, confirmation)
+
+    async def link_github(self, message: discord.Message, guild_id: int, parts: list) -> None:
+        """List links, link the author's own login, or (admins) link a login to a member."""
+        if not guild_id:
+            await reply(message, "This command only works in servers.")
+            return
+        members = self.bot.members
+        
+        if len(parts) < 3:
+            links = members.links(guild_id)
+            if not links:
+                await reply(message, "No GitHub logins are linked. Use `!prbot link github-login @member`.")
+                return
+            listed = "\n".join(f"{login} → <@{user_id}>" for login, user_id in sorted(links.items()))
+            await reply(message, f"Linked GitHub logins:\n{listed}",
+                                       allowed_mentions=discord.AllowedMentions.none())
+            return
+        
+        login = parts[2].lstrip('@')
+        target = message.mentions[0] if message.mentions else message.author
+        existing = members.user_for(guild_id, login)
+        if target == message.author and existing and existing != message.author.id:
+            await reply(message, f"`{login}` is already linked to someone else; ask an admin to change it.")
+            return
+        
+        members.link(guild_id, login, target.id)
+        await reply(message, f"Linked GitHub `{login}` to {target.mention}; review requests will ping them.",
+                                   allowed_mentions=discord.AllowedMentions.none())
+    
+    async def unlink_github(self, message: discord.Message, guild_id: int, parts: list) -> None:
+        """Remove a GitHub login's link."""
+        if len(parts) < 3:
+            await reply(message, "Usage: !prbot unlink github-login")
+            return
+        login = parts[2].lstrip('@')
+        if self.bot.members.unlink(guild_id, login):
+            await reply(message, f"Unlinked GitHub `{login}`.")
+        else:
+            await reply(message, f"`{login}` isn't linked.")
+
+    async def configure_pushes(self, message: discord.Message, config: Dict[str, Any],
+                               guild_id: int, parts: list) -> None:
+        """Show or set the channel push and release summaries are posted to."""
+        if not guild_id:
+            await reply(message, "This command only works in servers.")
+            return
+        
+        if len(parts) >= 3 and parts[2].lower() == "reset":
+            self.bot.config_manager.update_guild_config(guild_id, "push_channel", None)
+            await reply(message, "Push and release summaries will go to the channel of the webhook that sent them.")
+            return
+        
+        target = self.get_target_channel(message, parts)
+        if target:
+            self.bot.config_manager.update_guild_config(guild_id, "push_channel", target.id)
+            await reply(message, f"Push and release summaries will be posted to {target.mention}.")
+        elif len(parts) >= 3:
+            await reply(message, "Usage: !prbot pushes [#channel|reset]")
+        elif config.get("push_channel"):
+            await reply(message, f"Push and release summaries are posted to <#{config['push_channel']}>.")
+        else:
+            await reply(message, "Push and release summaries go to the channel of the webhook that sent them. "
+                                 "Use `!prbot pushes #channel` to send them elsewhere.")
+
+    async def configure_budget(self, message: discord.Message, guild_id: int, parts: list) -> None:
+        """Show or set how many Discord API calls per minute this server's events may use."""
+        if not guild_id:
+            await reply(message, "This command only works in servers.")
+            return
+        
+        budgets = self.bot.budgets
+        if len(parts) >= 3 and parts[2].lower() == "reset":
+            self.bot.config_manager.update_guild_config(guild_id, "api_budget", None)
+            await reply(message, f"API budget reset to the default of {budgets.per_minute} calls per minute.")
+        elif len(parts) >= 3:
+            try:
+                per_minute = int(parts[2])
+            except ValueError:
+                per_minute = 0
+            if per_minute <= 0:
+                await reply(message, "Usage: !prbot budget [calls-per-minute|reset]")
+                return
+            self.bot.config_manager.update_guild_config(guild_id, "api_budget", per_minute)
+            await reply(message, f"API budget set to {per_minute} calls per minute.")
+        else:
+            await reply(message, f"API budget: {budgets.summary(guild_id)}. Above "
+                                 f"{int(budgets.SOFT_LIMIT * 100)}% updates are batched more; "
+                                 "over budget, comment, CI, push and release updates are skipped.")
+
+    async def dead_letters(self, message: discord.Message, parts: list) -> None:
+        """List, re-drive or clear Discord writes that failed after their retries."""
+        writes = self.bot.pr_handler.writes
+        action = parts[2].lower() if len(parts) >= 3 else "list"
+        
+        if action == "clear":
+            await reply(message, f"Cleared {writes.clear()} dead letters.")
+            return
+        if action == "redrive":
+            target = parts[3].lower() if len(parts) >= 4 else "all"
+            if target == "all":
+                letter_ids = None
+            elif target.lstrip('#').isdigit() and writes.get(int(target.lstrip('#'))):
+                letter_ids = [int(target.lstrip('#'))]
+            else:
+                await reply(message, f"No dead letter {target}. Use `!prbot deadletters` to list them.")
+                return
+            succeeded, failed = await writes.redrive(letter_ids)
+            await reply(message, f"Re-drove {succeeded + failed} dead letters: {succeeded} succeeded, {failed} failed again.")
+            return
+        if action != "list":
+            await reply(message, "Usage: !prbot deadletters [redrive [id|all]|clear]")
+            return
+        
+        letters = list(writes.dead_letters.values())
+        if not letters:
+            await reply(message, f"No dead letters. Discord writes: {writes.summary()}")
+            return
+        lines = [f"{len(letters)} dead letters (newest last):"]
+        for letter in letters[-self.DEAD_LETTER_LIMIT:]:
+            age = format_duration(time.time() - letter.failed_at)
+            kind = "transient" if letter.transient else "permanent"
+            lines.append(f"#{letter.id} {letter.label}: {letter.error[:150]} ({kind}, "
+                         f"{letter.attempts} attempts, {age} ago)")
+        if len(letters) > self.DEAD_LETTER_LIMIT:
+            lines.insert(1, f"...{len(letters) - self.DEAD_LETTER_LIMIT} older not shown")
+        lines.append("Use `!prbot deadletters redrive [id|all]` to retry them.")
+        await reply(message, "\n".join(lines)[:2000])
+
+    async def show_stats(self, message: discord.Message, parts: list) -> None:
+        """Report PR throughput in this channel over a window, optionally for one repo."""
+        repository = None
+        window = 7
+        for arg in parts[2:]:
+            if self.REPO_PATTERN.match(arg):
+                repository = arg
+            elif arg.lower().endswith('d') and arg[:-1].isdigit():
+                window = int(arg[:-1])
+            else:
+                await reply(message, f"Usage: !prbot stats [owner/repo] [window, e.g. 7d; max {self.bot.stats.days}d]")
+                return
+        
+        report = self.bot.stats.report(message.channel.id, window, repository)
+        days = report["days"]
+        scope = repository or "all repos"
+        median_merge = report["median_merge"]
+        median_review = report["median_review"]
+        text = (
+            f"📊 **PR activity in this channel, last {days} day{'s' if days != 1 else ''}** ({scope})\n"
+            f"Opened: {report['opened']} ({report['opened'] / days:.1f}/day)\n"
+            f"Merged: {report['merged']} ({report['merged'] / days:.1f}/day)\n"
+            f"Closed without merging: {report['closed']}\n"
+            f"Median open → merge: {'≈' + format_duration(median_merge) if median_merge is not None else 'n/a'}\n"
+            f"Median time to first review: {'≈' + format_duration(median_review) if median_review is not None else 'n/a'}"
+        )
+        await reply(message, text)
+
+    async def find_pr(self, message: discord.Message, guild_id: int, parts: list) -> None:
+        """Search this server's tracked PR cards and reply with jump links."""
+        if not guild_id or len(parts) < 3:
+            await reply(message, "Usage: !prbot find <text|#number|author> (in a server)")
+            return
+        query = " ".join(parts[2:])
+        results = self.bot.pr_handler.index.search(query, guild_id, limit=self.FIND_LIMIT)
+        if not results:
+            await reply(message, f"No tracked PRs match `{query}`.")
+            return
+        
+        lines = []
+        for (repository, pr_number, channel_id), record in results:
+            line = (f"**{repository} #{pr_number}** {record.title} ({record.status}) - "
+                    f"[card](https://discord.com/channels/{guild_id}/{channel_id}/{record.message_id})")
+            if record.thread_id:
+                line += f" · [thread](https://discord.com/channels/{guild_id}/{record.thread_id})"
+            lines.append(line)
+        await reply(message, "\n".join(lines), suppress_embeds=True)
+
+    async def backfill(self, message: discord.Message, parts: list) -> None:
+        """Create cards in this channel for every open PR of a repo that isn't tracked yet."""
+        if len(parts) < 3 or not self.REPO_PATTERN.match(parts[2]):
+            await reply(message, "Usage: !prbot backfill owner/repo")
+            return
+        repository = parts[2]
+        
+        await reply(message, f"Fetching open PRs for {repository}...")
+        try:
+            pulls = await self.bot.github.list_open_pulls(repository)
+        except GitHubError as e:
+            await reply(message, f"Couldn't list PRs for {repository}: {e}")
+            return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await reply(message, f"Couldn't reach GitHub to list PRs for {repository}: {str(e) or type(e).__name__}")
+            return
+        
+        pr_handler = self.bot.pr_handler
+        semaphore = asyncio.Semaphore(self.BACKFILL_CONCURRENCY)
+        
+        async def create_card(pr: Dict[str, Any]) -> Optional[bool]:
+            key = (repository, str(pr.get('number', '')))
+            if pr_handler.get_card(key, message.channel.id):
+                return None
+            head_sha = pr.get('head', {}).get('sha')
+            if head_sha:
+                pr_handler.ci.note_head(key, head_sha)
+            async with semaphore:
+                record = await pr_handler.create_or_update_pr(
+                    repository=repository,
+                    pr_number=key[1],
+                    action=resolve_pr_state('opened', pr),
+                    title=pr.get('title', ''),
+                    url=pr.get('html_url'),
+                    author=pr.get('user', {}).get('login'),
+                    channel=message.channel
+                )
+            return record is not None
+        
+        results = await asyncio.gather(*(create_card(pr) for pr in pulls))
+        
+        created = sum(1 for r in results if r is True)
+        failed = sum(1 for r in results if r is False)
+        tracked = sum(1 for r in results if r is None)
+        await reply(message, 
+            f"Backfill for {repository}: {created} cards created, {tracked} already tracked"
+            + (f", {failed} failed" if failed else "")
+        )
@@ -0,0 +1,166 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import datetime
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+DURATION_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)(ms|s|m)?$')
+
+def parse_duration(text: str) -> Optional[float]:
+    """Parse '30s', '2m', '500ms' or a bare number of seconds."""
+    match = DURATION_PATTERN.match(text.strip().lower())
+    if not match:
+        return None
+    value, unit = float(match.group(1)), match.group(2) or 's'
+    return value / 1000 if unit == 'ms' else value * 60 if unit == 'm' else value
+
+class LatencyStats:
+    """Running count/mean/max of a duration, in O(1) memory."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self) -> str:
+        if not self.count:
+            return "none yet"
+        return f"{self.count} samples, avg {self.total / self.count * 1000:.1f}ms, max {self.max * 1000:.0f}ms"
+
+class StartupTimer:
+    """Durations of the startup phases, some of which overlap (the webhook
+    server binds on its own thread while the gateway logs in)."""
+
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._open: Dict[str, float] = {}
+        # (phase, duration, seconds after start it finished)
+        self.phases: List[Tuple[str, float, float]] = []
+
+    def begin(self, phase: str) -> None:
+        self._open[phase] = time.perf_counter()
+
+    def end(self, phase: str, began: float = None) -> None:
+        began = self._open.pop(phase, began)
+        if began is None:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - began, now - self.started))
+
+    def summary(self) -> str:
+        if not self.phases:
+            return "not measured"
+        return ", ".join(f"{phase} {duration:.2f}s" for phase, duration, _ in self.phases) + \
+            f"; done {max(at for _, _, at in self.phases):.2f}s after start"
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper.
+
+    Anything that blocks the loop (a synchronous file write, a CPU-heavy
+    parse) delays every coroutine, and shows up here as lag.
+    """
+
+    def __init__(self, interval: float = 0.5, warn_threshold: float = 0.25):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.lag = LatencyStats()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.lag.add(lag)
+            if lag >= self.warn_threshold:
+                print(f"⚠️ Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+class SlowCallbackLog(logging.Handler):
+    """Keeps asyncio debug mode's "Executing ... took N seconds" warnings."""
+
+    def __init__(self, keep: int = 20):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+        self.recent: deque = deque(maxlen=keep)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        if message.startswith("Executing"):
+            self.count += 1
+            self.recent.append(message)
+            print(f"⚠️ Slow callback: {message}")
+
+def enable_slow_callback_reporting(loop: asyncio.AbstractEventLoop, threshold: float) -> SlowCallbackLog:
+    """Turn on asyncio debug mode and collect callbacks that run longer than threshold.
+
+    Debug mode adds per-callback overhead, so this is opt-in.
+    """
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+    handler = SlowCallbackLog()
+    logging.getLogger('asyncio').addHandler(handler)
+    return handler
+
+def sample_stacks(duration: float, interval: float = 0.005) -> Counter:
+    """Sample every thread's Python stack for duration seconds.
+
+    Blocks the calling thread, so run it in an executor. Returns folded
+    stacks ("thread;module:function;...") mapped to sample counts.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+def write_folded(counts: Counter, directory: str = "profiles") -> str:
+    """Write folded stacks for flamegraph.pl / speedscope and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"prbot-{stamp}.folded")
+    with open(path, 'w') as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+def top_frames(counts: Counter, limit: int = 5) -> List[Tuple[str, int]]:
+    """Leaf frames that were on-CPU (or blocked) in the most samples."""
+    leaves: Dict[str, int] = Counter()
+    for stack, count in counts.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return leaves.most_common(limit)
@@ -0,0 +1,147 @@
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from diagnostics import LatencyStats
+
+# Highest priority first
+LANES = ('state', 'review', 'chatter')
+
+class PriorityEventQueue:
+    """Runs webhook event processors on a fixed pool of workers, by priority lane.
+
+    A merge shouldn't wait behind hundreds of comment posts that arrived a
+    moment earlier, so workers always take from the highest-priority lane that
+    has work. To keep a steady stream of merges from starving comments, an
+    event that has waited max_wait seconds goes next regardless of lane
+    (oldest first), which bounds how late any event can run.
+
+    Priority never reorders events for the same PR, though: an item submitted
+    with a key waits outside the lanes while an earlier item with that key is
+    queued or running, and takes its lane once that one finishes. So a close
+    can't overtake the label or push that arrived just before it and then be
+    overwritten by it.
+
+    Items are coroutine factories, so an event dropped at shutdown never
+    creates a coroutine that goes un-awaited.
+    """
+
+    def __init__(self, workers: int = 8, max_wait: float = 5.0):
+        self.worker_count = workers
+        self.max_wait = max_wait
+        # lane -> FIFO of (enqueue time, label, factory)
+        self._lanes: Dict[str, Deque[Tuple[float, str, Callable[[], Awaitable[Any]], Optional[Hashable]]]] = {
+            lane: deque() for lane in LANES
+        }
+        # key -> items waiting for the key's earlier item, as (lane, item).
+        # A key is present while one of its items is queued in a lane or running.
+        self._held: Dict[Hashable, Deque[Tuple[str, tuple]]] = {}
+        # Time events spent queued, per lane
+        self.waits: Dict[str, LatencyStats] = {lane: LatencyStats() for lane in LANES}
+        self._workers: List[asyncio.Task] = []
+        # Counts queued items; created on first use so it binds to the running loop
+        self._available: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._active = 0
+        self.completed = 0
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._lanes.values()) + sum(len(q) for q in self._held.values())
+
+    def depth(self, lane: str) -> int:
+        return len(self._lanes[lane])
+
+    def submit(self, lane: str, label: str, factory: Callable[[], Awaitable[Any]],
+               key: Hashable = None) -> None:
+        """Queue factory() to run in a lane. Must be called on the event loop.
+
+        Items with the same key (e.g. one PR) run one at a time, in submission order.
+        """
+        self._ensure_running()
+        self._idle.clear()
+        item = (time.monotonic(), label, factory, key)
+        if key is not None:
+            if key in self._held:
+                self._held[key].append((lane, item))
+                return
+            self._held[key] = deque()
+        self._lanes[lane].append(item)
+        self._available.release()
+
+    def _release_key(self, key: Hashable) -> None:
+        """Move the key's next held item into its lane, or forget the key."""
+        held = self._held.get(key)
+        if held is None:
+            return
+        if not held:
+            del self._held[key]
+            return
+        lane, item = held.popleft()
+        # It has been waiting since it was submitted, so it goes to the front
+        self._lanes[lane].appendleft(item)
+        self._available.release()
+
+    def _ensure_running(self) -> None:
+        if self._available is None:
+            self._available = asyncio.Semaphore(0)
+            self._idle = asyncio.Event()
+            self._idle.set()
+        loop = asyncio.get_running_loop()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(loop.create_task(self._work()))
+
+    def _pop(self) -> Tuple[str, float, str, Callable[[], Awaitable[Any]], Optional[Hashable]]:
+        """Take the next item: an overdue one if any, else the top lane's oldest."""
+        now = time.monotonic()
+        heads = [(q[0][0], lane) for lane, q in self._lanes.items() if q]
+        overdue = [head for head in heads if now - head[0] >= self.max_wait]
+        lane = min(overdue)[1] if overdue else heads[0][1]
+        enqueued, label, factory, key = self._lanes[lane].popleft()
+        return lane, now - enqueued, label, factory, key
+
+    async def _work(self) -> None:
+        while True:
+            await self._available.acquire()
+            lane, waited, label, factory, key = self._pop()
+            self.waits[lane].add(waited)
+            if waited >= self.max_wait:
+                print(f"{label} waited {waited:.1f}s in the {lane} lane")
+            self._active += 1
+            try:
+                await factory()
+            except Exception as e:
+                print(f"Error processing {label}: {e}")
+            finally:
+                self._active -= 1
+                self.completed += 1
+                if key is not None:
+                    self._release_key(key)
+                if self._idle and not self._active and not len(self):
+                    self._idle.set()
+
+    async def wait_idle(self) -> None:
+        """Wait until nothing is queued or running."""
+        if self._idle:
+            await self._idle.wait()
+
+    def stop(self) -> int:
+        """Cancel the workers and drop queued items; returns how many were dropped."""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        dropped = len(self)
+        for queue in self._lanes.values():
+            queue.clear()
+        self._held.clear()
+        self._available = None
+        self._idle = None
+        return dropped
+
+    def summary(self) -> str:
+        """One line per lane: queued now and time spent waiting."""
+        return "\n".join(
+            f"{lane}: {len(self._lanes[lane])} queued, wait {self.waits[lane].summary()}"
+            for lane in LANES
+        )
@@ -0,0 +1,120 @@
+import re
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse, parse_qs
+
+import aiohttp
+
+LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="(\w+)"')
+
+class GitHubError(Exception):
+    """A GitHub REST call failed with a non-2xx/304 response."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API returned {status}: {message}")
+        self.status = status
+
+def parse_link_header(header: Optional[str]) -> Dict[str, str]:
+    """Parse a GitHub Link header into {rel: url}."""
+    if not header:
+        return {}
+    return {rel: url for url, rel in LINK_PATTERN.findall(header)}
+
+class GitHubClient:
+    """Small async GitHub REST client for bulk reads.
+
+    - Paginated listings fetch the first page, then every remaining page
+      concurrently once the Link header says how many there are.
+    - Responses are cached by URL with their ETag; repeat requests send
+      If-None-Match and a 304 reuses the cached body, which GitHub doesn't
+      count against the rate limit.
+    - At most max_concurrency requests are in flight at once.
+
+    base_url can point at a local stand-in server for tests.
+    """
+
+    API_URL = "https://api.github.com"
+    # How many URLs to keep ETag-cached bodies for
+    CACHE_SIZE = 256
+
+    def __init__(self, token: str = None, base_url: str = None, max_concurrency: int = 4,
+                 per_page: int = 100):
+        self.token = token
+        self.base_url = (base_url or self.API_URL).rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.per_page = per_page
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # url -> (etag, parsed body, link header)
+        self._cache: "OrderedDict[str, Tuple[str, Any, Optional[str]]]" = OrderedDict()
+        # Requests answered from cache via 304, for status reporting
+        self.not_modified = 0
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Created on first use so the session binds to the running loop
+        if self._session is None or self._session.closed:
+            headers = {
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "User-Agent": "discord-pr-manager",
+            }
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            self._session = aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=30))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def get(self, url: str) -> Tuple[Any, Dict[str, str]]:
+        """GET a URL, returning (json body, {rel: url} from the Link header)."""
+        session = self._ensure_session()
+        cached = self._cache.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        async with self._semaphore:
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304 and cached:
+                    self.not_modified += 1
+                    self._cache.move_to_end(url)
+                    return cached[1], parse_link_header(cached[2])
+                if resp.status >= 400:
+                    raise GitHubError(resp.status, (await resp.text())[:200])
+                body = await resp.json()
+                link = resp.headers.get("Link")
+                etag = resp.headers.get("ETag")
+
+        if etag:
+            self._cache[url] = (etag, body, link)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return body, parse_link_header(link)
+
+    async def get_paginated(self, path: str, params: Dict[str, Any] = None) -> List[Any]:
+        """Fetch every page of a list endpoint and return the items in order."""
+        query = dict(params or {}, per_page=self.per_page)
+        first_url = f"{self.base_url}{path}?{urlencode(query)}"
+        items, links = await self.get(first_url)
+        items = list(items)
+
+        if 'last' in links:
+            last_page = int(parse_qs(urlparse(links['last']).query).get('page', ['1'])[0])
+            urls = [f"{self.base_url}{path}?{urlencode(dict(query, page=page))}"
+                    for page in range(2, last_page + 1)]
+            pages = await asyncio.gather(*(self.get(url) for url in urls))
+            for page_items, _ in pages:
+                items.extend(page_items)
+        else:
+            # No total advertised; walk the next links one at a time
+            while 'next' in links:
+                page_items, links = await self.get(links['next'])
+                items.extend(page_items)
+        return items
+
+    async def list_open_pulls(self, repository: str) -> List[Dict[str, Any]]:
+        """List all open pull requests for an owner/repo."""
+        return await self.get_paginated(f"/repos/{repository}/pulls", {"state": "open"})
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
@@ -7,11 +7,13 @@ PING = 'ping'  # Webhook confirmation
 PULL_REQUEST_REVIEW = 'pull_request_review'  # PR reviews (approved, changes_requested, etc.)
 ISSUE_COMMENT = 'issue_comment'  # Comments on PRs and issues
 PULL_REQUEST_REVIEW_COMMENT = 'pull_request_review_comment'  # Code review comments on PR diffs
+CHECK_RUN = 'check_run'  # A single CI check queued/completed (repo webhooks get created + completed)
+CHECK_SUITE = 'check_suite'  # A set of checks for one commit (repo webhooks get completed only)
+PUSH = 'push'  # Commits pushed to a branch or tag
+RELEASE = 'release'  # Release published, edited, deleted, etc.
 
 # Additional GitHub events we might want to support in future:
-# - 'push': When commits are pushed to branches
-# - 'release': When releases are created
-# - 'workflow_run': When GitHub Actions complete
+# - 'workflow_run': When GitHub Actions complete (CI state comes from check_run/check_suite)
 
 # ✅ VERIFIED pull_request event actions (from GitHub docs):
 PR_ACTIONS = {
@@ -39,4 +41,33 @@ COMMENT_ACTIONS = {
     'created': 'Comment created',
     'edited': 'Comment edited', 
     'deleted': 'Comment deleted'
-}
\ No newline at end of file
+}
+
+# ✅ VERIFIED check_run statuses and conclusions (from GitHub docs):
+CHECK_STATUSES = {
+    'queued': 'Check waiting to run',
+    'in_progress': 'Check running',
+    'completed': 'Check finished (see conclusion)'
+}
+
+CHECK_CONCLUSIONS = {
+    'success': 'Check passed',
+    'failure': 'Check failed',
+    'neutral': 'Check finished without pass/fail',
+    'cancelled': 'Check cancelled',
+    'skipped': 'Check skipped',
+    'timed_out': 'Check timed out',
+    'action_required': 'Check needs manual action',
+    'stale': 'Check marked stale by GitHub'
+}
+
+# ✅ VERIFIED release actions (from GitHub docs); only 'published' is posted:
+RELEASE_ACTIONS = {
+    'published': 'Release published (including pre-releases)',
+    'created': 'Draft or release created',
+    'edited': 'Release details edited',
+    'prereleased': 'Pre-release published (also sends published)',
+    'released': 'Release published or changed from pre-release (also sends published)',
+    'unpublished': 'Release unpublished',
+    'deleted': 'Release deleted'
+}
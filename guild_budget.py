@@ -0,0 +1,108 @@
+import time
+import contextvars
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# The guild the running webhook processor is working for. Set per event by
+# webhook_server; tasks and TimerHeap callbacks started from there inherit it,
+# so every Discord call they make is charged to that guild.
+current_guild = contextvars.ContextVar("current_guild", default=None)
+
+# Seconds of history behind "calls per minute"
+WINDOW = 60
+
+class GuildBudgets:
+    """Per-guild accounting of Discord API calls, with graceful degradation.
+
+    Every Discord write that goes through RetryingWriter is counted against
+    the guild in current_guild, in a ring of WINDOW one-second buckets per
+    guild, so usage is always "calls in the last minute" in fixed memory.
+    Each guild has a per-minute budget (the default, or its "api_budget"
+    config). As a guild approaches it, it degrades in two steps:
+
+    - degraded (SOFT_LIMIT of the budget used): coalescing windows for comment
+      edits, CI updates, pushes and timelines are stretched by STRETCH, so
+      bursts collapse into fewer edits
+    - over (the whole budget used): chatter events (comments, CI, pushes and
+      releases) are skipped outright until usage drops; state changes and
+      reviews still go through, since cards showing the wrong state is worse
+      than a noisy guild using a little more
+
+    Calls made outside any guild (commands, startup) are counted but never limited.
+    """
+
+    SOFT_LIMIT = 0.75
+    STRETCH = 4.0
+    # Lanes (see event_queue.LANES) that are dropped when a guild is over budget
+    SHED_LANES = ('chatter',)
+
+    def __init__(self, config_manager, per_minute: int = 300):
+        self.config_manager = config_manager
+        self.per_minute = per_minute
+        # guild ID -> (calls per second slot, which second each slot holds)
+        self._windows: Dict[Optional[int], Tuple[List[int], List[int]]] = {}
+        # guild ID -> events skipped for being over budget
+        self.shed: Counter = Counter()
+
+    def record(self, guild_id: int = None, now: float = None) -> None:
+        """Count one Discord call for guild_id (default: the current guild)."""
+        if guild_id is None:
+            guild_id = current_guild.get()
+        second = int(now if now is not None else time.time())
+        window = self._windows.get(guild_id)
+        if window is None:
+            window = self._windows[guild_id] = ([0] * WINDOW, [0] * WINDOW)
+        counts, seconds = window
+        slot = second % WINDOW
+        if seconds[slot] != second:
+            counts[slot] = 0
+            seconds[slot] = second
+        counts[slot] += 1
+
+    def usage(self, guild_id: Optional[int], now: float = None) -> int:
+        """Calls charged to guild_id in the last WINDOW seconds."""
+        window = self._windows.get(guild_id)
+        if window is None:
+            return 0
+        oldest = int(now if now is not None else time.time()) - WINDOW
+        counts, seconds = window
+        return sum(count for count, second in zip(counts, seconds) if second > oldest)
+
+    def budget(self, guild_id: int) -> int:
+        configured = self.config_manager.get_guild_config(guild_id).get("api_budget")
+        return int(configured) if configured else self.per_minute
+
+    def level(self, guild_id: Optional[int], now: float = None) -> str:
+        """'ok', 'degraded' or 'over' for guild_id's usage against its budget."""
+        if guild_id is None:
+            return 'ok'
+        used = self.usage(guild_id, now)
+        budget = self.budget(guild_id)
+        if used >= budget:
+            return 'over'
+        if used >= budget * self.SOFT_LIMIT:
+            return 'degraded'
+        return 'ok'
+
+    def admit(self, guild_id: int, lane: str, now: float = None) -> bool:
+        """Whether to run an event in lane for guild_id; counts it as shed if not."""
+        if lane in self.SHED_LANES and self.level(guild_id, now) == 'over':
+            self.shed[guild_id] += 1
+            return False
+        return True
+
+    def stretch(self, guild_id: int = None) -> float:
+        """Factor to widen coalescing windows by for guild_id (default: the current guild)."""
+        if guild_id is None:
+            guild_id = current_guild.get()
+        return self.STRETCH if self.level(guild_id) != 'ok' else 1.0
+
+    def summary(self, guild_id: int) -> str:
+        shed = self.shed[guild_id]
+        return (f"{self.usage(guild_id)}/{self.budget(guild_id)} calls in the last minute "
+                f"({self.level(guild_id)})" + (f", {shed} events skipped over budget" if shed else ""))
+
+    def busiest(self, limit: int = 3) -> List[Tuple[int, int]]:
+        """The guilds with the most calls in the last minute, as (guild ID, calls)."""
+        usage = [(guild_id, self.usage(guild_id)) for guild_id in self._windows if guild_id is not None]
+        return sorted((u for u in usage if u[1]), key=lambda u: -u[1])[:limit]
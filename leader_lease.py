@@ -0,0 +1,204 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+STATE_FILE = "prbot_state.db"
+
+class SharedState:
+    """SQLite database shared by an active and a standby bot on one host.
+
+    Holds three things both processes need to agree on:
+
+    - the leader lease: one row naming the holder and when its claim expires
+    - PR cards: every PRRecord the leader tracks, written through as cards
+      change, so a standby that takes over edits the existing cards instead
+      of posting duplicates
+    - the inbox: webhook deliveries a standby accepted, waiting for the
+      leader to adopt them into its own journal
+
+    SQLite's locking makes each of these safe across processes. A write can
+    wait up to the busy timeout for the other process, so the bot calls
+    these from executor threads rather than its event loop, and the Flask
+    request threads call them too; every statement goes through one lock,
+    as in WebhookJournal.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or STATE_FILE
+        self._lock = threading.Lock()
+        # Autocommit; the lease takes its own write transaction
+        self._db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS lease (
+                name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS cards (
+                repository TEXT NOT NULL, pr_number TEXT NOT NULL, channel_id INTEGER NOT NULL,
+                guild_id INTEGER, message_id INTEGER NOT NULL, thread_id INTEGER,
+                status TEXT, title TEXT, url TEXT, author TEXT, ci TEXT, reviews TEXT, timeline TEXT,
+                PRIMARY KEY (repository, pr_number, channel_id));
+            CREATE TABLE IF NOT EXISTS inbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, record TEXT NOT NULL);
+        """)
+        # Databases from before cards had timelines
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(cards)")]
+        if "timeline" not in columns:
+            self._db.execute("ALTER TABLE cards ADD COLUMN timeline TEXT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # Lease
+
+    def claim_lease(self, name: str, holder: str, ttl: float, now: float = None) -> bool:
+        """Take or renew the lease for ttl seconds; False if someone else holds it."""
+        now = time.time() if now is None else now
+        with self._lock:
+            try:
+                # IMMEDIATE takes the write lock up front, so two processes can't
+                # both read an expired lease and both claim it
+                self._db.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                print(f"Lease database busy: {e}")
+                return False
+            try:
+                row = self._db.execute("SELECT holder, expires FROM lease WHERE name = ?", (name,)).fetchone()
+                if row and row[0] != holder and row[1] > now:
+                    self._db.execute("ROLLBACK")
+                    return False
+                self._db.execute("INSERT OR REPLACE INTO lease (name, holder, expires) VALUES (?, ?, ?)",
+                                 (name, holder, now + ttl))
+                self._db.execute("COMMIT")
+                return True
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def release_lease(self, name: str, holder: str) -> None:
+        """Give the lease up early so a standby can take over straight away."""
+        with self._lock:
+            self._db.execute("DELETE FROM lease WHERE name = ? AND holder = ?", (name, holder))
+
+    def lease_holder(self, name: str) -> Optional[Tuple[str, float]]:
+        """Return (holder, expiry) of the lease, or None if nobody has claimed it."""
+        with self._lock:
+            row = self._db.execute("SELECT holder, expires FROM lease WHERE name = ?", (name,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    # PR cards
+
+    @staticmethod
+    def card_row(key: Tuple[str, str], record, guild_id: int = None) -> tuple:
+        """Snapshot a card's record as a cards row, so it can be written from another thread."""
+        repository, pr_number = key
+        return (repository, pr_number, record.channel_id, guild_id, record.message_id, record.thread_id,
+                record.status, record.title, record.url, record.author, record.ci,
+                json.dumps(record.reviews) if record.reviews else None,
+                json.dumps({"id": record.timeline_id, "entries": record.timeline,
+                            "transitions": record.transitions, "pushes": record.pushes})
+                if record.timeline else None)
+
+    def save_card(self, key: Tuple[str, str], record, guild_id: int = None) -> None:
+        """Write one card's record; a missing guild_id keeps the stored one."""
+        self.save_card_rows([self.card_row(key, record, guild_id)])
+
+    def save_card_rows(self, rows: List[tuple]) -> None:
+        """Write card_row snapshots in one transaction."""
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("""
+                    INSERT INTO cards (repository, pr_number, channel_id, guild_id, message_id, thread_id,
+                                       status, title, url, author, ci, reviews, timeline)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (repository, pr_number, channel_id) DO UPDATE SET
+                        guild_id = COALESCE(excluded.guild_id, guild_id), message_id = excluded.message_id,
+                        thread_id = excluded.thread_id, status = excluded.status, title = excluded.title,
+                        url = excluded.url, author = excluded.author, ci = excluded.ci, reviews = excluded.reviews,
+                        timeline = excluded.timeline
+                    """, rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def load_cards(self) -> List[Dict[str, Any]]:
+        """Every saved card as a dict of its columns."""
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM cards")
+            names = [column[0] for column in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row["reviews"] = json.loads(row["reviews"]) if row["reviews"] else None
+            row["timeline"] = json.loads(row["timeline"]) if row["timeline"] else None
+        return rows
+
+    # Inbox
+
+    def push_inbox(self, records: List[Dict[str, Any]]) -> int:
+        """Queue journal records for the leader; a delivery already queued is skipped."""
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR IGNORE INTO inbox (id, record) VALUES (?, ?)",
+                                 [(r["id"], json.dumps(r, separators=(',', ':'))) for r in records])
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    def peek_inbox(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Oldest queued records, left in place until ack_inbox."""
+        with self._lock:
+            rows = self._db.execute("SELECT record FROM inbox ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def ack_inbox(self, entry_ids: List[str]) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM inbox WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    def inbox_size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM inbox").fetchone()[0]
+
+class LeaderLease:
+    """This process's claim on the shared leader lease.
+
+    The leader renews every ttl / 3 seconds. If it dies or its loop stalls
+    for longer than ttl, the claim lapses and the standby's next attempt
+    takes it, so failover takes at most ttl plus a gateway login.
+    """
+
+    NAME = "leader"
+
+    def __init__(self, state: SharedState, holder: str, ttl: float = 10.0):
+        self.state = state
+        self.holder = holder
+        self.ttl = ttl
+        self.heartbeat = ttl / 3
+        # Time of the last successful claim, 0 if we've never held it
+        self.renewed_at = 0.0
+
+    def try_acquire(self) -> bool:
+        """Claim or renew the lease. False means another process is leader."""
+        now = time.time()
+        if self.state.claim_lease(self.NAME, self.holder, self.ttl, now):
+            self.renewed_at = now
+            return True
+        return False
+
+    @property
+    def held(self) -> bool:
+        """Whether our last claim is still within its ttl."""
+        return time.time() < self.renewed_at + self.ttl
+
+    def release(self) -> None:
+        self.state.release_lease(self.NAME, self.holder)
+        self.renewed_at = 0.0
+
+    def leader(self) -> Optional[Tuple[str, float]]:
+        return self.state.lease_holder(self.NAME)
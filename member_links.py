@@ -0,0 +1,75 @@
+import time
+from typing import Dict, Optional, Tuple
+
+import discord
+
+class MemberDirectory:
+    """Per-guild GitHub login -> Discord member mapping, for review pings.
+
+    Links live in each guild's config under "github_links" ({login: user ID})
+    and are indexed in memory by lowercased login, since GitHub logins are
+    case-insensitive. The bot runs without a member cache, so checking that a
+    linked user is still in the guild means a fetch; the answer is cached for
+    ttl seconds so a burst of review requests costs at most one fetch per user.
+    """
+
+    def __init__(self, config_manager, ttl: float = 3600.0):
+        self.config_manager = config_manager
+        self.ttl = ttl
+        # guild ID -> {lowercased login: Discord user ID}
+        self._index: Dict[int, Dict[str, int]] = {}
+        # (guild ID, user ID) -> (expiry, whether they're a member)
+        self._membership: Dict[Tuple[int, int], Tuple[float, bool]] = {}
+
+    def links(self, guild_id: int) -> Dict[str, int]:
+        """Return the guild's login index, building it from config on first use."""
+        index = self._index.get(guild_id)
+        if index is None:
+            saved = self.config_manager.get_guild_config(guild_id).get("github_links", {})
+            index = {login.lower(): int(user_id) for login, user_id in saved.items()}
+            self._index[guild_id] = index
+        return index
+
+    def user_for(self, guild_id: int, login: str) -> Optional[int]:
+        return self.links(guild_id).get(login.lower())
+
+    def link(self, guild_id: int, login: str, user_id: int) -> None:
+        index = self.links(guild_id)
+        index[login.lower()] = user_id
+        self._membership.pop((guild_id, user_id), None)
+        self.config_manager.update_guild_config(guild_id, "github_links", dict(index))
+
+    def unlink(self, guild_id: int, login: str) -> bool:
+        index = self.links(guild_id)
+        if index.pop(login.lower(), None) is None:
+            return False
+        self.config_manager.update_guild_config(guild_id, "github_links", dict(index))
+        return True
+
+    async def is_member(self, guild: discord.Guild, user_id: int) -> bool:
+        """Whether user_id is in the guild, fetching at most once per ttl."""
+        cached = self._membership.get((guild.id, user_id))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        if guild.get_member(user_id):
+            present = True
+        else:
+            try:
+                await guild.fetch_member(user_id)
+                present = True
+            except discord.NotFound:
+                present = False
+            except discord.HTTPException as e:
+                # Don't cache a transient failure; assume they're still here
+                print(f"Failed to fetch member {user_id} in guild {guild.id}: {e}")
+                return True
+        self._membership[(guild.id, user_id)] = (time.monotonic() + self.ttl, present)
+        return present
+
+    async def mention(self, guild: discord.Guild, login: str) -> str:
+        """Mention the member linked to a GitHub login, or show the login in bold."""
+        user_id = self.user_for(guild.id, login)
+        if user_id and await self.is_member(guild, user_id):
+            return f"<@{user_id}>"
+        return f"**{login}**"
@@ -1,34 +1,294 @@
+import os
 import re
+import json
+import time
 import asyncio
-from typing import Dict, Tuple, Any
+import contextlib
+from collections import OrderedDict
+from typing import Dict, Tuple, Any, Optional, Union, Callable, Awaitable, List
 import datetime
 
 import discord
 
-from utils import get_status_color, get_status_icon
+from ci_status import CIAggregator
+from diagnostics import LatencyStats
+from timer_heap import TimerHeap
+from pr_index import PRSearchIndex
+from retries import RetryingWriter
+from utils import (
+    get_status_color, get_status_icon, archive_and_lock_thread, summarize_reviews, reply,
+    TERMINAL_STATES, BLOCKING_REVIEW_STATES, TRANSITION_STATES
+)
+
+# (PR key, channel ID) of a card whose thread is waiting to be archived
+ArchiveSlot = Tuple[Tuple[str, str], int]
+
+class PRRecord:
+    """Everything the bot keeps about one PR card between events.
+
+    Only Discord IDs and the state last rendered onto the card are held, never
+    discord.py Message/Thread objects, which drag embeds, author and connection
+    state along with them for as long as the PR is tracked. thread_id is None
+    until the thread exists (it may be deferred in lazy mode).
+    """
+
+    __slots__ = ("channel_id", "message_id", "thread_id", "status", "title", "url", "author",
+                 "ci", "reviews", "timeline", "timeline_id", "transitions", "pushes")
+
+    def __init__(self, channel_id: int, message_id: int, status: str, title: str,
+                 url: str = None, author: str = None, thread_id: int = None):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.thread_id = thread_id
+        self.status = status
+        self.title = title
+        self.url = url
+        self.author = author
+        # CI summary line currently shown on the card
+        self.ci: Optional[str] = None
+        # Reviewer login -> 'approved' / 'changes_requested'; None until someone reviews
+        self.reviews: Optional[Dict[str, str]] = None
+        # Latest state transitions as [epoch seconds, state], capped at
+        # PRHandler.TIMELINE_SIZE, shown in the thread's pinned timeline message
+        self.timeline: Optional[List[list]] = None
+        self.timeline_id: Optional[int] = None
+        # All transitions ever recorded, and how many times new commits were pushed
+        self.transitions = 0
+        self.pushes = 0
 
 class PRHandler:
     """Handles processing and management of pull request notifications."""
     
     PR_PATTERN = re.compile(r'\[(.*?)\] Pull request (\w+): #(\d+) (.*)')
+    # How many GitHub comments to remember the thread message of
+    COMMENT_MAP_SIZE = 5000
+    # Edits to one comment closer together than this collapse into one message edit
+    COMMENT_EDIT_WINDOW = 10.0
+    # Discord calls in flight at once when one event fans out to several cards
+    FANOUT_CONCURRENCY = 8
+    # State transitions listed in a thread's timeline message
+    TIMELINE_SIZE = 15
+    # Pushes to a PR collapse into one timeline edit per this many seconds
+    TIMELINE_EDIT_DELAY = 10.0
+    # Check events for a PR collapse into one CI edit per this many seconds,
+    # while its guild is close to its API budget
+    CI_EDIT_DELAY = 5.0
+    # Timers holding back a Discord write (see flush_deferred), by the first part of their key
+    DEFERRED_WRITES = ("comment-edit", "push-edit", "timeline", "ci")
+    # Card changes are written through to the shared store in one batch per this many seconds
+    CARD_SAVE_DELAY = 0.5
+    # Pending archivals are saved to disk this many seconds after they change
+    ARCHIVE_SAVE_DELAY = 5.0
     
-    def __init__(self):
-        """Initialize the PR handler with empty notification dictionaries."""
-        # Dictionary to store original notifications: key: (repository, pr_number), value: message
-        self.pr_notifications: Dict[Tuple[str, str], discord.Message] = {}
-        # Dictionary to store PR threads: key: (repository, pr_number), value: thread
-        self.pr_threads: Dict[Tuple[str, str], discord.Thread] = {}
-        # Per-PR locks so concurrent webhook events for the same PR can't each
+    def __init__(self, client: Optional[discord.Client] = None, lazy_threads: bool = False,
+                 thread_intro: bool = True, archive_grace: Optional[float] = 3600,
+                 writes: Optional[RetryingWriter] = None, archive_path: Optional[str] = None):
+        """Initialize the PR handler with empty notification dictionaries.
+
+        client is used to address channels and threads by ID. With lazy_threads,
+        a card's thread isn't created until the first update is posted to it, so
+        PRs nobody comments on cost one API call instead of three. thread_intro
+        controls the "Thread created" opening message. archive_grace is how many
+        seconds after a merge/close the PR's thread is locked and archived; None
+        leaves threads to Discord's auto-archive. archive_path is a JSON file the
+        pending archivals are kept in so they survive a restart; None keeps
+        them in memory only. writes retries card, thread and comment writes and
+        keeps the ones that fail for good.
+        """
+        self.client = client
+        self.lazy_threads = lazy_threads
+        self.thread_intro = thread_intro
+        self.archive_grace = archive_grace
+        self.archive_path = archive_path
+        # Pending archivals: (wall-clock due time, thread ID). The thread ID is
+        # kept so the thread can still be archived after a restart, when the
+        # card itself is no longer tracked.
+        self.archive_deadlines: Dict[ArchiveSlot, Tuple[float, Optional[int]]] = {}
+        # Pending thread archivals and collapsed comment edits
+        self.timers = TimerHeap()
+        # LRU of GitHub comment ID -> [PR key, {channel ID: thread message ID}, time of last edit]
+        self.comment_messages: "OrderedDict[int, list]" = OrderedDict()
+        # Latest body for comments whose edit is being held back by the window
+        self._pending_comment_edits: Dict[int, str] = {}
+        # Check run rollups behind each card's CI field
+        self.ci = CIAggregator()
+        # Tracked PR cards: key: (repository, pr_number), value: {channel ID: PRRecord},
+        # one card per channel the PR is posted to
+        self.pr_records: Dict[Tuple[str, str], Dict[int, PRRecord]] = {}
+        # Search over the tracked cards for !prbot find
+        self.index = PRSearchIndex()
+        # Per-card locks so concurrent webhook events for the same PR can't each
         # create a duplicate notification (check-then-act must be atomic).
-        self._pr_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._pr_locks: Dict[Tuple[str, str, int], asyncio.Lock] = {}
+        # How long updates queue behind a card lock, and how long Discord takes
+        # to apply a card edit, to tell contention apart from API latency
+        self.lock_waits = LatencyStats()
+        self.card_edits = LatencyStats()
+        # Shared store cards are written through to in active/standby mode
+        # (see leader_lease.SharedState), so a standby taking over knows them
+        self.store = None
+        # Cards changed since the last write-through: (key, channel ID) -> guild ID
+        self._unsaved: Dict[Tuple[Tuple[str, str], int], Optional[int]] = {}
+        # Keeps batches in order when one is still waiting on the database
+        self._save_lock: Optional[asyncio.Lock] = None
+        # Retries and dead letters for Discord writes
+        self.writes = writes or RetryingWriter()
+        # Per-guild API budgets (see guild_budget.GuildBudgets); None never degrades
+        self.budgets = None
+
+    def _coalesce(self, seconds: float) -> float:
+        """A coalescing window, stretched while the current guild is close to its API budget."""
+        return seconds * self.budgets.stretch() if self.budgets else seconds
 
-    def _lock_for(self, key: Tuple[str, str]) -> asyncio.Lock:
-        """Return the lock for a PR key, creating it on first use.
+    def _lock_for(self, key: Tuple[str, str], channel_id: int) -> asyncio.Lock:
+        """Return the lock for one PR card, creating it on first use.
 
         setdefault is atomic within the single-threaded event loop, so this is
-        race-free as long as no await occurs between lookup and insert.
+        race-free as long as no await occurs between lookup and insert. Locks
+        are per card rather than per PR so a slow channel never holds up the
+        same PR's card in another channel.
+        """
+        return self._pr_locks.setdefault((*key, channel_id), asyncio.Lock())
+
+    @contextlib.asynccontextmanager
+    async def _card_lock(self, key: Tuple[str, str], channel_id: int):
+        """Hold a card's lock, recording how long it took to acquire."""
+        started = time.perf_counter()
+        async with self._lock_for(key, channel_id):
+            self.lock_waits.add(time.perf_counter() - started)
+            yield
+
+    def get_card(self, key: Tuple[str, str], channel_id: int) -> Optional[PRRecord]:
+        """Return the PR's card in a channel, if there is one."""
+        return self.pr_records.get(key, {}).get(channel_id)
+
+    def _save_card(self, key: Tuple[str, str], record: PRRecord, guild_id: int = None) -> None:
+        """Queue a card to be written through to the shared store, if there is one.
+
+        SQLite can wait seconds for the standby's lock, so writes are batched
+        every CARD_SAVE_DELAY and run off the event loop by flush_cards.
+        """
+        if not self.store:
+            return
+        slot = (key, record.channel_id)
+        if guild_id is None:
+            guild_id = self._unsaved.get(slot)
+        self._unsaved[slot] = guild_id
+        if ("save-cards",) not in self.timers:
+            self.timers.schedule(("save-cards",), self.CARD_SAVE_DELAY, self.flush_cards)
+
+    async def flush_deferred(self) -> int:
+        """Apply held-back writes now instead of when their window closes.
+
+        Called on shutdown: their journal entries are already complete, so a
+        write still waiting in the timer heap when it stops would never happen.
         """
-        return self._pr_locks.setdefault(key, asyncio.Lock())
+        return await self.timers.flush(
+            lambda key: isinstance(key, tuple) and key[0] in self.DEFERRED_WRITES)
+
+    async def _save_new_card(self, key: Tuple[str, str], record: PRRecord, guild_id: int = None) -> None:
+        """Write a just-posted card through straight away rather than with the next batch.
+
+        A standby that takes over before the batch would otherwise not know the
+        card and post a duplicate.
+        """
+        if not self.store:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.store.save_card_rows, [self.store.card_row(key, record, guild_id)])
+        except Exception as e:
+            print(f"Failed to save card for PR {key}: {e}")
+            self._save_card(key, record, guild_id)
+
+    async def flush_cards(self) -> None:
+        """Write every queued card to the store in one transaction on an executor thread."""
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        async with self._save_lock:
+            if not self._unsaved or not self.store:
+                return
+            pending, self._unsaved = self._unsaved, {}
+            # Snapshot on the loop; the records keep changing while the write runs
+            rows = []
+            for (key, channel_id), guild_id in pending.items():
+                record = self.get_card(key, channel_id)
+                if record:
+                    rows.append(self.store.card_row(key, record, guild_id))
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.store.save_card_rows, rows)
+            except Exception as e:
+                print(f"Failed to save {len(rows)} PR cards: {e}")
+                # Try again with the next batch, unless the card changed again meanwhile
+                for slot, guild_id in pending.items():
+                    self._unsaved.setdefault(slot, guild_id)
+                self.timers.schedule(("save-cards",), self.CARD_SAVE_DELAY, self.flush_cards)
+
+    def restore_cards(self, rows: List[Dict[str, Any]]) -> int:
+        """Track cards saved by a previous leader. Returns how many were restored."""
+        for row in rows:
+            key = (row["repository"], row["pr_number"])
+            record = PRRecord(row["channel_id"], row["message_id"], row["status"], row["title"],
+                              row["url"], row["author"], row["thread_id"])
+            record.ci = row["ci"]
+            record.reviews = row["reviews"]
+            timeline = row.get("timeline") or {}
+            record.timeline = timeline.get("entries")
+            record.timeline_id = timeline.get("id")
+            record.transitions = timeline.get("transitions", 0)
+            record.pushes = timeline.get("pushes", 0)
+            self.pr_records.setdefault(key, {})[record.channel_id] = record
+            if row["guild_id"]:
+                self.index.update(key, record, row["guild_id"])
+        return len(rows)
+
+    async def fan_out(self, label: str, targets: Dict[int, Any],
+                      op: Callable[[Any], Awaitable[Any]]) -> Dict[int, Any]:
+        """Run op(target) for each channel's target concurrently.
+
+        At most FANOUT_CONCURRENCY of this call's targets run at once. The
+        limit is per call, not shared: ops fan out again themselves (an update
+        posting to every thread), and a nested call waiting for slots its own
+        callers hold would deadlock once enough events arrive together. Each
+        target is isolated, so one slow or failing channel doesn't hold up or
+        break the others, and per-channel latency is logged when there is more
+        than one. Returns {channel ID: result}, with None where op raised.
+        """
+        if not targets:
+            return {}
+        limit = asyncio.Semaphore(self.FANOUT_CONCURRENCY)
+        
+        async def run(channel_id: int, target: Any) -> Tuple[int, Any, bool, float]:
+            started = time.perf_counter()
+            try:
+                async with limit:
+                    result = await op(target)
+                return channel_id, result, True, time.perf_counter() - started
+            except Exception as e:
+                print(f"{label}: channel {channel_id} failed: {e}")
+                return channel_id, None, False, time.perf_counter() - started
+        
+        outcomes = await asyncio.gather(*(run(channel_id, target) for channel_id, target in targets.items()))
+        if len(outcomes) > 1:
+            timings = ", ".join(f"#{channel_id} {elapsed * 1000:.0f}ms{'' if ok else ' FAILED'}"
+                                for channel_id, _, ok, elapsed in outcomes)
+            print(f"{label}: {timings}")
+        return {channel_id: result for channel_id, result, _, _ in outcomes}
+
+    def _messageable(self, channel_id: int) -> Union[discord.abc.Messageable, discord.PartialMessageable]:
+        """Address a channel or thread by ID without an API call.
+
+        Guild channels and active threads come from discord.py's own cache;
+        anything else gets a PartialMessageable, which can still send/edit.
+        """
+        return self.client.get_channel(channel_id) or self.client.get_partial_messageable(channel_id)
+
+    def _card(self, record: PRRecord) -> discord.PartialMessage:
+        return self._messageable(record.channel_id).get_partial_message(record.message_id)
+
+    @staticmethod
+    def _thread_name(pr_number: str, title: str) -> str:
+        return f"PR #{pr_number}: {title[:80]}..." if len(title) > 80 else f"PR #{pr_number}: {title}"
 
     async def handle_pr_command(self, message: discord.Message) -> None:
         """Handle manual PR thread creation command (!pr)."""
@@ -60,28 +320,32 @@ class PRHandler:
             embed.set_footer(text=f"PR #{pr_number} • {repository}", icon_url="https://github.githubassets.com/favicons/favicon.png")
             
             # Try to build a GitHub URL
+            url = None
             if '/' in repository:
                 # Standard GitHub repo format: username/repository
                 url = f"https://github.com/{repository}/pull/{pr_number}"
                 embed.url = url
                 
-            if key in self.pr_notifications:
+            existing = self.get_card(key, message.channel.id)
+            if existing:
                 # PR already tracked, update the existing message
                 await self.update_pr_notification(key, embed, message)
+                existing.status = action
+                if message.guild:
+                    self.index.update(key, existing, message.guild.id)
+                self._save_card(key, existing, message.guild.id if message.guild else None)
             else:
                 # New PR, create a message and store it
                 bot_message = await message.channel.send(embed=embed)
-                self.pr_notifications[key] = bot_message
+                record = PRRecord(bot_message.channel.id, bot_message.id, action, description, url)
+                self.pr_records.setdefault(key, {})[record.channel_id] = record
+                if message.guild:
+                    self.index.update(key, record, message.guild.id)
+                await self._save_new_card(key, record, message.guild.id if message.guild else None)
                 
-                # Create a thread for this PR
-                thread_name = f"PR #{pr_number}: {description[:80]}..."  # Truncate if too long  
+                # Create a thread for this PR (or defer it until first activity)
                 try:
-                    thread = await bot_message.create_thread(name=thread_name)
-                    self.pr_threads[key] = thread
-                    
-                    # Send initial message to thread
-                    await thread.send(f"🧵 **Thread created for PR #{pr_number}**\nUpdates and comments will appear here.")
-                    
+                    await self._open_thread(key, record, bot_message)
                 except Exception as e:
                     print(f"❌ THREAD CREATION FAILED: {e}")
                     print(f"❌ Exception type: {type(e)}")
@@ -91,107 +355,513 @@ class PRHandler:
                 await message.add_reaction("✅")
         else:
             # Content doesn't match PR format, just echo it
-            await message.channel.send(f"Creating PR thread: {pr_content}")
+            await reply(message, f"Creating PR thread: {pr_content}")
     
     async def update_pr_notification(self, key: Tuple[str, str], 
                                     embed: discord.Embed, 
                                     message: discord.Message) -> None:
         """Update an existing PR notification."""
-        original_message = self.pr_notifications[key]
+        record = self.get_card(key, message.channel.id)
         try:
-            await original_message.edit(embed=embed)
+            await self._card(record).edit(embed=embed)
             # Acknowledge the update
             await message.add_reaction("👍")
         except Exception as e:
             print(f"Failed to update message: {e}")
             # If update fails, create a new message
-            await message.channel.send(f"Error updating PR status: {e}")
+            await reply(message, f"Error updating PR status: {e}")
     
-    async def post_thread_update(self, key: Tuple[str, str], update_message: str) -> None:
-        """Post an update to the PR thread."""
-        if key in self.pr_threads:
+    async def _open_thread(self, key: Tuple[str, str], record: PRRecord,
+                           message: discord.Message) -> None:
+        """Create the card's thread now, or leave it for the first update in lazy mode."""
+        if self.lazy_threads:
+            return
+        await self._create_thread(key, record, message)
+
+    async def _create_thread(self, key: Tuple[str, str], record: PRRecord,
+                             message: Union[discord.Message, discord.PartialMessage]) -> None:
+        """Create the thread hanging off a PR card and post the optional intro."""
+        thread = await self.writes.run(
+            f"Thread for PR {key} in #{record.channel_id}",
+            lambda: message.create_thread(name=self._thread_name(key[1], record.title)),
+            redrive=lambda: self._redrive_thread(key, record.channel_id),
+            idempotent=False,
+        )
+        record.thread_id = thread.id
+        self._save_card(key, record)
+        print(f"DEBUG: Thread created successfully! Thread ID: {thread.id}")
+        
+        if self.thread_intro:
+            await self.writes.run(f"Thread intro for PR {key}", lambda: thread.send(
+                f"🧵 **Thread created for PR #{key[1]}**\nUpdates and comments will appear here."),
+                idempotent=False)
+
+    async def _redrive_thread(self, key: Tuple[str, str], channel_id: int) -> None:
+        record = self.get_card(key, channel_id)
+        if not record:
+            return
+        async with self._card_lock(key, channel_id):
+            if not record.thread_id:
+                await self._create_thread(key, record, self._card(record))
+
+    async def _ensure_thread(self, key: Tuple[str, str], record: PRRecord) -> None:
+        """Create a missing thread for a card, at most once per card."""
+        # Under the card lock so two first comments arriving together can't both
+        # create a thread; re-check once the lock is held.
+        async with self._card_lock(key, record.channel_id):
+            if record.thread_id:
+                return
             try:
-                thread = self.pr_threads[key]
-                await thread.send(update_message)
+                await self._create_thread(key, record, self._card(record))
             except Exception as e:
-                print(f"Failed to post thread update: {e}")
-        else:
+                print(f"Failed to create deferred thread for PR {key}: {e}")
+
+    async def post_thread_update(self, key: Tuple[str, str], update_message: str,
+                                 create_thread: bool = True,
+                                 channel_id: int = None) -> Dict[int, discord.Message]:
+        """Post an update to the PR's threads and return {channel ID: sent message}.
+
+        Goes to every card's thread, or just the card in channel_id. In lazy
+        mode this is what creates the thread; pass create_thread=False for
+        updates that shouldn't open one on their own.
+        """
+        cards = self.pr_records.get(key, {})
+        if channel_id is not None:
+            cards = {channel_id: cards[channel_id]} if channel_id in cards else {}
+        if not cards:
             print(f"No thread found for PR {key}")
+            return {}
+        
+        async def post(record: PRRecord) -> Optional[discord.Message]:
+            if not record.thread_id and create_thread:
+                await self._ensure_thread(key, record)
+            if not record.thread_id:
+                return None
+            return await self.writes.run(f"Thread update for PR {key} in #{record.channel_id}",
+                                         lambda: self._messageable(record.thread_id).send(update_message),
+                                         idempotent=False)
+        
+        sent = await self.fan_out(f"Thread update for PR {key}", cards, post)
+        return {cid: message for cid, message in sent.items() if message is not None}
+
+    def note_transition(self, record: PRRecord, state: str, at: float = None) -> bool:
+        """Add state to the card's timeline if it moves the PR somewhere new.
+
+        Returns False for activity that isn't a transition (labels, edits,
+        pushes...) and for a repeat of the current state, so the caller only
+        posts to the thread about real transitions.
+        """
+        if state not in TRANSITION_STATES:
+            return False
+        if record.timeline and record.timeline[-1][1] == state:
+            return False
+        record.timeline = (record.timeline or []) + [[at or time.time(), state]]
+        del record.timeline[:-self.TIMELINE_SIZE]
+        record.transitions += 1
+        return True
+
+    def note_push(self, key: Tuple[str, str], record: PRRecord) -> None:
+        """Count new commits on the timeline, editing it once things settle."""
+        record.pushes += 1
+        self.timers.schedule(("timeline", key, record.channel_id), self._coalesce(self.TIMELINE_EDIT_DELAY),
+                             lambda: self.update_timeline(key, record, create_thread=False))
+
+    def render_timeline(self, key: Tuple[str, str], record: PRRecord) -> str:
+        lines = [f"📋 **PR #{key[1]} timeline**"]
+        earlier = record.transitions - len(record.timeline or [])
+        if earlier > 0:
+            lines.append(f"…{earlier} earlier")
+        for at, state in record.timeline or []:
+            lines.append(f"{get_status_icon(state)} {state.replace('_', ' ').capitalize()} <t:{int(at)}:f>")
+        if record.pushes:
+            lines.append(f"🔁 New commits pushed {record.pushes} time{'s' if record.pushes != 1 else ''}")
+        return "\n".join(lines)
+
+    async def update_timeline(self, key: Tuple[str, str], record: PRRecord, create_thread: bool = True) -> None:
+        """Show the card's timeline in its thread, editing the pinned message in place.
+
+        The first update posts and pins it. With create_thread=False a card
+        without a thread is left alone; its timeline shows up once the thread does.
+        """
+        self.timers.cancel(("timeline", key, record.channel_id))
+        if not record.thread_id and create_thread:
+            await self._ensure_thread(key, record)
+        if not record.thread_id or not record.timeline:
+            return
+        
+        thread = self._messageable(record.thread_id)
+        label = f"Timeline for PR {key} in #{record.channel_id}"
+        # Under the card lock so two updates can't both post a first timeline
+        async with self._card_lock(key, record.channel_id):
+            try:
+                if record.timeline_id:
+                    await self.writes.run(label, lambda: thread.get_partial_message(record.timeline_id).edit(
+                        content=self.render_timeline(key, record)))
+                    self._save_card(key, record)
+                    return
+                message = await self.writes.run(label, lambda: thread.send(self.render_timeline(key, record)),
+                                                idempotent=False)
+                record.timeline_id = message.id
+                self._save_card(key, record)
+                await self.writes.run(f"Pin {label.lower()}", thread.get_partial_message(message.id).pin)
+            except Exception as e:
+                print(f"Failed to update timeline for PR {key}: {e}")
+
+    def remember_comment(self, comment_id: int, key: Tuple[str, str],
+                         messages: Dict[int, discord.Message]) -> None:
+        """Record which thread messages show a GitHub comment, evicting the oldest."""
+        self.comment_messages[comment_id] = [key, {cid: m.id for cid, m in messages.items()}, 0.0]
+        self.comment_messages.move_to_end(comment_id)
+        while len(self.comment_messages) > self.COMMENT_MAP_SIZE:
+            evicted, _ = self.comment_messages.popitem(last=False)
+            self._pending_comment_edits.pop(evicted, None)
+            self.timers.cancel(("comment-edit", evicted))
+
+    async def edit_comment_message(self, comment_id: int, content: str) -> bool:
+        """Edit the thread message for a comment in place.
+
+        Returns False if the comment was never seen (or has been evicted), so the
+        caller can post it fresh. The first edit is applied straight away; later
+        ones inside COMMENT_EDIT_WINDOW are held and only the newest is applied
+        when the window closes.
+        """
+        entry = self.comment_messages.get(comment_id)
+        if not entry:
+            return False
+        self.comment_messages.move_to_end(comment_id)
+        
+        timer_key = ("comment-edit", comment_id)
+        window_ends = entry[2] + self._coalesce(self.COMMENT_EDIT_WINDOW)
+        if time.time() >= window_ends and timer_key not in self.timers:
+            entry[2] = time.time()
+            await self._apply_comment_edit(comment_id, content)
+        else:
+            self._pending_comment_edits[comment_id] = content
+            self.timers.schedule_at(timer_key, window_ends,
+                                    lambda: self._flush_comment_edit(comment_id))
+        return True
+
+    async def _flush_comment_edit(self, comment_id: int) -> None:
+        content = self._pending_comment_edits.pop(comment_id, None)
+        entry = self.comment_messages.get(comment_id)
+        if content is None or not entry:
+            return
+        entry[2] = time.time()
+        await self._apply_comment_edit(comment_id, content)
+
+    def _comment_targets(self, key: Tuple[str, str], message_ids: Dict[int, int]) -> Dict[int, discord.PartialMessage]:
+        """Map each channel's comment message to a PartialMessage in its card's thread."""
+        targets = {}
+        for channel_id, message_id in message_ids.items():
+            record = self.get_card(key, channel_id)
+            if record and record.thread_id:
+                targets[channel_id] = self._messageable(record.thread_id).get_partial_message(message_id)
+        return targets
+
+    async def _apply_comment_edit(self, comment_id: int, content: str) -> None:
+        key, message_ids, _ = self.comment_messages[comment_id]
+        label = f"Comment edit for PR {key}"
+        await self.fan_out(label, self._comment_targets(key, message_ids),
+                           lambda message: self.writes.run(label, lambda: message.edit(content=content)))
+
+    async def delete_comment_message(self, comment_id: int) -> None:
+        """Remove the thread message for a deleted GitHub comment, if we know it."""
+        self.timers.cancel(("comment-edit", comment_id))
+        self._pending_comment_edits.pop(comment_id, None)
+        entry = self.comment_messages.pop(comment_id, None)
+        if not entry:
+            return
+        key, message_ids, _ = entry
+        label = f"Comment delete for PR {key}"
+        await self.fan_out(label, self._comment_targets(key, message_ids),
+                           lambda message: self.writes.run(label, message.delete))
     
     async def create_or_update_pr(self, repository: str, pr_number: str, action: str,
                                  title: str, url: str = None, author: str = None,
-                                 channel: discord.TextChannel = None) -> discord.Message:
-        """Create or update a PR notification, serialized per PR.
+                                 channel: discord.TextChannel = None) -> Optional[PRRecord]:
+        """Create or update a PR's card in channel, serialized per card.
 
-        Holding the per-PR lock across the whole create-or-update makes the
-        `key in self.pr_notifications` check-then-act atomic, so a burst of
+        Holding the card lock across the whole create-or-update makes the
+        "is there a card in this channel" check-then-act atomic, so a burst of
         concurrent events for one PR (opened + labeled + assigned ...) creates
         a single card that later events update, instead of racing to post
         duplicate cards that close events can never reach.
         """
+        if not channel:
+            print("No channel provided for PR notification")
+            return None
         key = (repository, pr_number)
-        async with self._lock_for(key):
-            return await self._create_or_update_pr_unlocked(
+        async with self._card_lock(key, channel.id):
+            record = await self._create_or_update_pr_unlocked(
                 repository, pr_number, action, title, url, author, channel
             )
+            if record and not self._archived(key, record):
+                self.index.update(key, record, channel.guild.id)
+            return record
 
-    async def _create_or_update_pr_unlocked(self, repository: str, pr_number: str, action: str,
-                                 title: str, url: str = None, author: str = None,
-                                 channel: discord.TextChannel = None) -> discord.Message:
-        """Create a new PR notification or update an existing one."""
-        key = (repository, pr_number)
-        status_icon = get_status_icon(action)
+    def _archived(self, key: Tuple[str, str], record: PRRecord) -> bool:
+        """Whether a finished card's thread has already been archived."""
+        return (self.archive_grace is not None and record.status in TERMINAL_STATES
+                and (key, record.channel_id) not in self.archive_deadlines)
+
+    def render_card(self, key: Tuple[str, str], record: PRRecord) -> discord.Embed:
+        """Build a PR card embed from the state held in its record."""
+        repository, pr_number = key
+        status_icon = get_status_icon(record.status)
         
         embed = discord.Embed(
-            title=f"{status_icon} PR #{pr_number}: {title}",
-            url=url,
-            color=get_status_color(action),
+            title=f"{status_icon} PR #{pr_number}: {record.title}",
+            url=record.url,
+            color=get_status_color(record.status),
             timestamp=datetime.datetime.utcnow()
         )
         
         embed.add_field(name="Repository", value=repository, inline=True)
-        embed.add_field(name="Status", value=f"{status_icon} {action.capitalize()}", inline=True)
+        embed.add_field(name="Status", value=f"{status_icon} {record.status.capitalize()}", inline=True)
+        
+        if record.author:
+            embed.add_field(name="Author", value=record.author, inline=True)
         
-        if author:
-            embed.add_field(name="Author", value=author, inline=True)
+        reviews = summarize_reviews(record.reviews)
+        if reviews:
+            embed.add_field(name="Approvals / Changes requested", value=reviews, inline=False)
+        
+        if record.ci:
+            embed.add_field(name="CI", value=record.ci, inline=True)
         
         embed.set_thumbnail(url="https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png")
         embed.set_footer(text=f"PR #{pr_number} • {repository}", icon_url="https://github.githubassets.com/favicons/favicon.png")
+        return embed
+        
+    async def _edit_card(self, key: Tuple[str, str], record: PRRecord, **changes: Any) -> bool:
+        """Apply state changes to a record and re-render its card.
+
+        The record is only left changed if Discord accepted the edit, so it
+        always describes what the card actually shows. Callers hold the card lock.
+        """
+        previous = {name: getattr(record, name) for name in changes}
+        for name, value in changes.items():
+            setattr(record, name, value)
+        started = time.perf_counter()
+        try:
+            await self.writes.run(f"Card edit for PR {key} in #{record.channel_id}",
+                                  lambda: self._card(record).edit(embed=self.render_card(key, record)),
+                                  redrive=lambda: self._redrive_card_edit(key, record.channel_id, changes))
+            self.card_edits.add(time.perf_counter() - started)
+            self._save_card(key, record)
+            return True
+        except Exception as e:
+            for name, value in previous.items():
+                setattr(record, name, value)
+            print(f"Failed to update existing PR notification: {e}")
+            return False
+
+    async def _redrive_card_edit(self, key: Tuple[str, str], channel_id: int, changes: Dict[str, Any]) -> None:
+        """Apply a failed edit's changes to the card as it is now."""
+        record = self.get_card(key, channel_id)
+        if not record:
+            return
+        async with self._card_lock(key, channel_id):
+            if not await self._edit_card(key, record, **changes):
+                raise RuntimeError(f"Card edit for PR {key} failed again")
+
+    async def _redrive_card(self, repository: str, pr_number: str, action: str, title: str,
+                            url: str, author: str, channel: discord.TextChannel) -> None:
+        if not await self.create_or_update_pr(repository, pr_number, action, title, url, author, channel):
+            raise RuntimeError(f"Card for PR {(repository, pr_number)} failed again")
+
+    async def update_ci(self, key: Tuple[str, str]) -> None:
+        """Refresh the PR's cards' CI field if the check rollup summary changed.
+
+        The summary is read under each card's lock, so when several check
+        events queue up the card jumps straight to the latest aggregate and
+        events that don't move it cost no API call. A fresh rollup with no
+        checks yet (new commits were pushed) clears the field.
+        """
+        async def refresh(record: PRRecord) -> None:
+            async with self._card_lock(key, record.channel_id):
+                summary = self.ci.summary(key)
+                if summary == record.ci:
+                    return
+                await self._edit_card(key, record, ci=summary)
+        
+        await self.fan_out(f"CI update for PR {key}", self.pr_records.get(key, {}), refresh)
+
+    async def refresh_ci(self, key: Tuple[str, str]) -> None:
+        """Run update_ci now, or at most once per stretched CI_EDIT_DELAY while degraded."""
+        if self._coalesce(1.0) == 1.0:
+            await self.update_ci(key)
+        elif ("ci", key) not in self.timers:
+            self.timers.schedule(("ci", key), self._coalesce(self.CI_EDIT_DELAY), lambda: self.update_ci(key))
+
+    async def record_review(self, key: Tuple[str, str], reviewer: str, state: str) -> None:
+        """Fold one review into the card's reviewer map, editing only on change.
+
+        Approvals and change requests replace the reviewer's previous verdict;
+        a plain comment leaves it standing, and a dismissal removes it, which
+        matches how GitHub decides whether a PR is approved.
+        """
+        async def apply(record: PRRecord) -> None:
+            async with self._card_lock(key, record.channel_id):
+                reviews = dict(record.reviews or {})
+                if state in BLOCKING_REVIEW_STATES:
+                    reviews[reviewer] = state
+                elif state == 'dismissed':
+                    reviews.pop(reviewer, None)
+                if reviews == (record.reviews or {}):
+                    return
+                await self._edit_card(key, record, reviews=reviews or None)
         
-        if key in self.pr_notifications:
+        await self.fan_out(f"Review update for PR {key}", self.pr_records.get(key, {}), apply)
+
+    async def _create_or_update_pr_unlocked(self, repository: str, pr_number: str, action: str,
+                                 title: str, url: str = None, author: str = None,
+                                 channel: discord.TextChannel = None) -> Optional[PRRecord]:
+        """Create a new PR notification or update an existing one."""
+        key = (repository, pr_number)
+        existing = self.get_card(key, channel.id)
+
+        if existing:
             # Update existing notification
-            original_message = self.pr_notifications[key]
-            try:
-                await original_message.edit(embed=embed)
-                return original_message
-            except Exception as e:
-                print(f"Failed to update existing PR notification: {e}")
+            finished = existing.status in TERMINAL_STATES
+            if not await self._edit_card(key, existing, status=action, title=title,
+                                         url=url or existing.url, author=author or existing.author):
                 return None
+            if action in TERMINAL_STATES:
+                self.ci.forget(key)
+            # A card that was already finished is archived or pending archival;
+            # don't archive it a second time
+            if not (finished and action in TERMINAL_STATES):
+                self._schedule_archive(key, existing)
+            return existing
         else:
             # Create new notification
-            if not channel:
-                print("No channel provided for new PR notification")
-                return None
-                
             try:
-                message = await channel.send(embed=embed)
-                self.pr_notifications[key] = message
+                record = PRRecord(channel.id, 0, action, title, url, author)
+                message = await self.writes.run(
+                    f"Card for PR {key} in #{channel.id}",
+                    lambda: channel.send(embed=self.render_card(key, record)),
+                    redrive=lambda: self._redrive_card(repository, pr_number, action, title, url, author, channel),
+                    idempotent=False,
+                )
+                record.message_id = message.id
+                self.pr_records.setdefault(key, {})[channel.id] = record
+                # Saved before the thread is created, so a failover from here
+                # on edits this card rather than posting another
+                await self._save_new_card(key, record, channel.guild.id)
                 
-                # Create thread
-                thread_name = f"PR #{pr_number}: {title[:80]}..." if len(title) > 80 else f"PR #{pr_number}: {title}"
-                print(f"DEBUG: Attempting to create thread '{thread_name}' for message {message.id}")
+                # Create thread (deferred until first activity in lazy mode)
+                print(f"DEBUG: Preparing thread '{self._thread_name(pr_number, title)}' for message {message.id}")
                 print(f"DEBUG: Channel type: {channel.type}")
                 print(f"DEBUG: Bot permissions in channel: {channel.permissions_for(channel.guild.me)}")
                 
-                thread = await message.create_thread(name=thread_name)
-                self.pr_threads[key] = thread
-                print(f"DEBUG: Thread created successfully! Thread ID: {thread.id}")
-                
-                # Send initial thread message
-                await thread.send(f"🧵 **Thread created for PR #{pr_number}**\nUpdates and comments will appear here.")
-                print(f"DEBUG: Initial message sent to thread")
+                await self._open_thread(key, record, message)
+                self._schedule_archive(key, record)
                 
-                return message
+                return record
             except Exception as e:
                 print(f"Failed to create new PR notification: {e}")
                 return None
+
+    def _schedule_archive(self, key: Tuple[str, str], record: PRRecord) -> None:
+        """Queue the thread of a merged/closed PR card for archival; reopening cancels it."""
+        if self.archive_grace is None:
+            return
+        slot = (key, record.channel_id)
+        if record.status in TERMINAL_STATES:
+            # Later activity on the closed PR doesn't push the archival back
+            if slot not in self.archive_deadlines:
+                self._arm_archive(slot, time.time() + self.archive_grace, record.thread_id)
+        elif record.status in TRANSITION_STATES and self.archive_deadlines.pop(slot, None) is not None:
+            # Only a reopen moves a closed PR back to an open state
+            self.timers.cancel(("archive", key, record.channel_id))
+            self._mark_archives_dirty()
+
+    def _arm_archive(self, slot: ArchiveSlot, due: float, thread_id: Optional[int]) -> None:
+        key, channel_id = slot
+        self.archive_deadlines[slot] = (due, thread_id)
+        self.timers.schedule_at(("archive", key, channel_id), due, lambda: self._archive_thread(key, channel_id))
+        self._mark_archives_dirty()
+
+    def _mark_archives_dirty(self) -> None:
+        if self.archive_path and ("archives", "save") not in self.timers:
+            self.timers.schedule(("archives", "save"), self.ARCHIVE_SAVE_DELAY, self._save_archives_async)
+
+    async def _archive_thread(self, key: Tuple[str, str], channel_id: int) -> None:
+        """Lock and archive a finished PR's thread so it stops counting as active."""
+        _, saved_thread_id = self.archive_deadlines.pop((key, channel_id), (0, None))
+        self._mark_archives_dirty()
+        # Finished cards stop showing up in /prfind; a reopen indexes them again
+        self.index.remove(key, channel_id)
+        record = self.get_card(key, channel_id)
+        thread_id = record.thread_id if record else saved_thread_id
+        if not thread_id:
+            return
+        try:
+            # Editing needs a real Thread; archived ones aren't in the cache
+            thread = self.client.get_channel(thread_id)
+            if not isinstance(thread, discord.Thread):
+                thread = await self.client.fetch_channel(thread_id)
+            await self.writes.run(f"Archive thread for PR {key}", lambda: archive_and_lock_thread(thread))
+            print(f"Archived thread for PR {key}")
+        except Exception as e:
+            print(f"Failed to archive thread for PR {key}: {e}")
+
+    def load_archives(self, spread: float = 0.5) -> None:
+        """Re-arm archivals saved before a restart. Call from the running event loop.
+
+        Ones that fell due while the bot was down run spread seconds apart.
+        Restored cards that were archived before the restart are dropped
+        from the search index again.
+        """
+        if self.archive_grace is None:
+            return
+        saved = []
+        if self.archive_path and os.path.exists(self.archive_path):
+            try:
+                with open(self.archive_path, 'r') as f:
+                    saved = json.load(f)
+            except Exception as e:
+                print(f"Error loading thread archivals: {e}")
+                return
+
+        now = time.time()
+        overdue = 0
+        for repository, pr_number, channel_id, due, thread_id in saved:
+            if due <= now:
+                due = now + overdue * spread
+                overdue += 1
+            self._arm_archive(((repository, pr_number), channel_id), due, thread_id)
+        for key, cards in self.pr_records.items():
+            for channel_id, record in cards.items():
+                if self._archived(key, record):
+                    self.index.remove(key, channel_id)
+        if saved:
+            print(f"Loaded {len(saved)} pending thread archivals ({overdue} overdue)")
+
+    def archives_snapshot(self) -> List[list]:
+        """Pending archivals as JSON-ready rows, with each card's current thread ID."""
+        rows = []
+        for (key, channel_id), (due, thread_id) in self.archive_deadlines.items():
+            record = self.get_card(key, channel_id)
+            rows.append([key[0], key[1], channel_id, due, (record and record.thread_id) or thread_id])
+        return rows
+
+    def save_archives(self) -> None:
+        """Write the pending archivals to disk atomically."""
+        if self.archive_path:
+            self._write_archives(self.archives_snapshot())
+
+    async def _save_archives_async(self) -> None:
+        # Snapshot on the loop, write in a worker thread
+        snapshot = self.archives_snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, self._write_archives, snapshot)
+
+    def _write_archives(self, snapshot: List[list]) -> None:
+        try:
+            tmp_path = f"{self.archive_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, self.archive_path)
+        except Exception as e:
+            print(f"Error saving thread archivals: {e}")
@@ -0,0 +1,101 @@
+import re
+import heapq
+import itertools
+from typing import Dict, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_.-]*")
+
+# (repository, pr_number, channel ID): one entry per card
+DocKey = Tuple[str, str, int]
+
+def tokenize(text: str) -> Set[str]:
+    """Lowercased words, with dotted/dashed names also split into their parts."""
+    tokens = set()
+    for word in TOKEN_PATTERN.findall((text or "").lower()):
+        word = word.strip('.-')
+        if word:
+            tokens.add(word)
+            tokens.update(part for part in re.split(r"[._-]", word) if part)
+    return tokens
+
+class PRSearchIndex:
+    """Inverted index over tracked PR cards' titles, authors, repos and states.
+
+    Each card is re-indexed when create_or_update_pr touches it: its old
+    tokens are dropped from their posting sets and the new ones added, and
+    it is removed once its thread is archived. Posting sets are kept per
+    guild, so a query only intersects its own guild's sets, smallest first,
+    and the cost is bounded by the rarest term there rather than by how
+    many PRs every guild tracks.
+    """
+
+    def __init__(self):
+        # guild ID -> token -> cards containing it
+        self._postings: Dict[int, Dict[str, Set[DocKey]]] = {}
+        # card -> (guild ID, record, tokens, update sequence)
+        self._docs: Dict[DocKey, tuple] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, key: Tuple[str, str], record, guild_id: int) -> None:
+        """Index (or re-index) one card from its record."""
+        doc = (*key, record.channel_id)
+        repository, pr_number = key
+        tokens = tokenize(f"{record.title} {record.author or ''} {repository} {record.status}")
+        tokens.add(f"#{pr_number}")
+
+        old = self._docs.get(doc)
+        if old and old[0] != guild_id:
+            self.remove(key, record.channel_id)
+            old = None
+        old_tokens = old[2] if old else set()
+        for token in old_tokens - tokens:
+            self._discard(guild_id, token, doc)
+        postings = self._postings.setdefault(guild_id, {})
+        for token in tokens - old_tokens:
+            postings.setdefault(token, set()).add(doc)
+        self._docs[doc] = (guild_id, record, tokens, next(self._seq))
+
+    def remove(self, key: Tuple[str, str], channel_id: int) -> None:
+        doc = (*key, channel_id)
+        old = self._docs.pop(doc, None)
+        if old:
+            for token in old[2]:
+                self._discard(old[0], token, doc)
+
+    def _discard(self, guild_id: int, token: str, doc: DocKey) -> None:
+        postings = self._postings.get(guild_id, {})
+        docs = postings.get(token)
+        if docs is not None:
+            docs.discard(doc)
+            if not docs:
+                del postings[token]
+                if not postings:
+                    del self._postings[guild_id]
+
+    def search(self, query: str, guild_id: int, limit: int = 10) -> List[Tuple[DocKey, object]]:
+        """Cards in guild_id matching every term of query, most recently updated first."""
+        terms = set()
+        for word in query.lower().split():
+            if re.fullmatch(r"#\d+", word):
+                terms.add(word)
+            else:
+                # Whole words are indexed alongside their parts, so keep them whole
+                terms.update(w.strip('.-') for w in TOKEN_PATTERN.findall(word) if w.strip('.-'))
+        if not terms:
+            return []
+
+        guild_postings = self._postings.get(guild_id, {})
+        postings = sorted((guild_postings.get(term, set()) for term in terms), key=len)
+        if not postings[0]:
+            return []
+        matches = set(postings[0])
+        for docs in postings[1:]:
+            matches &= docs
+            if not matches:
+                return []
+
+        best = heapq.nlargest(limit, matches, key=lambda doc: self._docs[doc][3])
+        return [(doc, self._docs[doc][1]) for doc in best]
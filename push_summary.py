@@ -0,0 +1,164 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Discord's message length limit
+MESSAGE_LIMIT = 2000
+
+# (channel ID, repository, branch)
+BurstKey = Tuple[int, str, str]
+
+class PushBurst:
+    """Pushes to one branch close enough together to share a message."""
+
+    __slots__ = ("message_id", "last_push", "rendered_at", "pushes", "pushers", "commits",
+                 "new_commits", "forced", "before", "after")
+
+    def __init__(self, before: str):
+        self.message_id: Optional[int] = None
+        self.last_push = 0.0
+        self.rendered_at = 0.0
+        self.pushes = 0
+        self.pushers: Dict[str, None] = {}
+        # sha -> (first line of the message, author), newest last, bounded
+        self.commits: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        # Distinct commits seen across the burst, including any evicted above
+        self.new_commits = 0
+        self.forced = False
+        self.before = before
+        self.after = before
+
+class PushSummaries:
+    """Posts branch pushes as one compact message per burst, edited as pushes arrive.
+
+    A push starts a burst with a fresh message. Pushes to the same branch in
+    the same channel less than `window` seconds after the previous one join
+    the burst. Their commits are merged into its list, deduplicated by sha, so
+    a force-push that re-sends commits doesn't count them twice. The message
+    is edited at most every `edit_interval` seconds; pushes in between only
+    update the burst, and a timer applies the latest state when the interval
+    ends, the same way PRHandler collapses comment edits.
+    """
+
+    # Commits listed in a message; the rest are counted
+    MAX_LISTED = 10
+    # Shas remembered per burst for deduplication
+    MAX_REMEMBERED = 1000
+
+    def __init__(self, pr_handler, window: float = 600.0, edit_interval: float = 15.0):
+        self.pr_handler = pr_handler
+        self.window = window
+        self.edit_interval = edit_interval
+        self.bursts: Dict[BurstKey, PushBurst] = {}
+        self._locks: Dict[BurstKey, asyncio.Lock] = {}
+
+    @property
+    def timers(self):
+        return self.pr_handler.timers
+
+    async def record_push(self, channel_id: int, repository: str, payload: Dict[str, Any]) -> None:
+        """Fold a push event into its branch's burst and post or schedule the update."""
+        ref = payload.get('ref', '')
+        if not ref.startswith('refs/heads/') or payload.get('deleted'):
+            return  # Tags and branch deletions aren't summarized
+        branch = ref[len('refs/heads/'):]
+        key = (channel_id, repository, branch)
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            now = time.time()
+            burst = self.bursts.get(key)
+            if burst is None or now - burst.last_push > self.window:
+                burst = self.bursts[key] = PushBurst(payload.get('before', ''))
+            self._add_push(burst, payload, now)
+            # Drop the burst once it goes quiet so a later push starts a new message
+            self.timers.schedule(("push-burst", key), self.window, lambda: self._expire(key))
+
+            if burst.message_id is None:
+                try:
+                    message = await self.pr_handler.writes.run(
+                        f"Push summary for {repository} {branch}",
+                        lambda: self.pr_handler._messageable(channel_id).send(self.render(repository, branch, burst)),
+                        idempotent=False,
+                    )
+                    burst.message_id = message.id
+                    burst.rendered_at = now
+                except Exception as e:
+                    print(f"Failed to post push summary for {repository} {branch}: {e}")
+                    self.bursts.pop(key, None)
+                return
+
+            timer_key = ("push-edit", key)
+            interval = self.pr_handler._coalesce(self.edit_interval)
+            if now - burst.rendered_at >= interval and timer_key not in self.timers:
+                await self._edit(key)
+            else:
+                self.timers.schedule_at(timer_key, burst.rendered_at + interval,
+                                        lambda: self._flush(key))
+
+    def _add_push(self, burst: PushBurst, payload: Dict[str, Any], now: float) -> None:
+        burst.pushes += 1
+        burst.last_push = now
+        burst.after = payload.get('after', burst.after)
+        burst.forced = burst.forced or bool(payload.get('forced'))
+        pusher = payload.get('pusher', {}).get('name') or payload.get('sender', {}).get('login')
+        if pusher:
+            burst.pushers[pusher] = None
+
+        for commit in payload.get('commits', []):
+            sha = commit.get('id')
+            if not sha or sha in burst.commits:
+                continue
+            summary = (commit.get('message') or '').split('\n', 1)[0]
+            author = commit.get('author', {})
+            burst.commits[sha] = (summary, author.get('username') or author.get('name') or '')
+            burst.new_commits += 1
+            if len(burst.commits) > self.MAX_REMEMBERED:
+                burst.commits.popitem(last=False)
+
+    async def _flush(self, key: BurstKey) -> None:
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if key in self.bursts:
+                await self._edit(key)
+
+    async def _edit(self, key: BurstKey) -> None:
+        channel_id, repository, branch = key
+        burst = self.bursts[key]
+        burst.rendered_at = time.time()
+        try:
+            message = self.pr_handler._messageable(channel_id).get_partial_message(burst.message_id)
+            await self.pr_handler.writes.run(f"Push summary edit for {repository} {branch}",
+                                             lambda: message.edit(content=self.render(repository, branch, burst)))
+        except Exception as e:
+            print(f"Failed to update push summary for {repository} {branch}: {e}")
+
+    async def _expire(self, key: BurstKey) -> None:
+        # A pending edit still has the burst's latest state to apply
+        if ("push-edit", key) in self.timers:
+            self.timers.schedule(("push-burst", key), self.edit_interval, lambda: self._expire(key))
+            return
+        self.bursts.pop(key, None)
+        self._locks.pop(key, None)
+
+    def render(self, repository: str, branch: str, burst: PushBurst) -> str:
+        """Build the summary message: a header line, the newest commits, and a compare link."""
+        count = burst.new_commits
+        pushes = f"{burst.pushes} pushes, " if burst.pushes > 1 else ""
+        by = f" by {', '.join(burst.pushers)}" if burst.pushers else ""
+        forced = " (force-pushed)" if burst.forced else ""
+        lines = [f"📦 **{repository}** `{branch}`: {pushes}{count} new commit{'s' if count != 1 else ''}{by}{forced}"]
+
+        listed = list(burst.commits.items())[-self.MAX_LISTED:]
+        for sha, (summary, author) in reversed(listed):
+            lines.append(f"• `{sha[:7]}` {summary[:80]}" + (f" — {author}" if author else ""))
+        if count > len(listed):
+            lines.append(f"…and {count - len(listed)} more")
+
+        if burst.before.strip('0') and burst.after.strip('0'):
+            lines.append(f"[Compare changes](https://github.com/{repository}/compare/"
+                         f"{burst.before[:12]}...{burst.after[:12]})")
+
+        content = "\n".join(lines)
+        if len(content) > MESSAGE_LIMIT:
+            content = content[:MESSAGE_LIMIT - 3] + "..."
+        return content
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from timer_heap import TimerHeap
+from utils import TERMINAL_STATES
+
+REMINDERS_FILE = "reminders.json"
+
+class ReminderScheduler:
+    """Posts a reminder in a PR's threads once it has gone quiet for a while.
+
+    Each open PR has one deadline in the PR handler's TimerHeap, so tens of
+    thousands of PRs cost a heap entry each rather than a sleeping task.
+    Activity pushes the deadline back with an O(log n) reschedule, and a
+    reminder re-arms itself for another stale_after seconds once posted.
+
+    Deadlines are wall-clock and saved to disk at most every save_interval
+    seconds (and on shutdown), so a busy webhook stream doesn't rewrite the
+    file on every event.
+    """
+
+    def __init__(self, pr_handler, stale_after: Optional[float] = 3 * 86400,
+                 path: str = None, save_interval: float = 60.0):
+        """stale_after is the quiet period in seconds; None disables reminders."""
+        self.pr_handler = pr_handler
+        self.stale_after = stale_after
+        self.path = path or REMINDERS_FILE
+        self.save_interval = save_interval
+        # key: (repository, pr_number), value: (wall-clock due time, thread IDs).
+        # Thread IDs are kept so a reminder can still be posted after a restart,
+        # when the handler no longer has the PR's cards in memory.
+        self.deadlines: Dict[Tuple[str, str], Tuple[float, List[int]]] = {}
+        self._dirty = False
+
+    @property
+    def timers(self) -> TimerHeap:
+        return self.pr_handler.timers
+
+    def touch(self, key: Tuple[str, str]) -> None:
+        """Note activity on an open PR, pushing its reminder back."""
+        if self.stale_after is None:
+            return
+        self._arm(key, time.time() + self.stale_after)
+
+    def forget(self, key: Tuple[str, str]) -> None:
+        """Stop reminding about a PR (merged, closed or back to draft)."""
+        if self.deadlines.pop(key, None) is not None:
+            self.timers.cancel(("reminder", key))
+            self._mark_dirty()
+
+    def _arm(self, key: Tuple[str, str], due: float, thread_ids: List[int] = None) -> None:
+        if thread_ids is None:
+            thread_ids = self.deadlines[key][1] if key in self.deadlines else []
+        self.deadlines[key] = (due, thread_ids)
+        self.timers.schedule_at(("reminder", key), due, lambda: self._remind(key))
+        self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if ("reminders", "save") not in self.timers:
+            self.timers.schedule(("reminders", "save"), self.save_interval, self._save_async)
+
+    async def _remind(self, key: Tuple[str, str]) -> None:
+        cards = self.pr_handler.pr_records.get(key)
+        thread_ids = self.deadlines.get(key, (0, []))[1]
+        if not cards and not thread_ids:
+            # Nowhere to post it; the PR's thread was never created
+            self.forget(key)
+            return
+
+        if cards and all(record.status in TERMINAL_STATES for record in cards.values()):
+            # Merged or closed after the reminder was armed
+            self.forget(key)
+            return
+
+        days = self.stale_after / 86400
+        period = f"{days:g} day{'s' if days != 1 else ''}"
+        waiting_on_review = cards and not any(
+            'approved' in (record.reviews or {}).values() for record in cards.values()
+        )
+        if waiting_on_review:
+            message = f"⏰ **Reminder:** this PR has been waiting on review with no activity for {period}."
+        else:
+            message = f"⏰ **Reminder:** no activity on this PR for {period}."
+        self._arm(key, time.time() + self.stale_after)
+
+        if cards:
+            await self.pr_handler.post_thread_update(key, message)
+            return
+        for thread_id in thread_ids:
+            try:
+                await self.pr_handler.writes.run(
+                    f"Reminder for PR {key}", lambda: self.pr_handler._messageable(thread_id).send(message),
+                    idempotent=False)
+            except Exception as e:
+                print(f"Failed to post reminder for PR {key} in thread {thread_id}: {e}")
+
+    def load(self, spread: float = 0.5) -> None:
+        """Restore saved deadlines. Call from the running event loop.
+
+        Reminders that fell due while the bot was down are posted spread
+        seconds apart instead of all at once.
+        """
+        if self.stale_after is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"Error loading reminders: {e}")
+            return
+
+        now = time.time()
+        overdue = 0
+        for name, (due, thread_ids) in saved.items():
+            repository, _, pr_number = name.rpartition('#')
+            if due <= now:
+                due = now + overdue * spread
+                overdue += 1
+            self._arm((repository, pr_number), due, thread_ids)
+        self._dirty = False
+        print(f"Loaded {len(saved)} PR reminders ({overdue} overdue)")
+
+    def _thread_ids(self, key: Tuple[str, str]) -> List[int]:
+        cards = self.pr_handler.pr_records.get(key, {})
+        return [record.thread_id for record in cards.values() if record.thread_id]
+
+    def snapshot(self) -> Dict[str, list]:
+        """Deadlines as JSON-ready data, with each PR's current thread IDs."""
+        return {f"{repository}#{pr_number}": [due, self._thread_ids((repository, pr_number)) or thread_ids]
+                for (repository, pr_number), (due, thread_ids) in self.deadlines.items()}
+
+    def save(self) -> None:
+        """Write the deadlines to disk atomically."""
+        self._write(self.snapshot())
+        self._dirty = False
+
+    async def _save_async(self) -> None:
+        # Snapshot on the loop, write in a worker thread so a large schedule
+        # doesn't block event processing
+        if not self._dirty:
+            return
+        snapshot = self.snapshot()
+        self._dirty = False
+        await asyncio.get_running_loop().run_in_executor(None, self._write, snapshot)
+
+    def _write(self, snapshot: Dict[str, list]) -> None:
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving reminders: {e}")
@@ -0,0 +1,172 @@
+import time
+import random
+import asyncio
+import itertools
+import contextvars
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+# HTTP statuses worth another try: timeouts, rate limits and server errors
+TRANSIENT_STATUSES = (408, 429, 500, 502, 503, 504)
+# Statuses where Discord answered without acting on the request, so even a
+# call that creates something can safely be made again
+UNDELIVERED_STATUSES = (429, 500, 502, 503, 504)
+
+# Set while a dead letter is being re-driven, so a failure inside it goes
+# back to that letter instead of becoming a second one
+_redriving = contextvars.ContextVar("redriving", default=False)
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed Discord call might succeed if simply tried again.
+
+    Server errors, rate limits, timeouts and dropped connections are
+    transient. Anything else, including a 403 or a 404 for a deleted message,
+    will fail the same way every time.
+    """
+    if isinstance(error, discord.HTTPException):
+        return error.status in TRANSIENT_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError))
+
+def is_undelivered(error: BaseException) -> bool:
+    """Whether a failed call definitely didn't take effect.
+
+    A timeout or a dropped connection may hit after Discord has already
+    posted the message, so only an explicit rate limit or server error
+    counts.
+    """
+    return isinstance(error, discord.HTTPException) and error.status in UNDELIVERED_STATUSES
+
+def describe(error: BaseException) -> str:
+    if isinstance(error, discord.HTTPException):
+        return f"HTTP {error.status}: {error.text or error}"
+    return f"{type(error).__name__}: {error}"
+
+class DeadLetter:
+    """A Discord write that failed for good, kept so an admin can retry it."""
+
+    __slots__ = ("id", "label", "error", "transient", "attempts", "failed_at", "redrive")
+
+    def __init__(self, letter_id: int, label: str, error: BaseException, attempts: int,
+                 redrive: Callable[[], Awaitable[Any]]):
+        self.id = letter_id
+        self.label = label
+        self.error = describe(error)
+        self.transient = is_transient(error)
+        self.attempts = attempts
+        self.failed_at = time.time()
+        self.redrive = redrive
+
+class RetryingWriter:
+    """Runs Discord writes with retries, and keeps the ones that never succeed.
+
+    discord.py already waits out 429s and retries some 5xx responses inside
+    each request. What still reaches us gets classified: transient failures
+    are retried up to `attempts` times with full-jitter exponential backoff
+    (a random delay up to base_delay * 2^attempt, capped at max_delay), so a
+    burst of failing calls doesn't retry in lockstep. Permanent failures,
+    and transient ones that run out of attempts, are raised to the caller
+    as before and also recorded as dead letters. Calls that create something
+    (a new message or thread) pass idempotent=False and are only retried
+    when the failure shows nothing was created, so a timeout can't post
+    the same card twice. At most dead_letter_size
+    are kept, oldest dropped first, and each holds a callable that redoes
+    the operation against the bot's current state.
+    """
+
+    def __init__(self, attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 dead_letter_size: int = 200, budgets=None):
+        self.attempts = max(1, attempts)
+        # GuildBudgets each attempt is charged to, if any
+        self.budgets = budgets
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_size = dead_letter_size
+        self.dead_letters: "OrderedDict[int, DeadLetter]" = OrderedDict()
+        self._ids = itertools.count(1)
+        # ok, retried, failed_transient, failed_permanent, dropped, redriven
+        self.counts: Counter = Counter()
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, label: str, factory: Callable[[], Awaitable[Any]],
+                  redrive: Callable[[], Awaitable[Any]] = None, idempotent: bool = True) -> Any:
+        """Await factory(), retrying transient failures; re-raises the final error.
+
+        redrive is what a dead letter re-runs, for operations where repeating
+        the exact call would be wrong; it defaults to factory. With
+        idempotent=False only failures that certainly weren't delivered are
+        retried.
+        """
+        for attempt in range(1, self.attempts + 1):
+            if self.budgets:
+                self.budgets.record()
+            try:
+                result = await factory()
+                self.counts["ok"] += 1
+                return result
+            except Exception as e:
+                retryable = is_transient(e) if idempotent else is_undelivered(e)
+                if retryable and attempt < self.attempts:
+                    delay = self.backoff(attempt)
+                    self.counts["retried"] += 1
+                    print(f"{label}: {describe(e)}, retrying in {delay:.1f}s ({attempt}/{self.attempts})")
+                    await asyncio.sleep(delay)
+                    continue
+                self.counts["failed_transient" if is_transient(e) else "failed_permanent"] += 1
+                if not _redriving.get():
+                    self._dead_letter(label, e, attempt, redrive or factory)
+                raise
+
+    def _dead_letter(self, label: str, error: BaseException, attempts: int,
+                     redrive: Callable[[], Awaitable[Any]]) -> None:
+        letter = DeadLetter(next(self._ids), label, error, attempts, redrive)
+        self.dead_letters[letter.id] = letter
+        while len(self.dead_letters) > self.dead_letter_size:
+            self.dead_letters.popitem(last=False)
+            self.counts["dropped"] += 1
+        print(f"{label}: gave up after {attempts} attempt{'s' if attempts != 1 else ''} "
+              f"({letter.error}); dead letter #{letter.id}")
+
+    async def redrive(self, letter_ids: List[int] = None) -> Tuple[int, int]:
+        """Re-run dead letters (all of them by default). Returns (succeeded, failed).
+
+        A letter that fails again stays in the store with the new error.
+        """
+        ids = list(self.dead_letters) if letter_ids is None else letter_ids
+        succeeded = failed = 0
+        for letter_id in ids:
+            letter = self.dead_letters.pop(letter_id, None)
+            if not letter:
+                continue
+            token = _redriving.set(True)
+            try:
+                await letter.redrive()
+                succeeded += 1
+                self.counts["redriven"] += 1
+            except Exception as e:
+                failed += 1
+                letter.error = describe(e)
+                letter.transient = is_transient(e)
+                letter.failed_at = time.time()
+                self.dead_letters[letter.id] = letter
+            finally:
+                _redriving.reset(token)
+        return succeeded, failed
+
+    def get(self, letter_id: int) -> Optional[DeadLetter]:
+        return self.dead_letters.get(letter_id)
+
+    def clear(self) -> int:
+        count = len(self.dead_letters)
+        self.dead_letters.clear()
+        return count
+
+    def summary(self) -> str:
+        c = self.counts
+        return (f"{c['ok']} ok, {c['retried']} retries, {c['failed_transient']} failed (transient), "
+                f"{c['failed_permanent']} failed (permanent), {len(self.dead_letters)} dead letters"
+                + (f" ({c['dropped']} dropped)" if c['dropped'] else ""))
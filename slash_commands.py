@@ -0,0 +1,158 @@
+from typing import Literal, Optional
+
+import discord
+from discord import app_commands
+
+class SlashInvocation:
+    """A slash command interaction dressed as the text command message it replaces.
+
+    CommandHandler and PRHandler.handle_pr_command read content, channel,
+    author, guild and mentions off a message and answer through utils.reply,
+    which calls respond() here. So both command styles share one implementation.
+
+    Commands are deferred before they run, since backfills, redrives and
+    retried writes can take longer than the 3 seconds Discord waits for an
+    answer; every reply is then a followup.
+    """
+
+    def __init__(self, interaction: discord.Interaction, content: str,
+                 mentions: list = (), channel_mentions: list = ()):
+        self.interaction = interaction
+        self.content = content
+        self.channel = interaction.channel
+        self.author = interaction.user
+        self.guild = interaction.guild
+        self.mentions = [m for m in mentions if m]
+        self.channel_mentions = [c for c in channel_mentions if c]
+        # Whether anything beyond the deferral has been sent
+        self.answered = False
+        # Set once deferred privately, after which every followup must be too:
+        # Discord only applies the deferral's ephemerality to the first one
+        self.ephemeral = False
+
+    async def defer(self) -> None:
+        """Acknowledge the interaction now; Discord shows "thinking" until the first reply."""
+        if not self.interaction.response.is_done():
+            await self.interaction.response.defer(ephemeral=True, thinking=True)
+            self.ephemeral = True
+
+    async def respond(self, content: str = None, **kwargs):
+        """Answer the interaction, then follow up for any further replies."""
+        self.answered = True
+        if self.interaction.response.is_done():
+            if self.ephemeral:
+                kwargs["ephemeral"] = True
+            return await self.interaction.followup.send(content, **kwargs)
+        await self.interaction.response.send_message(content, **kwargs)
+
+    async def add_reaction(self, emoji: str) -> None:
+        # There's no message to react to; acknowledge privately instead
+        await self.respond(emoji, ephemeral=True)
+
+    async def finish(self) -> None:
+        """Make sure the interaction got an answer so Discord doesn't show a failure."""
+        if not self.answered:
+            await self.respond("Done.", ephemeral=True)
+
+def build_command_tree(bot) -> app_commands.CommandTree:
+    """Register /prbot, /prlink, /prfind and /pr on a command tree for the bot."""
+    tree = app_commands.CommandTree(bot)
+
+    async def run_admin(interaction: discord.Interaction, content: str, **mentions) -> None:
+        invocation = SlashInvocation(interaction, content, **mentions)
+        await invocation.defer()
+        config = bot.config_manager.get_guild_config(interaction.guild_id)
+        await bot.command_handler.handle_admin_commands(invocation, config, interaction.guild_id)
+        await invocation.finish()
+
+    # Hidden from non-admins by default; CommandHandler still checks permissions
+    prbot = app_commands.Group(name="prbot", description="Configure the PR bot",
+                               guild_only=True, default_permissions=discord.Permissions(administrator=True))
+
+    @prbot.command(name="status", description="Show configuration and bot health")
+    async def status(interaction: discord.Interaction):
+        await run_admin(interaction, "!prbot status")
+
+    @prbot.command(name="webhook", description="DM yourself a GitHub webhook URL for this channel")
+    async def webhook(interaction: discord.Interaction):
+        await run_admin(interaction, "!prbot webhook")
+
+    @prbot.command(name="backfill", description="Post cards for a repo's already-open PRs in this channel")
+    @app_commands.describe(repository="owner/repo")
+    async def backfill(interaction: discord.Interaction, repository: str):
+        await run_admin(interaction, f"!prbot backfill {repository}")
+
+    @prbot.command(name="mirror", description="List, add or remove channels that mirror this channel's PR cards")
+    async def mirror(interaction: discord.Interaction, action: Literal['list', 'add', 'remove'] = 'list',
+                     channel: Optional[discord.TextChannel] = None):
+        await run_admin(interaction, f"!prbot mirror {action}", channel_mentions=[channel])
+
+    @prbot.command(name="profile", description="Sample the bot's stacks and save a flamegraph profile")
+    @app_commands.describe(duration="e.g. 30s or 2m")
+    async def profile(interaction: discord.Interaction, duration: str = "30s"):
+        await run_admin(interaction, f"!prbot profile {duration}")
+
+    @prbot.command(name="link", description="List links, or link a GitHub login to a member")
+    async def link(interaction: discord.Interaction, github_login: Optional[str] = None,
+                   member: Optional[discord.Member] = None):
+        if not github_login:
+            await run_admin(interaction, "!prbot link")
+        else:
+            # The member token keeps this on the admin path even when linking yourself
+            await run_admin(interaction, f"!prbot link {github_login} <@{(member or interaction.user).id}>",
+                            mentions=[member or interaction.user])
+
+    @prbot.command(name="unlink", description="Remove a GitHub login's link")
+    async def unlink(interaction: discord.Interaction, github_login: str):
+        await run_admin(interaction, f"!prbot unlink {github_login}")
+
+    @prbot.command(name="stats", description="PR throughput and review latency for this channel")
+    @app_commands.describe(repository="owner/repo (default: all)", window="e.g. 7d or 30d")
+    async def stats(interaction: discord.Interaction, repository: Optional[str] = None, window: str = "7d"):
+        await run_admin(interaction, " ".join(filter(None, ["!prbot stats", repository, window])))
+
+    @prbot.command(name="pushes", description="Show or set where push and release summaries are posted")
+    @app_commands.describe(reset="Go back to the webhook's own channel")
+    async def pushes(interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None,
+                     reset: bool = False):
+        if reset:
+            await run_admin(interaction, "!prbot pushes reset")
+        else:
+            await run_admin(interaction, "!prbot pushes", channel_mentions=[channel])
+
+    @prbot.command(name="deadletters", description="Inspect or retry Discord writes that failed after retrying")
+    @app_commands.describe(letter="Dead letter number to re-drive (default: all)")
+    async def deadletters(interaction: discord.Interaction,
+                          action: Literal['list', 'redrive', 'clear'] = 'list', letter: Optional[int] = None):
+        target = str(letter) if action == 'redrive' and letter is not None else ""
+        await run_admin(interaction, " ".join(filter(None, ["!prbot deadletters", action, target])))
+
+    @prbot.command(name="budget", description="Show or set this server's Discord API budget")
+    @app_commands.describe(calls_per_minute="New budget (leave empty to show it)", reset="Go back to the default")
+    async def budget(interaction: discord.Interaction, calls_per_minute: Optional[app_commands.Range[int, 1]] = None,
+                     reset: bool = False):
+        value = "reset" if reset else (str(calls_per_minute) if calls_per_minute else "")
+        await run_admin(interaction, " ".join(filter(None, ["!prbot budget", value])))
+
+    tree.add_command(prbot)
+
+    @tree.command(name="prfind", description="Jump to a tracked PR's card and thread")
+    @app_commands.guild_only()
+    @app_commands.describe(query="Words from the title, #number, author, repo or state")
+    async def prfind(interaction: discord.Interaction, query: str):
+        await run_admin(interaction, f"!prbot find {query}")
+
+    @tree.command(name="prlink", description="Link your GitHub login so review requests ping you")
+    @app_commands.guild_only()
+    async def prlink(interaction: discord.Interaction, github_login: str):
+        await run_admin(interaction, f"!prbot link {github_login}")
+
+    @tree.command(name="pr", description="Create a manual PR notification")
+    @app_commands.describe(notification="e.g. owner/repo opened PR #3: Title")
+    async def pr(interaction: discord.Interaction, notification: str):
+        invocation = SlashInvocation(interaction, f"!pr {notification}")
+        await invocation.defer()
+        await bot.pr_handler.handle_pr_command(invocation)
+        await invocation.finish()
+
+    return tree
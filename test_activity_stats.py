@@ -0,0 +1,51 @@
+from activity_stats import DAY, ActivityStats, format_duration, parse_github_time
+
+NOW = 1_700_000_000.0
+
+
+def test_report_sums_window_for_channel_and_repo():
+    stats = ActivityStats(days=30)
+    for days_ago in (0, 1, 2, 10):
+        stats.record_opened("org/app", 1, now=NOW - days_ago * DAY)
+    stats.record_opened("org/lib", 1, now=NOW)
+    stats.record_opened("org/app", 2, now=NOW)
+    stats.record_closed("org/app", 1, merged=True, created_at=NOW - 7200, merged_at=NOW, now=NOW)
+    stats.record_closed("org/app", 1, merged=False, created_at=NOW - 7200, merged_at=None, now=NOW)
+
+    week = stats.report(1, 7, now=NOW)
+    assert (week["opened"], week["merged"], week["closed"]) == (4, 1, 1)
+    assert stats.report(1, 7, "ORG/APP", now=NOW)["opened"] == 3
+    assert stats.report(1, 30, "org/app", now=NOW)["opened"] == 4
+    assert stats.report(2, 7, now=NOW)["opened"] == 1
+    assert stats.repositories(1) == ["org/app", "org/lib"]
+
+
+def test_ring_reuses_buckets_so_memory_is_fixed():
+    stats = ActivityStats(days=7)
+    for day in range(100):
+        stats.record_opened("org/app", 1, now=NOW + day * DAY)
+    ring = stats._series[("org/app", 1)]
+    assert len(ring) == 7
+    assert stats.report(1, 7, now=NOW + 99 * DAY)["opened"] == 7
+    # Windows are capped at the ring length
+    assert stats.report(1, 365, now=NOW + 99 * DAY)["days"] == 7
+
+
+def test_medians_and_first_review_only():
+    stats = ActivityStats()
+    for hours in (1, 3, 6):
+        stats.record_closed("org/app", 1, True, NOW - hours * 3600, NOW, now=NOW)
+    stats.record_review("org/app", "5", 1, NOW - 1800, NOW, now=NOW)
+    stats.record_review("org/app", "5", 1, NOW - 10 * DAY, NOW, now=NOW)
+
+    report = stats.report(1, 7, now=NOW)
+    assert 2 * 3600 < report["median_merge"] <= 4 * 3600
+    assert 900 < report["median_review"] <= 1800
+
+
+def test_helpers():
+    assert parse_github_time("1970-01-02T00:00:00Z") == DAY
+    assert parse_github_time(None) is None
+    assert format_duration(600) == "10m"
+    assert format_duration(5400) == "1.5h"
+    assert format_duration(3 * DAY) == "3.0d"
@@ -0,0 +1,62 @@
+import pytest
+
+from ci_status import CIAggregator, check_outcome
+
+KEY = ("org/repo", "5")
+
+
+@pytest.mark.parametrize("status,conclusion,expected", [
+    ("queued", None, "pending"),
+    ("in_progress", None, "pending"),
+    ("completed", "success", "success"),
+    ("completed", "failure", "failure"),
+    ("completed", "timed_out", "failure"),
+    ("completed", "skipped", "skipped"),
+    ("completed", "neutral", "skipped"),
+])
+def test_check_outcome(status, conclusion, expected):
+    assert check_outcome(status, conclusion) == expected
+
+
+def test_runs_collapse_into_one_summary():
+    ci = CIAggregator()
+    for run_id in range(12):
+        ci.record_run(KEY, "abc", run_id, 1, "success")
+    ci.record_run(KEY, "abc", 12, 1, "failure")
+    ci.record_run(KEY, "abc", 13, 1, "pending")
+    ci.record_run(KEY, "abc", 14, 1, "skipped")
+    assert ci.summary(KEY) == "❌ 12/14 passing (1 failing, 1 pending)"
+
+    ci.record_run(KEY, "abc", 12, 1, "success")
+    ci.record_run(KEY, "abc", 13, 1, "success")
+    assert ci.summary(KEY) == "✅ 14/14 passing"
+
+
+def test_new_head_resets_rollup():
+    ci = CIAggregator()
+    ci.record_run(KEY, "abc", 1, 1, "failure")
+    # New commits arrive through the pull_request event, not through checks
+    assert ci.note_head(KEY, "def")
+    assert ci.summary(KEY) is None
+    assert ci.record_run(KEY, "def", 2, 2, "pending")
+    assert ci.summary(KEY) == "⏳ 0/1 passing (1 pending)"
+    assert not ci.note_head(KEY, "def")
+
+
+def test_late_checks_for_an_older_commit_are_ignored():
+    ci = CIAggregator()
+    ci.note_head(KEY, "new")
+    ci.record_run(KEY, "new", 1, 1, "success")
+    assert not ci.record_run(KEY, "old", 2, 2, "failure")
+    assert not ci.record_suite(KEY, "old", 3, "failure")
+    assert ci.summary(KEY) == "✅ 1/1 passing"
+
+
+def test_suite_counts_only_until_its_runs_arrive():
+    ci = CIAggregator()
+    ci.record_suite(KEY, "abc", 7, "success")
+    assert ci.summary(KEY) == "✅ 1/1 passing"
+    ci.record_run(KEY, "abc", 1, 7, "success")
+    ci.record_run(KEY, "abc", 2, 7, "success")
+    ci.record_suite(KEY, "abc", 7, "success")
+    assert ci.summary(KEY) == "✅ 2/2 passing"
@@ -0,0 +1,69 @@
+import os
+import time
+import asyncio
+import threading
+
+from diagnostics import (
+    LatencyStats, LoopLagMonitor, parse_duration, sample_stacks, top_frames, write_folded
+)
+
+
+def test_parse_duration():
+    assert parse_duration("30s") == 30
+    assert parse_duration("2m") == 120
+    assert parse_duration("500ms") == 0.5
+    assert parse_duration("15") == 15
+    assert parse_duration("soon") is None
+
+
+def test_latency_stats_summary():
+    stats = LatencyStats()
+    assert stats.summary() == "none yet"
+    stats.add(0.010)
+    stats.add(0.030)
+    assert stats.count == 2
+    assert stats.max == 0.030
+    assert stats.summary() == "2 samples, avg 20.0ms, max 30ms"
+
+
+def test_lag_monitor_sees_blocking_call():
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.01, warn_threshold=10)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # blocks the loop
+        await asyncio.sleep(0.03)
+        monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.lag.max >= 0.08
+
+
+def busy_wait(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_writes_folded_profile(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_wait, args=(stop,), name="busy")
+    worker.start()
+    try:
+        counts = sample_stacks(0.1, interval=0.001)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [stack for stack in counts if stack.startswith("busy;")]
+    assert busy
+    assert any("test_diagnostics.py:busy_wait" in stack for stack in busy)
+
+    path = write_folded(counts, str(tmp_path))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == len(counts)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert counts[stack] == int(count)
+    assert os.path.basename(path).endswith(".folded")
+    assert top_frames(counts, 1)[0][1] >= 1
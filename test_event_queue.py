@@ -0,0 +1,85 @@
+import asyncio
+
+from event_queue import PriorityEventQueue
+
+
+def recorder(order, label, delay=0):
+    async def run():
+        await asyncio.sleep(delay)
+        order.append(label)
+    return run
+
+
+def test_higher_lanes_run_first():
+    order = []
+
+    async def scenario():
+        queue = PriorityEventQueue(workers=1, max_wait=60)
+        # Occupies the only worker while the rest queue up
+        queue.submit('chatter', 'busy', recorder(order, 'busy', 0.02))
+        await asyncio.sleep(0)
+        for i in range(3):
+            queue.submit('chatter', f'comment{i}', recorder(order, f'comment{i}'))
+        queue.submit('review', 'review', recorder(order, 'review'))
+        queue.submit('state', 'merged', recorder(order, 'merged'))
+        await queue.wait_idle()
+        queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert order == ['busy', 'merged', 'review', 'comment0', 'comment1', 'comment2']
+    assert queue.waits['chatter'].count == 4
+    assert queue.waits['state'].count == 1
+
+
+def test_overdue_events_are_not_starved():
+    order = []
+
+    async def scenario():
+        queue = PriorityEventQueue(workers=1, max_wait=0.01)
+        queue.submit('chatter', 'busy', recorder(order, 'busy', 0.03))
+        await asyncio.sleep(0)
+        queue.submit('chatter', 'comment', recorder(order, 'comment'))
+        await asyncio.sleep(0.02)
+        queue.submit('state', 'merged', recorder(order, 'merged'))
+        await queue.wait_idle()
+        queue.stop()
+
+    asyncio.run(scenario())
+    assert order == ['busy', 'comment', 'merged']
+
+
+def test_stop_drops_queued_events():
+    started = []
+
+    async def scenario():
+        queue = PriorityEventQueue(workers=1)
+        for i in range(3):
+            queue.submit('chatter', str(i), recorder(started, i, 10))
+        await asyncio.sleep(0)
+        return queue.stop()
+
+    assert asyncio.run(scenario()) == 2
+    assert started == []
+
+
+def test_events_for_one_pr_keep_their_order():
+    import webhook_server
+    order = []
+    pr = {"repository": {"full_name": "org/repo"}, "pull_request": {"number": 9}}
+    key = webhook_server.event_pr_key(pr)
+
+    async def scenario():
+        queue = PriorityEventQueue(workers=4, max_wait=60)
+        # The push arrived first; the close must not overtake it and then be
+        # overwritten by it, even though the close is in a higher lane
+        queue.submit('review', 'synchronize', recorder(order, 'synchronize', 0.02), key=key)
+        queue.submit('state', 'closed', recorder(order, 'closed'), key=key)
+        queue.submit('state', 'other PR', recorder(order, 'other PR'), key=("org/repo", "10"))
+        await queue.wait_idle()
+        assert not queue._held
+        queue.stop()
+
+    asyncio.run(scenario())
+    assert key == ("org/repo", "9")
+    assert order == ['other PR', 'synchronize', 'closed']
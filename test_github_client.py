@@ -0,0 +1,94 @@
+import asyncio
+
+from aiohttp import web
+
+from github_client import GitHubClient, parse_link_header
+
+
+def test_parse_link_header():
+    header = ('<https://api.github.com/x?page=2>; rel="next", '
+              '<https://api.github.com/x?page=5>; rel="last"')
+    assert parse_link_header(header) == {
+        "next": "https://api.github.com/x?page=2",
+        "last": "https://api.github.com/x?page=5",
+    }
+    assert parse_link_header(None) == {}
+
+
+def run_against_stand_in(scenario, total=7, per_page=3, advertise_last=True):
+    """Serve a paginated /pulls listing locally and run scenario(client, stats)."""
+    stats = {"requests": 0, "not_modified": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def pulls(request):
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(0.01)
+        stats["in_flight"] -= 1
+
+        page = int(request.query.get("page", "1"))
+        etag = f'"page-{page}"'
+        if request.headers.get("If-None-Match") == etag:
+            stats["not_modified"] += 1
+            return web.Response(status=304)
+
+        start = (page - 1) * per_page
+        items = [{"number": n} for n in range(start + 1, min(start + per_page, total) + 1)]
+        last = -(-total // per_page)
+        links = []
+        base = f"http://{request.host}{request.path}?state=open&per_page={per_page}"
+        if page < last:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+            if advertise_last:
+                links.append(f'<{base}&page={last}>; rel="last"')
+        headers = {"ETag": etag}
+        if links:
+            headers["Link"] = ", ".join(links)
+        return web.json_response(items, headers=headers)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/repos/org/repo/pulls", pulls)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        client = GitHubClient(base_url=f"http://127.0.0.1:{port}", max_concurrency=2, per_page=per_page)
+        try:
+            return await scenario(client, stats)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_paginates_concurrently_within_limit():
+    async def scenario(client, stats):
+        pulls = await client.list_open_pulls("org/repo")
+        return [pr["number"] for pr in pulls], stats
+
+    numbers, stats = run_against_stand_in(scenario, total=10)
+    assert numbers == list(range(1, 11))
+    assert stats["requests"] == 4
+    assert stats["max_in_flight"] == 2
+
+
+def test_follows_next_links_without_last():
+    async def scenario(client, stats):
+        return [pr["number"] for pr in await client.list_open_pulls("org/repo")]
+
+    assert run_against_stand_in(scenario, total=7, advertise_last=False) == list(range(1, 8))
+
+
+def test_repeat_listing_uses_etag_cache():
+    async def scenario(client, stats):
+        first = await client.list_open_pulls("org/repo")
+        second = await client.list_open_pulls("org/repo")
+        return first, second, stats, client.not_modified
+
+    first, second, stats, not_modified = run_against_stand_in(scenario, total=7)
+    assert first == second
+    assert stats["not_modified"] == 3
+    assert not_modified == 3
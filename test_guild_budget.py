@@ -0,0 +1,92 @@
+import asyncio
+import types
+
+import webhook_server
+from guild_budget import GuildBudgets, WINDOW, current_guild
+from retries import RetryingWriter
+from timer_heap import TimerHeap
+
+
+class FakeConfigManager:
+    def __init__(self):
+        self.configs = {}
+
+    def get_guild_config(self, guild_id):
+        return self.configs.setdefault(guild_id, {})
+
+
+def test_usage_is_a_sliding_minute():
+    budgets = GuildBudgets(FakeConfigManager())
+    for second in range(10):
+        budgets.record(1, now=1000 + second)
+    budgets.record(2, now=1005)
+
+    assert budgets.usage(1, now=1009) == 10
+    assert budgets.usage(2, now=1009) == 1
+    # Calls drop out once they're a window old, and their slots get reused
+    assert budgets.usage(1, now=1000 + WINDOW + 4) == 5
+    budgets.record(1, now=1000 + WINDOW + 4)
+    assert budgets.usage(1, now=1000 + WINDOW + 4) == 6
+
+
+def test_levels_follow_default_and_configured_budget():
+    config = FakeConfigManager()
+    budgets = GuildBudgets(config, per_minute=8)
+    for _ in range(6):
+        budgets.record(1, now=100)
+
+    assert budgets.level(1, now=100) == 'degraded'
+    config.configs[1] = {"api_budget": 6}
+    assert budgets.level(1, now=100) == 'over'
+    config.configs[1] = {"api_budget": 100}
+    assert budgets.level(1, now=100) == 'ok'
+    # Calls outside any guild are never limited
+    for _ in range(20):
+        budgets.record(None, now=100)
+    assert budgets.level(None, now=100) == 'ok'
+
+
+def test_over_budget_sheds_only_chatter():
+    budgets = GuildBudgets(FakeConfigManager(), per_minute=2)
+    budgets.record(1)
+    budgets.record(1)
+
+    assert not budgets.admit(1, 'chatter')
+    assert budgets.admit(1, 'state') and budgets.admit(1, 'review')
+    assert budgets.admit(2, 'chatter')
+    assert budgets.shed[1] == 1
+    assert budgets.stretch(1) == budgets.STRETCH and budgets.stretch(2) == 1.0
+    assert budgets.busiest() == [(1, 2)]
+
+
+def test_calls_are_charged_to_the_event_guild():
+    budgets = GuildBudgets(FakeConfigManager(), per_minute=1)
+    writes = RetryingWriter(budgets=budgets)
+    timers = TimerHeap()
+    ran = []
+    webhook_server.bot = types.SimpleNamespace(budgets=budgets)
+
+    async def send():
+        return "sent"
+
+    async def processor():
+        await writes.run("card", send)
+        # Timer callbacks keep the guild of the code that scheduled them
+        timers.schedule("later", 0, lambda: writes.run("later", send))
+
+    async def chatter():
+        ran.append("chatter")
+
+    async def scenario():
+        await webhook_server.run_budgeted(7, 'state', "state event", processor)
+        assert current_guild.get() is None
+        await asyncio.sleep(0.05)
+        await webhook_server.run_budgeted(7, 'chatter', "chatter event", chatter)
+        await webhook_server.run_budgeted(8, 'chatter', "chatter event", chatter)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        webhook_server.bot = None
+    assert budgets.usage(7) == 2 and budgets.usage(None) == 0
+    assert ran == ["chatter"] and budgets.shed[7] == 1
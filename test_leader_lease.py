@@ -0,0 +1,187 @@
+import sys
+import time
+import asyncio
+import subprocess
+
+from leader_lease import SharedState, LeaderLease
+from pr_handler import PRHandler
+from test_pr_handler import FakeClient, FakeChannel
+
+
+def test_lease_is_exclusive_until_it_lapses(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SharedState(path), SharedState(path)
+
+    assert first.claim_lease("leader", "a", ttl=10, now=100)
+    assert not second.claim_lease("leader", "b", ttl=10, now=105)
+    assert first.claim_lease("leader", "a", ttl=10, now=108)
+    assert not second.claim_lease("leader", "b", ttl=10, now=115)
+    assert second.claim_lease("leader", "b", ttl=10, now=119)
+    assert first.lease_holder("leader") == ("b", 129)
+
+    second.release_lease("leader", "b")
+    assert first.claim_lease("leader", "a", ttl=10, now=120)
+    first.close()
+    second.close()
+
+
+LEADER_SCRIPT = """
+import sys, time
+from leader_lease import SharedState, LeaderLease
+lease = LeaderLease(SharedState(sys.argv[1]), "other-process", ttl=1.0)
+assert lease.try_acquire()
+print("leader", flush=True)
+while True:
+    time.sleep(lease.heartbeat)
+    lease.try_acquire()
+"""
+
+
+def test_standby_process_takes_over_when_leader_dies(tmp_path):
+    path = str(tmp_path / "state.db")
+    leader = subprocess.Popen([sys.executable, "-c", LEADER_SCRIPT, path],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        assert leader.stdout.readline().strip() == "leader"
+        standby = LeaderLease(SharedState(path), "this-process", ttl=1.0)
+        # The leader keeps renewing, so the standby stays out
+        deadline = time.time() + 2
+        while time.time() < deadline:
+            assert not standby.try_acquire()
+            time.sleep(0.2)
+    finally:
+        leader.kill()
+        leader.wait()
+
+    started = time.time()
+    while not standby.try_acquire():
+        assert time.time() - started < 3
+        time.sleep(0.1)
+    assert standby.held
+    assert standby.leader()[0] == "this-process"
+
+
+def test_new_leader_edits_cards_instead_of_duplicating(tmp_path):
+    state = SharedState(str(tmp_path / "state.db"))
+    client = FakeClient()
+    channel = client.add_channel(FakeChannel(client, 100))
+    old_leader = PRHandler(client, thread_intro=False)
+    old_leader.store = state
+
+    async def opened():
+        await old_leader.create_or_update_pr("org/repo", "5", "opened", "Add lease", channel=channel)
+        await old_leader.flush_cards()
+        await old_leader.timers.stop()
+
+    asyncio.run(opened())
+    assert len(channel.sent) == 1
+
+    new_leader = PRHandler(client, thread_intro=False)
+    new_leader.store = state
+    assert new_leader.restore_cards(state.load_cards()) == 1
+    assert new_leader.index.search("lease", 1)
+
+    async def merged():
+        await new_leader.create_or_update_pr("org/repo", "5", "merged", "Add lease", channel=channel)
+        await new_leader.flush_cards()
+        await new_leader.timers.stop()
+
+    asyncio.run(merged())
+    assert len(channel.sent) == 1
+    record = new_leader.get_card(("org/repo", "5"), channel.id)
+    assert (record.status, record.thread_id) == ("merged", 1002)
+    assert state.load_cards()[0]["status"] == "merged"
+    state.close()
+
+
+def test_journal_hand_over_goes_through_the_inbox(tmp_path):
+    import webhook_server
+    from webhook_journal import WebhookJournal
+
+    class FakeBot:
+        shared_state = SharedState(str(tmp_path / "state.db"))
+        webhook_journal = WebhookJournal(path=str(tmp_path / "journal.jsonl"))
+
+    FakeBot.webhook_journal.open()
+    FakeBot.webhook_journal.append("pull_request", 1, 2, {"n": 1}, delivery_id="d1")
+    webhook_server.set_bot_instance(FakeBot)
+    try:
+        assert webhook_server.hand_over_journal() == 1
+        assert FakeBot.webhook_journal.pending_entries() == []
+        # A redelivery of something already queued isn't queued twice
+        FakeBot.standby = True
+        webhook_server.schedule_event("pull_request", {"n": 1}, 1, 2, delivery_id="d1")
+        webhook_server.schedule_event("issue_comment", {"n": 2}, 1, 2, delivery_id="d2")
+    finally:
+        webhook_server.set_bot_instance(None)
+        FakeBot.webhook_journal.close()
+
+    entries = FakeBot.shared_state.peek_inbox()
+    assert [(e["id"], e["event"]) for e in entries] == [("d1", "pull_request"), ("d2", "issue_comment")]
+    FakeBot.shared_state.ack_inbox(["d1"])
+    assert FakeBot.shared_state.inbox_size() == 1
+    FakeBot.shared_state.close()
+
+
+def test_card_writes_are_batched_off_the_loop(tmp_path):
+    import threading
+
+    class RecordingState(SharedState):
+        batches = []
+
+        def save_card_rows(self, rows):
+            self.batches.append((threading.current_thread(), len(rows)))
+            super().save_card_rows(rows)
+
+    state = RecordingState(str(tmp_path / "state.db"))
+    client = FakeClient()
+    channel = client.add_channel(FakeChannel(client, 100))
+    handler = PRHandler(client, thread_intro=False)
+    handler.store = state
+
+    async def scenario():
+        await handler.create_or_update_pr("org/repo", "6", "opened", "Batch", channel=channel)
+        await handler.create_or_update_pr("org/repo", "6", "ready_for_review", "Batch", channel=channel)
+        await handler.create_or_update_pr("org/repo", "6", "merged", "Batch", channel=channel)
+        await asyncio.sleep(handler.CARD_SAVE_DELAY + 0.2)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    # The new card is written straight away, the two edits together
+    assert [rows for _, rows in state.batches] == [1, 1]
+    assert all(thread is not threading.main_thread() for thread, _ in state.batches)
+    assert state.load_cards()[0]["status"] == "merged"
+    state.close()
+
+
+def test_new_cards_are_saved_before_their_thread(tmp_path):
+    state = SharedState(str(tmp_path / "state.db"))
+
+    class CheckingClient(FakeClient):
+        def add_channel(self, channel):
+            if self.channels:
+                # The thread: by now the card must already be in the store
+                assert len(state.load_cards()) == 1
+            return super().add_channel(channel)
+
+    client = CheckingClient()
+    channel = client.add_channel(FakeChannel(client, 100))
+    handler = PRHandler(client, thread_intro=False)
+    handler.store = state
+
+    async def scenario():
+        record = await handler.create_or_update_pr("org/repo", "7", "opened", "Now", channel=channel)
+        await handler.timers.stop()
+        return record
+
+    assert asyncio.run(scenario()).thread_id
+    state.close()
+
+
+def test_ha_mode_needs_an_instance_id(monkeypatch, tmp_path):
+    import pytest
+    import bot
+    monkeypatch.setenv("HA_STATE_DB", str(tmp_path / "state.db"))
+    monkeypatch.delenv("INSTANCE_ID", raising=False)
+    with pytest.raises(SystemExit):
+        bot.PRBot()
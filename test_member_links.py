@@ -0,0 +1,82 @@
+import asyncio
+
+import discord
+
+from config_manager import ConfigManager
+from member_links import MemberDirectory
+
+
+class FakeResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeGuild:
+    id = 1
+
+    def __init__(self, members):
+        self.members = members
+        self.fetches = 0
+
+    def get_member(self, user_id):
+        return None  # the bot runs without a member cache
+
+    async def fetch_member(self, user_id):
+        self.fetches += 1
+        if user_id not in self.members:
+            raise discord.NotFound(FakeResponse(), "Unknown Member")
+        return object()
+
+
+def make_directory(tmp_path, monkeypatch, ttl=3600):
+    monkeypatch.setattr(ConfigManager, "CONFIG_FILE", str(tmp_path / "bot_config.json"))
+    config = ConfigManager()
+    return MemberDirectory(config, ttl=ttl), config
+
+
+def test_links_are_case_insensitive_and_persisted(tmp_path, monkeypatch):
+    directory, config = make_directory(tmp_path, monkeypatch)
+    directory.link(1, "Octocat", 42)
+    assert directory.user_for(1, "octocat") == 42
+    assert config.get_guild_config(1)["github_links"] == {"octocat": 42}
+
+    reloaded = ConfigManager()
+    reloaded.load_config()
+    assert MemberDirectory(reloaded).user_for(1, "OCTOCAT") == 42
+
+    assert directory.unlink(1, "octocat")
+    assert not directory.unlink(1, "octocat")
+    assert directory.user_for(1, "octocat") is None
+
+
+def test_mentions_use_cached_membership(tmp_path, monkeypatch):
+    directory, _ = make_directory(tmp_path, monkeypatch)
+    directory.link(1, "octocat", 42)
+    directory.link(1, "gone", 7)
+    guild = FakeGuild(members={42})
+
+    async def scenario():
+        mentions = [await directory.mention(guild, "octocat") for _ in range(5)]
+        mentions.append(await directory.mention(guild, "gone"))
+        mentions.append(await directory.mention(guild, "gone"))
+        mentions.append(await directory.mention(guild, "stranger"))
+        return mentions
+
+    mentions = asyncio.run(scenario())
+    assert mentions[:5] == ["<@42>"] * 5
+    assert mentions[5:] == ["**gone**", "**gone**", "**stranger**"]
+    # One fetch per linked user, then served from the TTL cache
+    assert guild.fetches == 2
+
+
+def test_membership_cache_expires(tmp_path, monkeypatch):
+    directory, _ = make_directory(tmp_path, monkeypatch, ttl=0)
+    directory.link(1, "octocat", 42)
+    guild = FakeGuild(members={42})
+
+    async def scenario():
+        await directory.mention(guild, "octocat")
+        await directory.mention(guild, "octocat")
+
+    asyncio.run(scenario())
+    assert guild.fetches == 2
@@ -0,0 +1,450 @@
+import asyncio
+
+from pr_handler import PRHandler, PRRecord
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, content=None, embed=None):
+        self.channel.edits.append((self.id, content if embed is None else embed))
+
+    async def delete(self):
+        self.channel.deleted.append(self.id)
+
+    async def pin(self):
+        self.channel.pinned.append(self.id)
+
+    async def create_thread(self, name):
+        thread = self.channel.client.add_channel(FakeChannel(self.channel.client, self.id + 1))
+        self.channel.threads.append(thread)
+        return thread
+
+
+class FakeGuild:
+    id = 1
+    me = None
+
+
+class FakeChannel:
+    type = "text"
+    guild = FakeGuild()
+
+    def __init__(self, client, channel_id):
+        self.client = client
+        self.id = channel_id
+        self.sent = []
+        self.edits = []
+        self.deleted = []
+        self.threads = []
+        self.pinned = []
+
+    async def send(self, content=None, embed=None):
+        self.sent.append(content if embed is None else embed)
+        return FakePartialMessage(self, self.id * 10 + len(self.sent))
+
+    def get_partial_message(self, message_id):
+        return FakePartialMessage(self, message_id)
+
+    def permissions_for(self, member):
+        return "all"
+
+
+class FakeClient:
+    def __init__(self):
+        self.channels = {}
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+def make_handler(**kwargs):
+    client = FakeClient()
+    channel = client.add_channel(FakeChannel(client, 100))
+    return PRHandler(client, **kwargs), client, channel
+
+
+def test_lazy_thread_created_once_on_first_update():
+    handler, _, channel = make_handler(lazy_threads=True, thread_intro=False)
+    key = ("org/repo", "7")
+    record = PRRecord(channel.id, 500, "opened", "Fix")
+    handler.pr_records[key] = {channel.id: record}
+
+    async def scenario():
+        await handler._open_thread(key, record, channel.get_partial_message(500))
+        assert channel.threads == []
+        await handler.post_thread_update(key, "status", create_thread=False)
+        assert channel.threads == []
+        await asyncio.gather(
+            handler.post_thread_update(key, "first"),
+            handler.post_thread_update(key, "second"),
+        )
+
+    asyncio.run(scenario())
+    assert len(channel.threads) == 1
+    assert record.thread_id == 501
+    assert sorted(channel.threads[0].sent) == ["first", "second"]
+
+
+def test_eager_thread_posts_intro():
+    handler, _, channel = make_handler()
+    key = ("org/repo", "8")
+    record = PRRecord(channel.id, 600, "opened", "Docs")
+
+    asyncio.run(handler._open_thread(key, record, channel.get_partial_message(600)))
+    assert len(channel.threads) == 1
+    assert channel.threads[0].sent[0].startswith("🧵 **Thread created for PR #8**")
+
+
+def test_card_updates_keep_only_ids_and_state():
+    handler, _, channel = make_handler(lazy_threads=True)
+
+    async def scenario():
+        assert await handler.create_or_update_pr("org/repo", "9", "opened", "Add cache",
+                                                 author="octo", channel=channel)
+        assert await handler.create_or_update_pr("org/repo", "9", "merged", "Add cache", channel=channel)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    record = handler.get_card(("org/repo", "9"), channel.id)
+    assert (record.channel_id, record.message_id, record.thread_id) == (100, 1001, None)
+    assert (record.status, record.author) == ("merged", "octo")
+    assert channel.edits[0][1].title == "✅ PR #9: Add cache"
+    assert not hasattr(record, "__dict__")
+
+
+def test_comment_edits_collapse_and_delete_removes():
+    handler, client, _ = make_handler()
+    handler.COMMENT_EDIT_WINDOW = 0.05
+    key = ("org/repo", "9")
+    thread = client.add_channel(FakeChannel(client, 300))
+    handler.pr_records[key] = {100: PRRecord(100, 200, "opened", "Fix", thread_id=thread.id)}
+
+    async def scenario():
+        sent = await handler.post_thread_update(key, "original")
+        handler.remember_comment(42, key, sent)
+        assert await handler.edit_comment_message(42, "edit 1")
+        assert await handler.edit_comment_message(42, "edit 2")
+        assert await handler.edit_comment_message(42, "edit 3")
+        assert not await handler.edit_comment_message(43, "unknown")
+        await asyncio.sleep(0.15)
+        await handler.delete_comment_message(42)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert thread.edits == [(3001, "edit 1"), (3001, "edit 3")]
+    assert thread.deleted == [3001]
+    assert 42 not in handler.comment_messages
+
+
+def test_comment_map_is_bounded():
+    handler, client, _ = make_handler()
+    handler.COMMENT_MAP_SIZE = 3
+    thread = FakeChannel(client, 1)
+    for comment_id in range(5):
+        handler.remember_comment(comment_id, ("org/repo", "1"), {1: FakePartialMessage(thread, comment_id)})
+    assert list(handler.comment_messages) == [2, 3, 4]
+
+
+def test_ci_field_edits_only_when_summary_changes():
+    handler, _, channel = make_handler(lazy_threads=True)
+    key = ("org/repo", "10")
+    handler.pr_records[key] = {channel.id: PRRecord(channel.id, 700, "opened", "CI")}
+
+    async def scenario():
+        handler.ci.record_run(key, "abc", 1, 1, "pending")
+        handler.ci.record_run(key, "abc", 2, 1, "pending")
+        await handler.update_ci(key)
+        # An in_progress update for a run that was already queued changes nothing
+        handler.ci.record_run(key, "abc", 1, 1, "pending")
+        await handler.update_ci(key)
+        handler.ci.record_run(key, "abc", 1, 1, "success")
+        handler.ci.record_run(key, "abc", 2, 1, "success")
+        await handler.update_ci(key)
+        await handler.update_ci(key)
+
+    asyncio.run(scenario())
+    ci_values = [embed.fields[-1].value for _, embed in channel.edits]
+    assert ci_values == ["⏳ 0/2 passing (2 pending)", "✅ 2/2 passing"]
+    assert handler.get_card(key, channel.id).ci == "✅ 2/2 passing"
+
+
+def test_review_field_tracks_latest_verdict_per_reviewer():
+    handler, _, channel = make_handler(lazy_threads=True)
+    key = ("org/repo", "11")
+    handler.pr_records[key] = {channel.id: PRRecord(channel.id, 800, "opened", "Reviews")}
+
+    async def scenario():
+        await handler.record_review(key, "alice", "changes_requested")
+        await handler.record_review(key, "alice", "commented")
+        await handler.record_review(key, "alice", "approved")
+        await handler.record_review(key, "alice", "approved")
+        await handler.record_review(key, "bob", "commented")
+        await handler.record_review(key, "alice", "dismissed")
+
+    asyncio.run(scenario())
+    fields = [{f.name: f.value for f in embed.fields} for _, embed in channel.edits]
+    assert [f.get("Approvals / Changes requested") for f in fields] == [
+        "❌ 1 changes requested (alice)",
+        "✅ 1 approved (alice)",
+        None,
+    ]
+    assert handler.get_card(key, channel.id).reviews is None
+
+
+class SlowChannel(FakeChannel):
+    async def send(self, content=None, embed=None):
+        await asyncio.sleep(0.2)
+        return await super().send(content, embed)
+
+
+class BrokenChannel(FakeChannel):
+    async def send(self, content=None, embed=None):
+        raise RuntimeError("Missing Access")
+
+
+def test_fan_out_isolates_slow_and_failing_channels():
+    handler, client, fast = make_handler(lazy_threads=True)
+    slow = client.add_channel(SlowChannel(client, 200))
+    broken = client.add_channel(BrokenChannel(client, 300))
+    key = ("org/repo", "12")
+    finished = {}
+
+    async def create(channel):
+        record = await handler.create_or_update_pr(*key, "opened", "Fan-out", channel=channel)
+        finished[channel.id] = asyncio.get_running_loop().time()
+        if not record:
+            raise RuntimeError("card not created")
+        return record
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        results = await handler.fan_out("test", {c.id: c for c in (fast, slow, broken)}, create)
+        return started, results
+
+    started, results = asyncio.run(scenario())
+    assert finished[fast.id] - started < 0.1
+    assert finished[slow.id] - started >= 0.2
+    assert results[broken.id] is None
+    assert set(handler.pr_records[key]) == {fast.id, slow.id}
+
+
+def test_failed_card_edit_is_dead_lettered_and_redriven():
+    handler, _, channel = make_handler(lazy_threads=True)
+    key = ("org/repo", "13")
+    original_edit = FakePartialMessage.edit
+
+    async def failing_edit(self, content=None, embed=None):
+        raise RuntimeError("Unknown Message")
+
+    async def scenario():
+        await handler.create_or_update_pr(*key, "opened", "Retry", channel=channel)
+        FakePartialMessage.edit = failing_edit
+        try:
+            assert not await handler.create_or_update_pr(*key, "merged", "Retry", channel=channel)
+        finally:
+            FakePartialMessage.edit = original_edit
+        assert handler.get_card(key, channel.id).status == "opened"
+        assert await handler.writes.redrive() == (1, 0)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert handler.get_card(key, channel.id).status == "merged"
+    assert channel.edits[-1][1].title == "✅ PR #13: Retry"
+    assert not handler.writes.dead_letters
+
+
+def test_timeline_is_one_pinned_message_edited_on_transitions():
+    handler, _, channel = make_handler(thread_intro=False)
+    handler.TIMELINE_EDIT_DELAY = 0.01
+    key = ("org/repo", "14")
+
+    async def scenario():
+        record = await handler.create_or_update_pr(*key, "opened", "Timeline", channel=channel)
+        assert handler.note_transition(record, "opened", at=1000)
+        await handler.update_timeline(key, record)
+        # Labels, edits and repeats aren't transitions; pushes collapse into one edit
+        assert not handler.note_transition(record, "labeled")
+        assert not handler.note_transition(record, "opened")
+        for _ in range(3):
+            handler.note_push(key, record)
+        await asyncio.sleep(0.05)
+        assert handler.note_transition(record, "merged", at=2000)
+        await handler.update_timeline(key, record)
+        await handler.timers.stop()
+        return record
+
+    record = asyncio.run(scenario())
+    thread = channel.threads[0]
+    assert thread.sent == ["📋 **PR #14 timeline**\n🚀 Opened <t:1000:f>"]
+    assert thread.pinned == [record.timeline_id]
+    assert [content for _, content in thread.edits] == [
+        "📋 **PR #14 timeline**\n🚀 Opened <t:1000:f>\n🔁 New commits pushed 3 times",
+        "📋 **PR #14 timeline**\n🚀 Opened <t:1000:f>\n✅ Merged <t:2000:f>\n🔁 New commits pushed 3 times",
+    ]
+
+
+def test_timeline_is_capped():
+    handler, _, channel = make_handler()
+    record = PRRecord(channel.id, 1, "opened", "Flip-flop")
+    for i in range(40):
+        handler.note_transition(record, "draft" if i % 2 else "ready_for_review", at=i)
+    lines = handler.render_timeline(("org/repo", "15"), record).split("\n")
+    assert len(record.timeline) == handler.TIMELINE_SIZE
+    assert lines[1] == f"…{40 - handler.TIMELINE_SIZE} earlier"
+    assert lines[-1] == "🛠️ Draft <t:39:f>"
+
+
+def test_nested_fan_outs_never_wait_on_each_other():
+    handler, client, _ = make_handler(thread_intro=False)
+    events = handler.FANOUT_CONCURRENCY + 2
+    channels = [client.add_channel(FakeChannel(client, 1000 + i * 10)) for i in range(events)]
+
+    async def scenario():
+        for i, channel in enumerate(channels):
+            await handler.create_or_update_pr("org/repo", str(i), "opened", "Nested", channel=channel)
+
+        async def event(i):
+            # Like process_pull_request: an outer fan-out whose op posts to the threads
+            key = ("org/repo", str(i))
+            await handler.fan_out("outer", handler.pr_records[key],
+                                  lambda record: handler.post_thread_update(key, "update"))
+
+        await asyncio.wait_for(asyncio.gather(*(event(i) for i in range(events))), timeout=2)
+
+    asyncio.run(scenario())
+    for channel in channels:
+        assert channel.threads[0].sent == ["update"]
+
+
+def test_pending_archival_survives_restart(tmp_path, monkeypatch):
+    import pr_handler
+    path = str(tmp_path / "archives.json")
+    handler, client, channel = make_handler(thread_intro=False, archive_grace=3600, archive_path=path)
+    key = ("org/repo", "14")
+
+    async def merged():
+        await handler.create_or_update_pr(*key, "opened", "Archive me", channel=channel)
+        await handler.create_or_update_pr(*key, "merged", "Archive me", channel=channel)
+        await handler.timers.stop()
+        handler.save_archives()
+
+    asyncio.run(merged())
+    thread_id = handler.get_card(key, channel.id).thread_id
+
+    # A fresh process knows nothing about the card, only the saved deadline
+    restarted = PRHandler(client, archive_grace=3600, archive_path=path)
+    archived = []
+
+    async def archive(thread):
+        archived.append(thread.id)
+
+    monkeypatch.setattr(pr_handler, "archive_and_lock_thread", archive)
+    monkeypatch.setattr(pr_handler.discord, "Thread", FakeChannel)
+    monkeypatch.setattr(pr_handler.time, "time", lambda: 10 ** 10)
+
+    async def restart():
+        restarted.load_archives()
+        await asyncio.sleep(0.1)
+        await restarted.timers.stop()
+
+    asyncio.run(restart())
+    assert archived == [thread_id]
+    assert restarted.archive_deadlines == {}
+
+
+def test_activity_after_merge_keeps_status_and_archival(monkeypatch):
+    import pr_handler
+    from webhook_server import resolve_pr_state
+    handler, _, channel = make_handler(thread_intro=False, archive_grace=0.05)
+    key = ("org/repo", "15")
+    merged_pr = {"state": "closed", "merged": True}
+    archived = []
+
+    async def archive(thread):
+        archived.append(thread.id)
+
+    monkeypatch.setattr(pr_handler, "archive_and_lock_thread", archive)
+    monkeypatch.setattr(pr_handler.discord, "Thread", FakeChannel)
+
+    async def scenario():
+        await handler.create_or_update_pr(*key, "opened", "Label me", channel=channel)
+        await handler.create_or_update_pr(*key, resolve_pr_state("closed", merged_pr), "Label me", channel=channel)
+        await handler.create_or_update_pr(*key, resolve_pr_state("labeled", merged_pr), "Label me", channel=channel)
+        assert handler.get_card(key, channel.id).status == "merged"
+        await asyncio.sleep(0.15)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert archived == [handler.get_card(key, channel.id).thread_id]
+    assert resolve_pr_state("reopened", {"state": "open"}) == "reopened"
+
+
+def test_shutdown_flush_applies_held_back_writes_only():
+    handler, client, _ = make_handler(archive_grace=3600)
+    key = ("org/repo", "16")
+    thread = client.add_channel(FakeChannel(client, 400))
+    handler.pr_records[key] = {100: PRRecord(100, 200, "merged", "Fix", thread_id=thread.id)}
+
+    async def scenario():
+        sent = await handler.post_thread_update(key, "original")
+        handler.remember_comment(44, key, sent)
+        assert await handler.edit_comment_message(44, "edit 1")
+        assert await handler.edit_comment_message(44, "edit 2")
+        handler._schedule_archive(key, handler.get_card(key, 100))
+        assert await handler.flush_deferred() == 1
+        # The archival is hours away and isn't a held-back write
+        assert ("archive", key, 100) in handler.timers
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert thread.edits == [(4001, "edit 1"), (4001, "edit 2")]
+
+
+def test_shutdown_flush_applies_timeline_and_ci_edits():
+    handler, _, channel = make_handler(thread_intro=False)
+    key = ("org/repo", "17")
+
+    class Degraded:
+        def stretch(self):
+            return 4.0
+
+    async def scenario():
+        record = await handler.create_or_update_pr(*key, "opened", "Flush", channel=channel)
+        handler.note_transition(record, "opened", at=1000)
+        await handler.update_timeline(key, record)
+        handler.note_push(key, record)
+        # Near its API budget, the CI refresh waits for a stretched window
+        handler.budgets = Degraded()
+        handler.ci.record_run(key, "abc", 1, 1, "success")
+        await handler.refresh_ci(key)
+        assert handler.get_card(key, channel.id).ci is None
+        assert await handler.flush_deferred() == 2
+        await handler.timers.stop()
+        return record
+
+    record = asyncio.run(scenario())
+    assert record.ci == "✅ 1/1 passing"
+    assert channel.threads[0].edits[-1][1].endswith("🔁 New commits pushed 1 time")
+
+
+def test_ci_field_clears_when_the_rollup_restarts():
+    handler, _, channel = make_handler(lazy_threads=True)
+    key = ("org/repo", "18")
+    handler.pr_records[key] = {channel.id: PRRecord(channel.id, 800, "opened", "CI")}
+
+    async def scenario():
+        handler.ci.record_run(key, "abc", 1, 1, "failure")
+        await handler.update_ci(key)
+        handler.ci.note_head(key, "def")
+        await handler.update_ci(key)
+
+    asyncio.run(scenario())
+    assert handler.get_card(key, channel.id).ci is None
+    assert len(channel.edits) == 2
@@ -0,0 +1,120 @@
+import time
+import asyncio
+
+from pr_handler import PRRecord
+from pr_index import PRSearchIndex, tokenize
+from test_pr_handler import make_handler
+
+
+def test_tokenize_splits_names():
+    assert tokenize("Fix flaky ci-cache test") >= {"fix", "flaky", "ci-cache", "ci", "cache", "test"}
+    assert tokenize("org/app.js") >= {"org", "app.js", "app", "js"}
+
+
+def test_search_by_title_number_author_and_state():
+    index = PRSearchIndex()
+    cache = PRRecord(100, 1, "opened", "Add cache layer", author="octo")
+    docs = PRRecord(100, 2, "merged", "Docs for cache", author="mona")
+    index.update(("org/app", "7"), cache, guild_id=1)
+    index.update(("org/app", "8"), docs, guild_id=1)
+    index.update(("org/app", "9"), PRRecord(200, 3, "opened", "Add cache"), guild_id=2)
+
+    def numbers(query):
+        return [doc[1] for doc, _ in index.search(query, guild_id=1)]
+
+    assert numbers("cache") == ["8", "7"]  # most recently updated first
+    assert numbers("#7") == ["7"]
+    assert numbers("octo") == ["7"]
+    assert numbers("cache merged") == ["8"]
+    assert numbers("org/app layer") == ["7"]
+    assert numbers("nothing") == []
+
+
+def test_reindex_drops_stale_tokens():
+    index = PRSearchIndex()
+    record = PRRecord(100, 1, "opened", "Old title")
+    index.update(("org/app", "1"), record, guild_id=1)
+    record.title, record.status = "New title", "merged"
+    index.update(("org/app", "1"), record, guild_id=1)
+
+    assert index.search("old", 1) == []
+    assert index.search("opened", 1) == []
+    assert len(index.search("new merged", 1)) == 1
+    index.remove(("org/app", "1"), 100)
+    assert index.search("new", 1) == [] and len(index) == 0
+
+
+def test_create_or_update_pr_keeps_index_current():
+    handler, _, channel = make_handler(lazy_threads=True)
+
+    async def scenario():
+        await handler.create_or_update_pr("org/app", "3", "opened", "Speed up search", author="octo", channel=channel)
+        await handler.create_or_update_pr("org/app", "3", "merged", "Speed up search", channel=channel)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    [(doc, record)] = handler.index.search("search merged", guild_id=1)
+    assert doc == ("org/app", "3", channel.id)
+    assert record.message_id
+
+
+def test_search_stays_fast_with_many_prs():
+    index = PRSearchIndex()
+    for n in range(30000):
+        record = PRRecord(100 + n % 5, n, "opened", f"Change {n} in module{n % 300} for feature{n % 50}",
+                          author=f"dev{n % 40}")
+        index.update(("org/app", str(n)), record, guild_id=1)
+
+    queries = ["#12345", "module17 feature17", "dev3 opened"]
+    started = time.perf_counter()
+    for _ in range(25):
+        for query in queries:
+            assert index.search(query, guild_id=1)
+    per_query = (time.perf_counter() - started) / 75
+    assert per_query < 0.001
+
+
+def test_postings_are_kept_per_guild():
+    index = PRSearchIndex()
+    index.update(("org/app", "1"), PRRecord(100, 1, "opened", "Shared words"), guild_id=1)
+    index.update(("org/app", "2"), PRRecord(200, 2, "opened", "Shared words"), guild_id=2)
+
+    assert [doc[1] for doc, _ in index.search("shared words", 2)] == ["2"]
+    index.remove(("org/app", "2"), 200)
+    assert index.search("shared", 2) == [] and 2 not in index._postings
+    assert len(index.search("shared", 1)) == 1
+
+
+def test_archived_cards_leave_the_index(monkeypatch, tmp_path):
+    import pr_handler
+    handler, client, channel = make_handler(thread_intro=False, archive_grace=0.05)
+    key = ("org/app", "4")
+
+    async def archive(thread):
+        pass
+
+    monkeypatch.setattr(pr_handler, "archive_and_lock_thread", archive)
+    monkeypatch.setattr(pr_handler.discord, "Thread", type(channel))
+
+    async def scenario():
+        await handler.create_or_update_pr(*key, "opened", "Prune me", channel=channel)
+        await handler.create_or_update_pr(*key, "merged", "Prune me", channel=channel)
+        assert handler.index.search("prune", 1)
+        await asyncio.sleep(0.15)
+        # Later activity on the merged PR (an edit, say) doesn't bring it back
+        await handler.create_or_update_pr(*key, "merged", "Prune me", channel=channel)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert handler.index.search("prune", 1) == [] and len(handler.index) == 0
+
+    # Nor does restoring the card after a restart
+    record = handler.get_card(key, channel.id)
+    restarted = pr_handler.PRHandler(client, archive_grace=3600, archive_path=str(tmp_path / "archives.json"))
+    restarted.restore_cards([{"repository": key[0], "pr_number": key[1], "channel_id": channel.id,
+                              "guild_id": 1, "message_id": record.message_id, "thread_id": record.thread_id,
+                              "status": "merged", "title": "Prune me", "url": None, "author": None,
+                              "ci": None, "reviews": None}])
+    assert len(restarted.index) == 1
+    restarted.load_archives()
+    assert len(restarted.index) == 0
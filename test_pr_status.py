@@ -1,7 +1,7 @@
 import discord
 import pytest
 
-from utils import get_status_color, get_status_icon
+from utils import get_status_color, get_status_icon, summarize_reviews
 from webhook_server import resolve_pr_state
 
 
@@ -37,3 +37,15 @@ def test_get_status_color(state, expected):
 def test_draft_icon():
     assert get_status_icon("draft") == "🛠️"
     assert get_status_icon("converted_to_draft") == "🛠️"
+
+
+@pytest.mark.parametrize("reviews,expected", [
+    (None, None),
+    ({}, None),
+    ({"alice": "approved"}, "✅ 1 approved (alice)"),
+    ({"bob": "approved", "alice": "approved", "carol": "changes_requested"},
+     "✅ 2 approved (alice, bob)\n❌ 1 changes requested (carol)"),
+    ({n: "approved" for n in "abcde"}, "✅ 5 approved (a, b, c +2)"),
+])
+def test_summarize_reviews(reviews, expected):
+    assert summarize_reviews(reviews) == expected
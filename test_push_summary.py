@@ -0,0 +1,73 @@
+import asyncio
+
+from pr_handler import PRHandler
+from push_summary import PushSummaries
+from test_pr_handler import FakeClient, FakeChannel
+
+
+def push(ref="refs/heads/main", commits=(), before="a" * 40, after="b" * 40, **extra):
+    return dict({
+        "ref": ref, "before": before, "after": after, "pusher": {"name": "octo"},
+        "commits": [{"id": sha, "message": f"Commit {sha}\n\nbody", "author": {"username": "octo"}}
+                    for sha in commits],
+    }, **extra)
+
+
+def make_summaries(**kwargs):
+    client = FakeClient()
+    channel = client.add_channel(FakeChannel(client, 100))
+    return PushSummaries(PRHandler(client), **kwargs), channel
+
+
+def test_large_push_is_one_capped_message():
+    summaries, channel = make_summaries()
+
+    async def scenario():
+        await summaries.record_push(100, "org/repo", push(commits=[f"{i:040d}" for i in range(200)]))
+        await summaries.timers.stop()
+
+    asyncio.run(scenario())
+    assert len(channel.sent) == 1
+    message = channel.sent[0]
+    assert message.startswith("📦 **org/repo** `main`: 200 new commits by octo")
+    assert message.count("\n• ") == PushSummaries.MAX_LISTED
+    assert "…and 190 more" in message
+    assert "body" not in message
+    assert len(message) <= 2000
+
+
+def test_burst_to_one_branch_edits_one_message():
+    summaries, channel = make_summaries(window=60, edit_interval=0.05)
+
+    async def scenario():
+        await summaries.record_push(100, "org/repo", push(commits=["1" * 40, "2" * 40]))
+        # A force-push re-sending a commit, then two more pushes inside the edit interval
+        await summaries.record_push(100, "org/repo", push(commits=["2" * 40, "3" * 40], forced=True))
+        await summaries.record_push(100, "org/repo", push(commits=["4" * 40]))
+        await summaries.record_push(100, "org/repo", push(ref="refs/heads/dev", commits=["5" * 40]))
+        await summaries.record_push(100, "org/repo", push(ref="refs/tags/v1", commits=["6" * 40]))
+        await asyncio.sleep(0.15)
+        await summaries.timers.stop()
+
+    asyncio.run(scenario())
+    # One message per branch, the tag push ignored
+    assert len(channel.sent) == 2
+    assert len(channel.edits) == 1
+    _, content = channel.edits[0]
+    assert content.startswith("📦 **org/repo** `main`: 3 pushes, 4 new commits by octo (force-pushed)")
+    assert content.index("`4444444`") < content.index("`1111111`")
+
+
+def test_held_back_edit_is_applied_on_shutdown():
+    summaries, channel = make_summaries(window=60, edit_interval=60)
+
+    async def scenario():
+        await summaries.record_push(100, "org/repo", push(commits=["1" * 40]))
+        await summaries.record_push(100, "org/repo", push(commits=["2" * 40]))
+        assert channel.edits == []
+        assert await summaries.pr_handler.flush_deferred() == 1
+        await summaries.timers.stop()
+
+    asyncio.run(scenario())
+    assert len(channel.edits) == 1
+    assert "2 pushes, 2 new commits" in channel.edits[0][1]
@@ -0,0 +1,110 @@
+import time
+import json
+import asyncio
+
+from pr_handler import PRRecord
+from reminders import ReminderScheduler
+from test_pr_handler import FakeChannel, make_handler
+
+
+def test_activity_pushes_deadline_back_and_forget_cancels(tmp_path):
+    handler, _, _ = make_handler()
+    reminders = ReminderScheduler(handler, stale_after=3600, path=str(tmp_path / "r.json"))
+    key = ("org/repo", "1")
+
+    reminders.touch(key)
+    first = handler.timers.due_time(("reminder", key))
+    time.sleep(0.01)
+    reminders.touch(key)
+    assert handler.timers.due_time(("reminder", key)) > first
+
+    reminders.forget(key)
+    assert ("reminder", key) not in handler.timers
+    assert key not in reminders.deadlines
+
+
+def test_reminder_posts_in_thread_and_rearms(tmp_path):
+    handler, client, channel = make_handler()
+    thread = client.add_channel(FakeChannel(client, 501))
+    key = ("org/repo", "2")
+    handler.pr_records[key] = {channel.id: PRRecord(channel.id, 500, "opened", "Fix", thread_id=thread.id)}
+    reminders = ReminderScheduler(handler, stale_after=86400, path=str(tmp_path / "r.json"))
+
+    async def scenario():
+        reminders._arm(key, time.time())
+        await asyncio.sleep(0.05)
+        await handler.timers.stop()
+
+    asyncio.run(scenario())
+    assert thread.sent == ["⏰ **Reminder:** this PR has been waiting on review with no activity for 1 day."]
+    assert reminders.deadlines[key][0] > time.time() + 86000
+
+
+def test_schedule_survives_restart_and_spreads_overdue(tmp_path):
+    path = str(tmp_path / "r.json")
+    handler, _, channel = make_handler()
+    key = ("org/repo", "3")
+    handler.pr_records[key] = {channel.id: PRRecord(channel.id, 500, "opened", "Fix", thread_id=77)}
+    reminders = ReminderScheduler(handler, stale_after=3600, path=path)
+    reminders.touch(key)
+    reminders.save()
+    with open(path) as f:
+        assert json.load(f)["org/repo#3"][1] == [77]
+
+    with open(path, 'w') as f:
+        json.dump({"org/repo#3": [1.0, [77]], "org/repo#4": [2.0, []]}, f)
+    restarted, _, _ = make_handler()
+    reloaded = ReminderScheduler(restarted, stale_after=3600, path=path)
+    reloaded.load(spread=10)
+    dues = sorted(restarted.timers.due_time(("reminder", k)) for k in reloaded.deadlines)
+    assert dues[1] - dues[0] >= 9
+    assert reloaded.deadlines[("org/repo", "3")][1] == [77]
+
+
+def test_rescheduling_many_prs_is_cheap(tmp_path):
+    handler, _, _ = make_handler()
+    reminders = ReminderScheduler(handler, stale_after=3600, path=str(tmp_path / "r.json"))
+    keys = [("org/repo", str(n)) for n in range(20000)]
+
+    started = time.perf_counter()
+    for _ in range(3):
+        for key in keys:
+            reminders.touch(key)
+    assert time.perf_counter() - started < 2
+    # Superseded heap entries are compacted away rather than piling up
+    assert len(handler.timers) == 20001
+    assert len(handler.timers._heap) <= 2 * len(handler.timers) + 1
+
+
+def test_closed_prs_are_never_reminded(tmp_path):
+    import webhook_server
+    handler, client, channel = make_handler()
+    thread = client.add_channel(FakeChannel(client, 601))
+    key = ("org/repo", "3")
+    record = PRRecord(channel.id, 600, "opened", "Fix", thread_id=thread.id)
+    handler.pr_records[key] = {channel.id: record}
+    reminders = ReminderScheduler(handler, stale_after=86400, path=str(tmp_path / "r.json"))
+
+    class FakeBot:
+        pass
+
+    FakeBot.reminders = reminders
+    webhook_server.set_bot_instance(FakeBot)
+
+    async def scenario():
+        reminders.touch(key)
+        # A label added after the merge doesn't re-arm it
+        webhook_server.note_pr_activity(key, "labeled", closed=True)
+        assert key not in reminders.deadlines
+        # A reminder armed before the card was merged is dropped, not re-armed
+        reminders._arm(key, time.time())
+        record.status = "merged"
+        await asyncio.sleep(0.05)
+        await handler.timers.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        webhook_server.set_bot_instance(None)
+    assert thread.sent == []
+    assert key not in reminders.deadlines
@@ -0,0 +1,114 @@
+import asyncio
+
+import discord
+
+from retries import RetryingWriter, is_transient, is_undelivered
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "error"
+
+
+def http_error(status):
+    cls = {403: discord.Forbidden, 404: discord.NotFound}.get(status, discord.HTTPException)
+    return cls(FakeResponse(status), "error")
+
+
+class Flaky:
+    """Fails with each of errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "sent"
+
+
+def test_classification():
+    assert is_transient(http_error(503))
+    assert is_transient(http_error(429))
+    assert is_transient(asyncio.TimeoutError())
+    assert not is_transient(http_error(404))
+    assert not is_transient(http_error(403))
+    assert not is_transient(ValueError("bad embed"))
+    assert is_undelivered(http_error(429)) and is_undelivered(http_error(503))
+    assert not is_undelivered(asyncio.TimeoutError())
+    assert not is_undelivered(ConnectionResetError())
+
+
+def test_transient_failures_are_retried_then_succeed():
+    writes = RetryingWriter(attempts=3, base_delay=0.001)
+    call = Flaky(http_error(502), ConnectionResetError())
+
+    assert asyncio.run(writes.run("edit", call)) == "sent"
+    assert call.calls == 3
+    assert (writes.counts["retried"], writes.counts["ok"]) == (2, 1)
+    assert not writes.dead_letters
+
+
+def test_permanent_and_exhausted_failures_become_dead_letters():
+    writes = RetryingWriter(attempts=2, base_delay=0.001, dead_letter_size=2)
+    permanent = Flaky(http_error(404))
+    exhausted = Flaky(http_error(500), http_error(500))
+
+    async def scenario():
+        for label, call in (("gone", permanent), ("down", exhausted), ("third", Flaky(ValueError()))):
+            try:
+                await writes.run(label, call)
+            except Exception:
+                pass
+
+    asyncio.run(scenario())
+    assert permanent.calls == 1 and exhausted.calls == 2
+    # Bounded: the oldest letter was dropped
+    assert [letter.label for letter in writes.dead_letters.values()] == ["down", "third"]
+    assert writes.counts["dropped"] == 1
+    down = writes.get(2)
+    assert (down.transient, down.attempts, down.error) == (True, 2, "HTTP 500: error")
+
+
+def test_redrive_reruns_and_keeps_what_fails_again():
+    writes = RetryingWriter(attempts=1)
+    recovered = Flaky(http_error(503))
+    still_broken = Flaky(http_error(403), http_error(403))
+    nested = Flaky(http_error(404), http_error(404))
+
+    async def wrapper():
+        # A redrive that goes through run() again must not add a second letter
+        await writes.run("inner", nested)
+
+    async def scenario():
+        for label, call, redrive in (("a", recovered, None), ("b", still_broken, None), ("c", nested, wrapper)):
+            try:
+                await writes.run(label, call, redrive=redrive)
+            except Exception:
+                pass
+        return await writes.redrive()
+
+    assert asyncio.run(scenario()) == (1, 2)
+    assert [letter.label for letter in writes.dead_letters.values()] == ["b", "c"]
+    assert writes.counts["redriven"] == 1
+
+
+def test_creating_calls_retry_only_what_was_not_delivered():
+    writes = RetryingWriter(attempts=3, base_delay=0.001)
+    rejected = Flaky(http_error(503))
+    timed_out = Flaky(asyncio.TimeoutError())
+
+    async def scenario():
+        assert await writes.run("card", rejected, idempotent=False) == "sent"
+        try:
+            await writes.run("card", timed_out, idempotent=False)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(scenario())
+    # The timed out send may have been posted, so it isn't sent again
+    assert rejected.calls == 2 and timed_out.calls == 1
+    assert [letter.label for letter in writes.dead_letters.values()] == ["card"]
@@ -0,0 +1,143 @@
+import asyncio
+
+import discord
+
+from command_handler import CommandHandler
+from slash_commands import SlashInvocation, build_command_tree
+
+
+class FakeResponse:
+    def __init__(self, sent):
+        self.sent = sent
+
+    def is_done(self):
+        return bool(self.sent)
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent.append(("response", content, kwargs.get("ephemeral", False)))
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self.sent.append(("defer", None, ephemeral))
+
+
+class FakeFollowup:
+    def __init__(self, sent):
+        self.sent = sent
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(("followup", content, kwargs.get("ephemeral", False)))
+
+
+class FakeInteraction:
+    channel = None
+    guild = None
+    guild_id = 1
+
+    def __init__(self, user):
+        self.user = user
+        self.sent = []
+        self.response = FakeResponse(self.sent)
+        self.followup = FakeFollowup(self.sent)
+
+
+class FakeChannel:
+    id = 10
+    sent = []
+
+    async def send(self, content=None, **kwargs):
+        raise AssertionError("slash command replies must answer the interaction")
+
+
+class FakePermissions:
+    administrator = False
+
+
+class FakeUser:
+    id = 5
+    guild_permissions = FakePermissions()
+
+
+def test_replies_answer_the_interaction_then_follow_up():
+    interaction = FakeInteraction(FakeUser())
+    interaction.channel = FakeChannel()
+    invocation = SlashInvocation(interaction, "!prbot status")
+
+    async def scenario():
+        # Not an admin: the permission check replies through the interaction
+        await CommandHandler(bot=None).handle_admin_commands(invocation, {}, 1)
+        await invocation.respond("second")
+        await invocation.finish()
+
+    asyncio.run(scenario())
+    assert interaction.sent == [
+        ("response", "You need administrator permissions to configure the bot.", False),
+        ("followup", "second", False),
+    ]
+
+
+def test_finish_acknowledges_silent_commands():
+    interaction = FakeInteraction(FakeUser())
+    invocation = SlashInvocation(interaction, "!pr something")
+    asyncio.run(invocation.finish())
+    assert interaction.sent == [("response", "Done.", True)]
+
+
+def test_slow_commands_are_deferred_first():
+    interaction = FakeInteraction(FakeUser())
+    bot = discord.Client(intents=discord.Intents.none())
+
+    class SlowPRHandler:
+        async def handle_pr_command(self, message):
+            # Longer than Discord would wait for an answer, scaled down
+            await asyncio.sleep(0.05)
+            await message.respond("Posted.")
+            await message.respond("Thread updated.")
+
+    bot.pr_handler = SlowPRHandler()
+    tree = build_command_tree(bot)
+
+    async def scenario():
+        command = tree.get_command("pr")
+        # Deferred before the handler starts, not after it returns
+        task = asyncio.create_task(command.callback(interaction, "[org/repo] Pull request opened: #1 Fix"))
+        await asyncio.sleep(0.01)
+        assert interaction.sent == [("defer", None, True)]
+        await task
+
+    asyncio.run(scenario())
+    # Every followup stays private, not just the one that replaces "thinking"
+    assert interaction.sent == [("defer", None, True), ("followup", "Posted.", True),
+                                ("followup", "Thread updated.", True)]
+
+
+def test_deferred_silent_command_still_gets_an_answer():
+    interaction = FakeInteraction(FakeUser())
+    invocation = SlashInvocation(interaction, "!pr something")
+
+    async def scenario():
+        await invocation.defer()
+        await invocation.finish()
+
+    asyncio.run(scenario())
+    assert interaction.sent == [("defer", None, True), ("followup", "Done.", True)]
+
+
+def test_backfill_reports_github_timeouts():
+    sent = []
+
+    class Message:
+        content = "!prbot backfill org/repo"
+
+        async def respond(self, content=None, **kwargs):
+            sent.append(content)
+
+    class GitHub:
+        async def list_open_pulls(self, repository):
+            raise asyncio.TimeoutError()
+
+    class Bot:
+        github = GitHub()
+
+    asyncio.run(CommandHandler(Bot()).backfill(Message(), ["!prbot", "backfill", "org/repo"]))
+    assert sent == ["Fetching open PRs for org/repo...",
+                    "Couldn't reach GitHub to list PRs for org/repo: TimeoutError"]
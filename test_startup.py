@@ -0,0 +1,51 @@
+import os
+import sys
+import subprocess
+
+from diagnostics import StartupTimer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Seconds `import bot` may take in a fresh interpreter; override on slow machines
+IMPORT_BUDGET = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5"))
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_flask_and_pyngrok_load_lazily():
+    loaded = run_python(
+        "import sys, bot, command_handler, cleanup_orphans, webhook_server\n"
+        "print(','.join(m for m in ('flask', 'werkzeug', 'pyngrok') if m in sys.modules))"
+    )
+    assert loaded == ""
+
+
+def test_import_time_within_budget():
+    code = "import time; t = time.perf_counter(); import bot; print(time.perf_counter() - t)"
+    # Best of three so one slow run on a busy machine doesn't fail the build
+    best = min(float(run_python(code)) for _ in range(3))
+    assert best < IMPORT_BUDGET, f"import bot took {best:.2f}s (budget {IMPORT_BUDGET}s)"
+
+
+def test_webhook_app_is_built_on_demand():
+    routes = run_python(
+        "import webhook_server\n"
+        "app = webhook_server.get_app()\n"
+        "assert webhook_server.get_app() is app\n"
+        "print(sorted(r.rule for r in app.url_map.iter_rules() if r.endpoint != 'static'))"
+    )
+    assert routes == "['/', '/webhook/<int:guild_id>/<int:channel_id>/<token>']"
+
+
+def test_startup_timer_summary():
+    timer = StartupTimer(started=0.0)
+    assert timer.summary() == "not measured"
+    timer.begin("config load")
+    timer.end("config load")
+    timer.end("never begun")
+    assert [phase for phase, _, _ in timer.phases] == ["config load"]
+    assert timer.summary().startswith("config load 0.00s; done ")
@@ -0,0 +1,53 @@
+import asyncio
+
+from timer_heap import TimerHeap
+
+
+def run_timers(setup, wait=0.2):
+    fired = []
+
+    async def scenario():
+        timers = TimerHeap()
+        setup(timers, fired)
+        await asyncio.sleep(wait)
+        await timers.stop()
+        return timers
+
+    return fired, asyncio.run(scenario())
+
+
+def recorder(fired, label):
+    async def callback():
+        fired.append(label)
+    return callback
+
+
+def test_fires_in_due_order():
+    def setup(timers, fired):
+        timers.schedule("late", 0.08, recorder(fired, "late"))
+        timers.schedule("early", 0.02, recorder(fired, "early"))
+        timers.schedule("middle", 0.05, recorder(fired, "middle"))
+
+    fired, timers = run_timers(setup)
+    assert fired == ["early", "middle", "late"]
+    assert len(timers) == 0
+
+
+def test_reschedule_replaces_and_cancel_drops():
+    def setup(timers, fired):
+        timers.schedule("pr", 0.01, recorder(fired, "first"))
+        timers.schedule("pr", 0.03, recorder(fired, "second"))
+        timers.schedule("gone", 0.02, recorder(fired, "gone"))
+        assert timers.cancel("gone")
+
+    fired, _ = run_timers(setup)
+    assert fired == ["second"]
+
+
+def test_not_yet_due_stays_scheduled():
+    def setup(timers, fired):
+        timers.schedule("later", 60, recorder(fired, "later"))
+
+    fired, timers = run_timers(setup, wait=0.05)
+    assert fired == []
+    assert "later" in timers
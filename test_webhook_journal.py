@@ -0,0 +1,192 @@
+from webhook_journal import WebhookJournal
+
+
+def make_journal(tmp_path, **kwargs):
+    journal = WebhookJournal(path=str(tmp_path / "journal.jsonl"), **kwargs)
+    journal.open()
+    return journal
+
+
+def test_unfinished_entries_survive_restart(tmp_path):
+    journal = make_journal(tmp_path)
+    first = journal.append("pull_request", 1, 2, {"action": "opened"})
+    second = journal.append("issue_comment", 1, 2, {"action": "created"})
+    journal.complete(first)
+    journal.close()
+
+    reopened = make_journal(tmp_path)
+    assert [e["id"] for e in reopened.pending_entries()] == [second]
+    assert reopened.pending_entries()[0]["payload"] == {"action": "created"}
+    reopened.close()
+
+
+def test_duplicate_delivery_is_rejected_while_pending(tmp_path):
+    journal = make_journal(tmp_path)
+    assert journal.append("pull_request", 1, 2, {}, delivery_id="abc") == "abc"
+    assert journal.append("pull_request", 1, 2, {}, delivery_id="abc") is None
+    journal.complete("abc")
+    assert journal.append("pull_request", 1, 2, {}, delivery_id="abc") == "abc"
+    journal.close()
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    journal = make_journal(tmp_path)
+    kept = journal.append("pull_request", 1, 2, {})
+    journal.close()
+    with open(tmp_path / "journal.jsonl", "a") as f:
+        f.write('{"op": "accept", "id": "tor')
+
+    reopened = make_journal(tmp_path)
+    assert [e["id"] for e in reopened.pending_entries()] == [kept]
+    reopened.close()
+
+
+def test_compaction_keeps_only_pending(tmp_path):
+    journal = make_journal(tmp_path, compact_threshold=10)
+    for _ in range(25):
+        journal.complete(journal.append("pull_request", 1, 2, {}))
+    # What the fsync thread does on its next tick
+    journal.compact_if_due()
+    pending = journal.append("pull_request", 1, 2, {})
+    journal.close()
+
+    lines = (tmp_path / "journal.jsonl").read_text().splitlines()
+    assert len(lines) < 15
+    reopened = make_journal(tmp_path)
+    assert [e["id"] for e in reopened.pending_entries()] == [pending]
+    reopened.close()
+
+
+def test_failed_compaction_keeps_appending(tmp_path, monkeypatch):
+    import os
+    journal = make_journal(tmp_path, compact_threshold=1)
+    journal.complete(journal.append("pull_request", 1, 2, {}))
+
+    def no_space(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "replace", no_space)
+    journal.compact_if_due()
+    monkeypatch.undo()
+    pending = journal.append("pull_request", 1, 2, {})
+    journal.close()
+
+    assert not (tmp_path / "journal.jsonl.tmp").exists()
+    reopened = make_journal(tmp_path)
+    assert [e["id"] for e in reopened.pending_entries()] == [pending]
+    reopened.close()
+
+
+def test_compaction_keeps_what_arrives_while_it_runs(tmp_path, monkeypatch):
+    import os
+    journal = make_journal(tmp_path, compact_threshold=1)
+    journal.complete(journal.append("pull_request", 1, 2, {}))
+    real_fsync = os.fsync
+    arrived = []
+
+    def fsync_with_traffic(fd):
+        # The journal lock is free while the new file syncs, so a request thread can append
+        if not arrived:
+            arrived.append(journal.append("issue_comment", 1, 2, {}))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync_with_traffic)
+    journal.compact_if_due()
+    monkeypatch.undo()
+    journal.close()
+
+    reopened = make_journal(tmp_path)
+    assert [e["id"] for e in reopened.pending_entries()] == arrived
+    reopened.close()
+
+
+def test_append_after_close_raises(tmp_path):
+    import pytest
+    journal = make_journal(tmp_path)
+    journal.close()
+    with pytest.raises(RuntimeError):
+        journal.append("pull_request", 1, 2, {})
+    assert journal.pending_entries() == []
+
+
+def test_drain_leaves_abandoned_work_pending(tmp_path):
+    import asyncio
+    import webhook_server
+
+    class FakeBot:
+        webhook_journal = make_journal(tmp_path)
+
+    webhook_server.set_bot_instance(FakeBot)
+    journal = FakeBot.webhook_journal
+    fast = journal.append("pull_request", 1, 2, {})
+    slow = journal.append("pull_request", 1, 2, {})
+
+    async def scenario():
+        asyncio.create_task(webhook_server.run_journaled(fast, asyncio.sleep(0.01)))
+        asyncio.create_task(webhook_server.run_journaled(slow, asyncio.sleep(10)))
+        return await webhook_server.drain_inflight(0.2)
+
+    try:
+        assert asyncio.run(scenario()) == (1, 1)
+        assert [e["id"] for e in journal.pending_entries()] == [slow]
+    finally:
+        webhook_server.set_bot_instance(None)
+        journal.close()
+
+
+def test_drain_covers_queued_events(tmp_path):
+    import asyncio
+    import webhook_server
+    from event_queue import PriorityEventQueue
+
+    class FakeBot:
+        webhook_journal = make_journal(tmp_path)
+        event_queue = PriorityEventQueue(workers=1)
+
+    webhook_server.set_bot_instance(FakeBot)
+    journal = FakeBot.webhook_journal
+    ids = [journal.append("issue_comment", 1, 2, {}) for _ in range(3)]
+
+    async def scenario():
+        FakeBot.event_queue.submit('chatter', 'fast', lambda: webhook_server.run_journaled(ids[0], asyncio.sleep(0.01)))
+        FakeBot.event_queue.submit('chatter', 'slow', lambda: webhook_server.run_journaled(ids[1], asyncio.sleep(10)))
+        FakeBot.event_queue.submit('chatter', 'queued', lambda: webhook_server.run_journaled(ids[2], asyncio.sleep(0)))
+        return await webhook_server.drain_inflight(0.2)
+
+    try:
+        assert asyncio.run(scenario()) == (1, 2)
+        assert [e["id"] for e in journal.pending_entries()] == ids[1:]
+    finally:
+        webhook_server.set_bot_instance(None)
+        journal.close()
+
+
+def test_shutdown_journals_new_deliveries_for_next_process(tmp_path):
+    import webhook_server
+
+    class FakeBot:
+        webhook_journal = make_journal(tmp_path)
+        loop = None  # nothing may be scheduled while handing over
+
+    webhook_server.set_bot_instance(FakeBot)
+    webhook_server.stop_accepting_webhooks()
+    try:
+        webhook_server.schedule_event("pull_request", {"action": "closed"}, 1, 2, delivery_id="late")
+        assert [e["id"] for e in FakeBot.webhook_journal.pending_entries()] == ["late"]
+    finally:
+        webhook_server.accepting_webhooks = True
+        webhook_server.set_bot_instance(None)
+        FakeBot.webhook_journal.close()
+
+
+def test_systemd_listen_fd(monkeypatch):
+    import os
+    import webhook_server
+
+    monkeypatch.setenv("LISTEN_FDS", "1")
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid() + 1))
+    assert webhook_server.systemd_listen_fd() is None
+
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid()))
+    assert webhook_server.systemd_listen_fd() == 3
+    assert "LISTEN_FDS" not in os.environ
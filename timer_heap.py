@@ -0,0 +1,139 @@
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+class TimerHeap:
+    """One asyncio task that fires keyed deadlines in due order.
+
+    Scheduling thousands of PRs' deadlines as sleeping tasks costs a task, a
+    timer handle and a stack per PR. Here every deadline is a heap entry and a
+    single runner sleeps until the earliest one. Rescheduling or cancelling a
+    key is O(log n): the old heap entry is left in place and skipped when it
+    surfaces, because its sequence number no longer matches the live entry.
+
+    Due times are wall-clock (time.time()) so they can be persisted and
+    reloaded across restarts. A callback runs in the context variables of
+    the code that scheduled it, as if it had been started as a task there.
+    """
+
+    def __init__(self):
+        # (due, seq, key) ordered by due time; may contain superseded entries
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        # Live entries: key -> (due, seq, callback, context it was scheduled from)
+        self._entries: Dict[Hashable, Tuple[float, int, Callable[[], Awaitable[Any]], contextvars.Context]] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        # Callbacks in progress, held so they aren't garbage collected mid-run
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def due_time(self, key: Hashable) -> Optional[float]:
+        """Return when key is due, or None if it isn't scheduled."""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], Awaitable[Any]]) -> None:
+        """Run callback() delay seconds from now, replacing any deadline for key."""
+        self.schedule_at(key, time.time() + delay, callback)
+
+    def schedule_at(self, key: Hashable, due: float, callback: Callable[[], Awaitable[Any]]) -> None:
+        """Run callback() at wall-clock time due, replacing any deadline for key."""
+        seq = next(self._seq)
+        self._entries[key] = (due, seq, callback, contextvars.copy_context())
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due, seq, key))
+        self._maybe_compact()
+        self._ensure_running()
+        if self._wakeup and (earliest is None or due < earliest):
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Drop the deadline for key; returns whether one was scheduled."""
+        return self._entries.pop(key, None) is not None
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the heap once superseded entries outnumber live ones."""
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [(due, seq, key) for key, (due, seq, _, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _ensure_running(self) -> None:
+        if self._runner and not self._runner.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet; the first schedule from inside the loop starts us
+            return
+        self._wakeup = asyncio.Event()
+        self._runner = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            # Discard superseded entries sitting at the top of the heap
+            while self._heap:
+                due, seq, key = self._heap[0]
+                entry = self._entries.get(key)
+                if entry and entry[1] == seq:
+                    break
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            _, _, callback, context = self._entries.pop(key)
+            task = context.run(asyncio.create_task, self._fire(key, callback))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, key: Hashable, callback: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await callback()
+        except Exception as e:
+            print(f"Scheduled task for {key} failed: {e}")
+
+    async def flush(self, match: Callable[[Hashable], bool]) -> int:
+        """Run the callbacks of every key match() accepts now, due or not, and wait for them.
+
+        For shutdown: deferred work that would otherwise be dropped by stop().
+        Returns how many ran.
+        """
+        tasks = []
+        for key in [key for key in self._entries if match(key)]:
+            _, _, callback, context = self._entries.pop(key)
+            tasks.append(context.run(asyncio.create_task, self._fire(key, callback)))
+        if tasks:
+            await asyncio.gather(*tasks)
+        return len(tasks)
+
+    async def stop(self) -> None:
+        """Stop the runner and wait briefly for callbacks already firing."""
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        if self._running:
+            await asyncio.wait(set(self._running), timeout=5)
@@ -1,4 +1,4 @@
-from typing import Tuple, Match
+from typing import Dict, Optional, Tuple, Match
 import discord
 
 def parse_pr_match(match: Match) -> Tuple[str, str, str, str]:
@@ -9,6 +9,16 @@ def parse_pr_match(match: Match) -> Tuple[str, str, str, str]:
     description = match.group(4)   # e.g., "Test PR for Discord Bot"
     return repository, action, pr_number, description
 
+# Resolved states after which a PR sees no further activity
+TERMINAL_STATES = ('merged', 'closed')
+
+# Resolved states that are a change in where a PR stands, as opposed to
+# labels, edits, pushes and other activity
+TRANSITION_STATES = ('opened', 'reopened', 'ready_for_review', 'draft', 'merged', 'closed')
+
+# Review states that stick to a reviewer until they review again or are dismissed
+BLOCKING_REVIEW_STATES = ('approved', 'changes_requested')
+
 def get_status_color(status: str) -> discord.Color:
     """Get appropriate color for different PR statuses using 3-tier system."""
     status = status.lower()
@@ -54,3 +64,36 @@ def get_status_icon(status: str) -> str:
         return "🗑️"  # Trash for deleted (removed)
     else:
         return "🚀"  # Default to rocket for new PRs
+
+def summarize_reviews(reviews: Optional[Dict[str, str]]) -> Optional[str]:
+    """Render reviewer -> latest state as the card's approvals/changes line."""
+    if not reviews:
+        return None
+    approved = sorted(login for login, state in reviews.items() if state == 'approved')
+    changes = sorted(login for login, state in reviews.items() if state == 'changes_requested')
+    
+    parts = []
+    if approved:
+        parts.append(f"✅ {len(approved)} approved ({_name_list(approved)})")
+    if changes:
+        parts.append(f"❌ {len(changes)} changes requested ({_name_list(changes)})")
+    return "\n".join(parts)
+
+def _name_list(logins: list, limit: int = 3) -> str:
+    shown = ", ".join(logins[:limit])
+    return f"{shown} +{len(logins) - limit}" if len(logins) > limit else shown
+
+async def archive_and_lock_thread(thread: discord.Thread) -> None:
+    """Lock and archive a PR thread."""
+    # An already-archived thread can't be edited until it's
+    # unarchived, so unarchive first, then lock + re-archive.
+    if thread.archived:
+        await thread.edit(archived=False)
+    await thread.edit(locked=True, archived=True)
+
+async def reply(message, content: str = None, **kwargs):
+    """Answer a command in its channel, or answer the interaction for a slash command."""
+    respond = getattr(message, 'respond', None)
+    if respond:
+        return await respond(content, **kwargs)
+    return await message.channel.send(content, **kwargs)
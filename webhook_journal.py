@@ -0,0 +1,219 @@
+import os
+import json
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+class WebhookJournal:
+    """Append-only on-disk journal of accepted webhook deliveries.
+
+    Every delivery the webhook server acknowledges is appended as an ``accept``
+    record before the 200 goes back to GitHub, and a ``done`` record is appended
+    once its processor has run. Anything accepted but never marked done (the
+    process died, or a deploy restarted the service mid-flight) is replayed on
+    the next startup.
+
+    Lines are flushed to the OS on every write, so a crashed or restarted
+    process loses nothing. fsync is batched on a background thread every
+    ``fsync_interval`` seconds, which bounds what a power loss can take with it
+    without paying a disk sync per webhook. Once ``compact_threshold`` entries
+    have completed, the same thread rewrites the file with only the
+    still-pending entries so it stays small under sustained load, keeping the
+    rewrite off the event loop that completes entries.
+    """
+
+    JOURNAL_FILE = "webhook_journal.jsonl"
+
+    def __init__(self, path: str = None, fsync_interval: float = 0.5,
+                 compact_threshold: int = 500):
+        self.path = path or self.JOURNAL_FILE
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        # Accepted-but-not-done entries in arrival order: key: entry id, value: record
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._completed_since_compact = 0
+        self._dirty = False
+        self._file = None
+        # Flask request threads append while the event loop completes, so every
+        # touch of the file handle and _pending goes through this lock.
+        self._lock = threading.Lock()
+        # Held by fsync, compaction and close, which are slow, so they never
+        # hold _lock (and so never block appends or completions) while on disk.
+        # Only these close or replace the file handle.
+        self._sync_lock = threading.Lock()
+        # Lines written while a compaction rewrites the file, for it to carry over
+        self._backlog: Optional[List[str]] = None
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> None:
+        """Load any previous journal, compact it, and start appending."""
+        with self._lock:
+            self._pending = self._load()
+        self._compact()
+        with self._lock:
+            if not self._file:
+                # Couldn't rewrite it; keep appending to the file as it is
+                self._file = open(self.path, 'a')
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+        self._flusher.start()
+        if self._pending:
+            print(f"Webhook journal has {len(self._pending)} unfinished deliveries to replay")
+
+    def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        """Rebuild the pending set from the journal file."""
+        pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if not os.path.exists(self.path):
+            return pending
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; the delivery it
+                    # described was never acknowledged, so dropping it is safe.
+                    continue
+                if record.get("op") == "accept":
+                    pending[record["id"]] = record
+                elif record.get("op") == "done":
+                    pending.pop(record.get("id"), None)
+        return pending
+
+    def append(self, event_type: str, guild_id: int, channel_id: int,
+               payload: Dict[str, Any], delivery_id: str = None) -> Optional[str]:
+        """Record an accepted delivery and return its entry id.
+
+        GitHub's X-GitHub-Delivery id is used when present, so a manual
+        redelivery of something still pending returns None instead of being
+        processed twice. Raises if the journal is closed, so the delivery gets
+        an error instead of an acknowledgement GitHub won't retry.
+        """
+        entry_id = delivery_id or uuid.uuid4().hex
+        record = {
+            "op": "accept",
+            "id": entry_id,
+            "event": event_type,
+            "guild_id": guild_id,
+            "channel_id": channel_id,
+            "payload": payload,
+        }
+        with self._lock:
+            if entry_id in self._pending:
+                return None
+            self._write_locked(record)
+            self._pending[entry_id] = record
+        return entry_id
+
+    def complete(self, entry_id: str) -> None:
+        """Mark an entry as processed."""
+        with self._lock:
+            if not self._file:
+                # Closed: it stays pending in the file and is replayed, which is
+                # safe since the processors are idempotent per delivery
+                return
+            if self._pending.pop(entry_id, None) is None:
+                return
+            self._write_locked({"op": "done", "id": entry_id})
+            self._completed_since_compact += 1
+
+    def compact_if_due(self) -> None:
+        """Compact once compact_threshold entries have completed. Runs on the fsync thread."""
+        if self._completed_since_compact >= self.compact_threshold:
+            self._compact()
+
+    def pending_entries(self) -> List[Dict[str, Any]]:
+        """Return unfinished entries in the order they were accepted."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def flush(self) -> None:
+        """Force everything written so far onto disk."""
+        with self._sync_lock:
+            with self._lock:
+                f, dirty = self._file, self._dirty
+                self._dirty = False
+            # Appends carry on meanwhile; the handle can't be closed under us
+            if f and dirty:
+                os.fsync(f.fileno())
+
+    def close(self) -> None:
+        """Stop the fsync thread and close the journal file."""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join(timeout=self.fsync_interval * 2)
+        with self._sync_lock:
+            with self._lock:
+                f, self._file = self._file, None
+            if f:
+                os.fsync(f.fileno())
+                f.close()
+
+    def _write_locked(self, record: Dict[str, Any]) -> None:
+        if not self._file:
+            raise RuntimeError("Webhook journal is closed")
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        self._dirty = True
+        if self._backlog is not None:
+            self._backlog.append(line)
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the pending entries.
+
+        The pending set is copied under the lock, and the new file is written
+        and synced without it, so appends and completions carry on; whatever
+        they write meanwhile is collected and added to the new file before it
+        is moved into place and takes over as the handle. If any step fails (a
+        full disk, say) the old file and handle stay as they were, so appends
+        carry on and compaction is tried again later.
+        """
+        tmp_path = f"{self.path}.tmp"
+        with self._sync_lock:
+            with self._lock:
+                if self._stop.is_set():
+                    return  # Closed
+                records = list(self._pending.values())
+                self._completed_since_compact = 0
+                self._backlog = []
+            f = None
+            try:
+                f = open(tmp_path, 'w')
+                for record in records:
+                    f.write(json.dumps(record, separators=(',', ':')) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                with self._lock:
+                    # Brief: just what arrived during the rewrite
+                    f.writelines(self._backlog)
+                    f.flush()
+                    os.replace(tmp_path, self.path)
+                    old, self._file = self._file, f
+                    self._dirty = bool(self._backlog)
+            except OSError as e:
+                print(f"Error compacting webhook journal: {e}")
+                if f:
+                    f.close()
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+            finally:
+                with self._lock:
+                    self._backlog = None
+            if old:
+                old.close()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.flush()
+                self.compact_if_due()
+            except Exception as e:
+                print(f"Error syncing webhook journal: {e}")
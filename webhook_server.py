@@ -1,33 +1,55 @@
 import os
 import json
 import re
+import uuid
 import datetime
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
-from flask import Flask, request, jsonify, abort
 import discord
-from discord.ext import commands
 
+from utils import TERMINAL_STATES
 from github_events import (
     PULL_REQUEST, PING, 
-    PULL_REQUEST_REVIEW, ISSUE_COMMENT, PULL_REQUEST_REVIEW_COMMENT
+    PULL_REQUEST_REVIEW, ISSUE_COMMENT, PULL_REQUEST_REVIEW_COMMENT,
+    CHECK_RUN, CHECK_SUITE, PUSH, RELEASE
 )
+from ci_status import check_outcome
+from activity_stats import parse_github_time
+from guild_budget import current_guild
 
-# Import pyngrok if available
-try:
-    from pyngrok import ngrok, conf
-    NGROK_AVAILABLE = True
-except ImportError:
-    NGROK_AVAILABLE = False
-
-app = Flask(__name__)
+# Flask (and pyngrok) are only imported once the webhook server starts, so
+# modules that just need the event helpers here don't pay for them
+app = None
 
 # Reference to the Discord bot
 bot = None
 public_url = None
+# Cleared when the bot starts shutting down; webhooks are then journaled for
+# the next process instead of processed, or get a 503 without a journal
+accepting_webhooks = True
+# The WSGI server, kept so shutdown can stop accepting connections
+_server = None
+# Event processor tasks currently running on the bot's loop
+_inflight_tasks = set()
+
+def create_app():
+    """Build the Flask app serving the landing page and the webhook endpoint."""
+    from flask import Flask
+    
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule('/', 'landing_page', landing_page)
+    flask_app.add_url_rule('/webhook/<int:guild_id>/<int:channel_id>/<token>', 'github_webhook',
+                           github_webhook, methods=['POST'])
+    return flask_app
+
+def get_app():
+    """Return the Flask app, creating it on first use."""
+    global app
+    if app is None:
+        app = create_app()
+    return app
 
-@app.route('/')
 def landing_page():
     """Landing page with bot invite and setup instructions."""
     invite_url = os.getenv('BOT_INVITE_URL', '')
@@ -59,16 +81,21 @@ def landing_page():
         <strong>Step 2:</strong> Go to the channel where you want PR notifications
     </div>
     <div class="step">
-        <strong>Step 3:</strong> Type <code>!prbot webhook</code> - the bot will DM you a GitHub webhook URL
+        <strong>Step 3:</strong> Type <code>/prbot webhook</code> - the bot will DM you a GitHub webhook URL
     </div>
     <div class="step">
         <strong>Step 4:</strong> Add that URL to your GitHub repo (Settings → Webhooks → Add webhook)
     </div>
 
     <h2>Commands</h2>
-    <p><code>!prbot webhook</code> - Generate webhook URL for current channel</p>
-    <p><code>!prbot status</code> - Show current configuration</p>
-    <p><code>!pr [url]</code> - Manually create a PR notification</p>
+    <p><code>/prbot webhook</code> - Generate webhook URL for current channel</p>
+    <p><code>/prbot status</code> - Show current configuration</p>
+    <p><code>/prbot backfill owner/repo</code> - Post cards for a repo's already-open PRs</p>
+    <p><code>/prbot mirror add #channel</code> - Also post this channel's PR cards to another channel</p>
+    <p><code>/prbot pushes #channel</code> - Post push and release summaries to a channel</p>
+    <p><code>/prlink github-login</code> - Get pinged when your review is requested</p>
+    <p><code>/prfind text</code> - Jump to a PR's card by title, #number, author, repo or state</p>
+    <p><code>/pr</code> - Manually create a PR notification</p>
 </body>
 </html>'''
 
@@ -77,17 +104,21 @@ def set_bot_instance(bot_instance):
     global bot
     bot = bot_instance
 
-@app.route('/webhook/<int:guild_id>/<int:channel_id>/<token>', methods=['POST'])
 def github_webhook(guild_id: int, channel_id: int, token: str):
     """
     Handle incoming GitHub webhooks for a guild.
     
     URL format: /webhook/{guild_id}/{channel_id}/{token}
     """
+    from flask import request, jsonify, abort
     
     # Print headers and request info for debugging
     print(f"Received webhook for guild {guild_id}, using configured channel {channel_id}")
     
+    journal = getattr(bot, 'webhook_journal', None)
+    if not accepting_webhooks and not (journal and journal.is_open):
+        return jsonify({"error": "Bot is shutting down, retry shortly"}), 503, {"Retry-After": "30"}
+    
     # Check if this is a ping event
     event_type = request.headers.get('X-GitHub-Event')
     if event_type == PING:
@@ -108,29 +139,228 @@ def github_webhook(guild_id: int, channel_id: int, token: str):
     if not payload:
         return jsonify({"error": "Missing or invalid JSON payload"}), 400
     
-    # Handle pull request events - create a background task
+    if event_type not in EVENT_PROCESSORS:
+        return jsonify({"message": f"Event {event_type} received but not processed"}), 200
+    
+    # Journal the delivery before acknowledging it so a restart can't lose it
+    schedule_event(event_type, payload, guild_id, channel_id,
+                   delivery_id=request.headers.get('X-GitHub-Delivery'))
+    return jsonify({"message": f"Event {event_type} received, processing in background"}), 200
+
+def schedule_event(event_type: str, payload: Dict[str, Any], guild_id: int, channel_id: int,
+                   delivery_id: str = None) -> None:
+    """Journal an accepted event and hand it to the bot's event loop."""
+    if getattr(bot, 'standby', False):
+        # Not the leader (yet): queue it in the shared inbox for whoever is
+        bot.shared_state.push_inbox([{"id": delivery_id or uuid.uuid4().hex, "event": event_type,
+                                      "guild_id": guild_id, "channel_id": channel_id, "payload": payload}])
+        print(f"Standby: queued {event_type} delivery for the leader")
+        return
+    
+    journal = getattr(bot, 'webhook_journal', None)
+    entry_id = None
+    if journal:
+        entry_id = journal.append(event_type, guild_id, channel_id, payload, delivery_id)
+        if entry_id is None:
+            print(f"Delivery {delivery_id} is already pending, skipping duplicate")
+            return
+        if not accepting_webhooks:
+            # Shutting down: the next process replays it from the journal
+            print(f"Journaled {event_type} delivery {entry_id} for the next process")
+            return
+    
+    bot.loop.call_soon_threadsafe(enqueue_event, entry_id, event_type, payload, guild_id, channel_id)
+
+# pull_request actions that change what a card's status shows
+STATE_ACTIONS = ('opened', 'reopened', 'closed', 'ready_for_review', 'converted_to_draft')
+
+def event_lane(event_type: str, payload: Dict[str, Any]) -> str:
+    """Pick the priority lane for an event: state changes, then reviews, then chatter."""
     if event_type == PULL_REQUEST:
-        # Create a task to process the PR asynchronously
-        asyncio.run_coroutine_threadsafe(process_pull_request(payload, guild_id, channel_id), bot.loop)
-        return jsonify({"message": "Webhook received, processing in background"}), 200
+        return 'state' if payload.get('action') in STATE_ACTIONS else 'review'
+    if event_type == PULL_REQUEST_REVIEW:
+        return 'review'
+    # Comments, review comments, check updates, pushes and releases
+    return 'chatter'
+
+def enqueue_event(entry_id: Optional[str], event_type: str, payload: Dict[str, Any],
+                  guild_id: int, channel_id: int) -> None:
+    """Queue a journaled event on the bot's priority queue. Runs on the bot's loop."""
+    processor = EVENT_PROCESSORS[event_type]
+    lane = event_lane(event_type, payload)
+    bot.event_queue.submit(
+        lane,
+        f"{event_type} event {entry_id}",
+        lambda: run_journaled(entry_id, run_budgeted(guild_id, lane, f"{event_type} event {entry_id}",
+                                                     lambda: processor(payload, guild_id, channel_id))),
+        key=event_pr_key(payload),
+    )
+
+def event_pr_key(payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """The (repository, PR number) an event is about, so events for one PR keep their order."""
+    repository = payload.get('repository', {}).get('full_name')
+    pr = payload.get('pull_request') or payload.get('issue')
+    if not pr:
+        # Check events name their PRs inside the run or suite
+        check = payload.get('check_run') or payload.get('check_suite') or {}
+        prs = check.get('pull_requests') or []
+        pr = prs[0] if len(prs) == 1 else None
+    if not repository or not pr or pr.get('number') is None:
+        return None
+    return (repository, str(pr['number']))
+
+async def run_budgeted(guild_id: int, lane: str, label: str, start) -> None:
+    """Run an event processor with its Discord calls charged to guild_id.
+
+    An event in a lane the guild's budget sheds is skipped instead; it still
+    counts as handled, so it isn't replayed from the journal later.
+    """
+    budgets = getattr(bot, 'budgets', None)
+    if budgets and not budgets.admit(guild_id, lane):
+        print(f"Skipping {label}: guild {guild_id} is over its API budget")
+        return
+    token = current_guild.set(guild_id)
+    try:
+        await start()
+    finally:
+        current_guild.reset(token)
+
+async def run_journaled(entry_id: Optional[str], coro) -> None:
+    """Await an event processor, then mark its journal entry as done.
+
+    The processors swallow their own errors, so finishing at all means the
+    event was handled as well as it ever will be; marking it done keeps a
+    malformed payload from being replayed on every restart. Cancellation by a
+    shutdown drain is the exception: the entry stays pending for the next start.
+    """
+    task = asyncio.current_task()
+    _inflight_tasks.add(task)
+    try:
+        await coro
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Error processing journaled event {entry_id}: {e}")
+    finally:
+        _inflight_tasks.discard(task)
     
-    # Handle pull request review events (UNVERIFIED EVENT NAME)
-    elif event_type == PULL_REQUEST_REVIEW:
-        asyncio.run_coroutine_threadsafe(process_pr_review(payload, guild_id, channel_id), bot.loop)
-        return jsonify({"message": "PR review webhook received, processing in background"}), 200
+    journal = getattr(bot, 'webhook_journal', None)
+    if journal and entry_id:
+        journal.complete(entry_id)
+
+def stop_accepting_webhooks() -> None:
+    """Stop processing new webhooks; they're journaled for the next process instead."""
+    global accepting_webhooks
+    accepting_webhooks = False
+
+def stop_webhook_server() -> None:
+    """Stop accepting connections. Blocks until the server's accept loop exits.
+
+    Under socket activation systemd keeps the listening socket open, so
+    connections arriving from here on wait in its backlog for the next process.
+    """
+    if _server:
+        _server.shutdown()
+
+async def drain_inflight(timeout: float) -> Tuple[int, int]:
+    """Wait up to timeout seconds for running event processors to finish.
+
+    Returns (drained, abandoned). Queued events keep running until the
+    deadline; anything still queued or running then is dropped or cancelled,
+    and its journal entry is left pending so it replays on next start.
+    """
+    # Let events the Flask thread queued just before the cutoff arrive
+    await asyncio.sleep(0)
     
-    # Handle issue comment events (includes PR comments) (UNVERIFIED EVENT NAME)
-    elif event_type == ISSUE_COMMENT:
-        asyncio.run_coroutine_threadsafe(process_pr_comment(payload, guild_id, channel_id), bot.loop)
-        return jsonify({"message": "Comment webhook received, processing in background"}), 200
+    drained = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    current = asyncio.current_task()
+    queue = getattr(bot, 'event_queue', None)
+    if queue:
+        completed = queue.completed
+        try:
+            await asyncio.wait_for(queue.wait_idle(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        drained += queue.completed - completed
+    while True:
+        pending = {t for t in _inflight_tasks if t is not current}
+        remaining = deadline - loop.time()
+        if not pending or remaining <= 0:
+            break
+        done, _ = await asyncio.wait(pending, timeout=remaining)
+        drained += len(done)
+    
+    abandoned = {t for t in _inflight_tasks if t is not current}
+    for task in abandoned:
+        task.cancel()
+    if abandoned:
+        await asyncio.wait(abandoned, timeout=1)
+    dropped = queue.stop() if queue else 0
+    return drained, len(abandoned) + dropped
+
+async def replay_journal() -> None:
+    """Re-run every journaled event that was accepted but never finished."""
+    journal = getattr(bot, 'webhook_journal', None)
+    if not journal:
+        return
+    
+    entries = journal.pending_entries()
+    if not entries:
+        return
     
-    # Handle pull request review comment events (UNVERIFIED EVENT NAME)
-    elif event_type == PULL_REQUEST_REVIEW_COMMENT:
-        asyncio.run_coroutine_threadsafe(process_pr_review_comment(payload, guild_id, channel_id), bot.loop)
-        return jsonify({"message": "Review comment webhook received, processing in background"}), 200
+    print(f"Replaying {len(entries)} unfinished webhook deliveries from the journal")
+    for entry in entries:
+        if entry["event"] not in EVENT_PROCESSORS:
+            journal.complete(entry["id"])
+            continue
+        # Through the priority queue, so a backlog replays merges first
+        enqueue_event(entry["id"], entry["event"], entry["payload"], entry["guild_id"], entry["channel_id"])
+
+async def adopt_inbox() -> int:
+    """Take deliveries a standby queued in the shared inbox. Runs on the leader's loop.
+
+    Each is journaled here before it leaves the inbox, so a crash in between
+    can only run it twice, never lose it.
+    """
+    state = getattr(bot, 'shared_state', None)
+    if not state:
+        return 0
+    loop = asyncio.get_running_loop()
+    # The inbox is shared with the standby's request threads; don't wait on its lock here
+    entries = await loop.run_in_executor(None, state.peek_inbox)
+    if not entries:
+        return 0
     
-    # Handle other events as needed
-    return jsonify({"message": f"Event {event_type} received but not processed"}), 200
+    journal = getattr(bot, 'webhook_journal', None)
+    for entry in entries:
+        if entry["event"] not in EVENT_PROCESSORS:
+            continue
+        entry_id = None
+        if journal:
+            entry_id = journal.append(entry["event"], entry["guild_id"], entry["channel_id"],
+                                      entry["payload"], entry["id"])
+            if entry_id is None:
+                continue
+        enqueue_event(entry_id, entry["event"], entry["payload"], entry["guild_id"], entry["channel_id"])
+    await loop.run_in_executor(None, state.ack_inbox, [entry["id"] for entry in entries])
+    print(f"Adopted {len(entries)} webhook deliveries from the standby inbox")
+    return len(entries)
+
+def hand_over_journal() -> int:
+    """Move unfinished journal entries to the shared inbox for the leader to run."""
+    state = getattr(bot, 'shared_state', None)
+    journal = getattr(bot, 'webhook_journal', None)
+    if not state or not journal:
+        return 0
+    entries = journal.pending_entries()
+    if entries:
+        state.push_inbox(entries)
+        for entry in entries:
+            journal.complete(entry["id"])
+        print(f"Handed {len(entries)} unfinished webhook deliveries to the leader")
+    return len(entries)
 
 def verify_guild_token(guild_id: int, token: str) -> bool:
     """
@@ -185,9 +415,8 @@ async def process_pull_request(payload: Dict[str, Any], guild_id: int, channel_i
             print(f"Error: Guild {guild_id} not found")
             return
         
-        channel = guild.get_channel(channel_id)
-        if not channel:
-            print(f"Error: Channel {channel_id} not found in guild {guild.name}")
+        channels = resolve_target_channels(guild, channel_id)
+        if not channels:
             return
         
         # Use PR handler to create or update the notification
@@ -198,30 +427,71 @@ async def process_pull_request(payload: Dict[str, Any], guild_id: int, channel_i
                 if 'user' in pr_data and 'login' in pr_data['user']:
                     author = pr_data['user']['login']
                 
-                # Use the PR handler's create_or_update method
-                message = await bot.pr_handler.create_or_update_pr(
-                    repository=repo_name,
-                    pr_number=str(pr_number),
-                    action=action,
-                    title=pr_title,
-                    url=pr_url,
-                    author=author,
-                    channel=channel
-                )
+                pr_key = (repo_name, str(pr_number))
+                
+                # New commits start a fresh CI rollup for the card
+                head_sha = pr_data.get('head', {}).get('sha')
+                new_head = bool(head_sha) and bot.pr_handler.ci.note_head(pr_key, head_sha)
+                
+                # Posted to the thread only for real transitions (see note_transition);
+                # everything else just updates the thread's pinned timeline
+                status_update = f"**Status Update:** {action.replace('_', ' ').capitalize()}"
+                cleaned_body = clean_body_text(pr_body)
+                if cleaned_body and action in ('opened', 'ready_for_review'):
+                    status_update += f"\n\n*Description:* {truncate_text(cleaned_body, 200)}"
                 
-                if message:
-                    print(f"Successfully processed PR notification for {repo_name} #{pr_number} - {action}")
+                # Ping the requested reviewer if they've linked their GitHub login
+                review_request = None
+                if payload.get('action') == 'review_requested':
+                    reviewer = payload.get('requested_reviewer') or {}
+                    team = payload.get('requested_team') or {}
+                    if reviewer.get('login') and hasattr(bot, 'members'):
+                        requested = await bot.members.mention(guild, reviewer['login'])
+                    else:
+                        requested = f"**{reviewer.get('login') or team.get('name', 'someone')}**"
+                    review_request = f"👀 Review requested from {requested}"
+                
+                async def update_channel(channel):
+                    had_card = bot.pr_handler.get_card(pr_key, channel.id) is not None
+                    
+                    # Use the PR handler's create_or_update method
+                    record = await bot.pr_handler.create_or_update_pr(
+                        repository=repo_name,
+                        pr_number=str(pr_number),
+                        action=action,
+                        title=pr_title,
+                        url=pr_url,
+                        author=author,
+                        channel=channel
+                    )
                     
-                    # Post status update to thread if this is a status change
-                    pr_key = (repo_name, str(pr_number))
-                    status_update = f"**Status Update:** {action.capitalize()}"
-                    cleaned_body = clean_body_text(pr_body)
-                    if cleaned_body:
-                        status_update += f"\n\n*Description:* {truncate_text(cleaned_body, 200)}"
+                    if not record:
+                        print(f"Failed to process PR notification for {repo_name} #{pr_number} in #{channel.name}")
+                        return None
+                    print(f"Successfully processed PR notification for {repo_name} #{pr_number} - {action} in #{channel.name}")
                     
-                    await bot.pr_handler.post_thread_update(pr_key, status_update)
-                else:
-                    print(f"Failed to process PR notification for {repo_name} #{pr_number}")
+                    # With lazy threads, the update that created the card or closed
+                    # the PR is already visible on the card and shouldn't open a thread
+                    open_thread = had_card and action not in TERMINAL_STATES
+                    if bot.pr_handler.note_transition(record, action):
+                        await bot.pr_handler.update_timeline(pr_key, record, create_thread=open_thread)
+                        await bot.pr_handler.post_thread_update(pr_key, status_update, create_thread=open_thread,
+                                                                channel_id=channel.id)
+                    elif payload.get('action') == 'synchronize':
+                        bot.pr_handler.note_push(pr_key, record)
+                    if review_request:
+                        await bot.pr_handler.post_thread_update(pr_key, review_request, create_thread=open_thread,
+                                                                channel_id=channel.id)
+                    return record
+                
+                # Each target channel gets its own card, updated concurrently
+                await bot.pr_handler.fan_out(f"PR {repo_name} #{pr_number} {action}",
+                                             {c.id: c for c in channels}, update_channel)
+                if new_head and action not in TERMINAL_STATES:
+                    # Drop the previous commit's CI result from the cards
+                    await bot.pr_handler.refresh_ci(pr_key)
+                note_pr_activity(pr_key, action, closed=pr_data.get('state') == 'closed')
+                record_pr_stats(payload.get('action', ''), pr_data, repo_name, channel_id)
             else:
                 print("PR handler not available")
         except Exception as e:
@@ -230,14 +500,58 @@ async def process_pull_request(payload: Dict[str, Any], guild_id: int, channel_i
     except Exception as e:
         print(f"Error processing webhook: {e}")
 
+def note_pr_activity(pr_key: Tuple[str, str], state: str = None, closed: bool = False) -> None:
+    """Push back a PR's stale reminder, or drop it once the PR is done or a draft.
+
+    state is the PR's new state for pull_request events and None for other
+    activity, which only reschedules PRs that already have a reminder. closed
+    is whether the payload says the PR is closed; activity on a closed PR
+    (labels, edits, late reviews) never brings its reminder back.
+    """
+    reminders = getattr(bot, 'reminders', None)
+    if not reminders:
+        return
+    if closed or state in TERMINAL_STATES or state == 'draft':
+        reminders.forget(pr_key)
+    elif state or pr_key in reminders.deadlines:
+        reminders.touch(pr_key)
+
+def record_pr_stats(raw_action: str, pr_data: Dict[str, Any], repo_name: str, channel_id: int) -> None:
+    """Count an opened, merged or closed PR in the rolling activity stats."""
+    stats = getattr(bot, 'stats', None)
+    if not stats:
+        return
+    if raw_action == 'opened':
+        stats.record_opened(repo_name, channel_id)
+    elif raw_action == 'closed':
+        stats.record_closed(repo_name, channel_id, pr_data.get('merged', False),
+                            parse_github_time(pr_data.get('created_at')),
+                            parse_github_time(pr_data.get('merged_at')))
+
+def resolve_target_channels(guild: discord.Guild, channel_id: int) -> list:
+    """Return the webhook's channel followed by any channels set to mirror it."""
+    config = bot.config_manager.get_guild_config(guild.id)
+    mirror_ids = config.get("mirrors", {}).get(str(channel_id), [])
+    
+    channels = []
+    for target_id in [channel_id, *mirror_ids]:
+        channel = guild.get_channel(target_id)
+        if not channel:
+            print(f"Error: Channel {target_id} not found in guild {guild.name}")
+        elif channel not in channels:
+            channels.append(channel)
+    return channels
+
 def resolve_pr_state(action: str, pr_data: Dict[str, Any]) -> str:
     """Map a GitHub pull_request action to the state the bot displays.
 
     GitHub reports a draft PR opening as action 'opened' with draft=true, so the
     action alone can't tell a draft apart from a PR that wants review. Closed and
-    merged outrank draft: a draft that gets closed should read as closed.
+    merged outrank draft: a draft that gets closed should read as closed. So do
+    they outrank any later activity on a closed PR (labels, edits, assignees),
+    which must not make the card forget it was merged; only reopening does.
     """
-    if action == 'closed':
+    if action == 'closed' or (pr_data.get('state') == 'closed' and action != 'reopened'):
         return 'merged' if pr_data.get('merged', False) else 'closed'
     if pr_data.get('draft', False):
         return 'draft'
@@ -268,12 +582,34 @@ def truncate_text(text: str, max_length: int) -> str:
         return text
     return text[:max_length-3] + "..."
 
+# First file descriptor systemd passes to a socket-activated service
+SD_LISTEN_FDS_START = 3
+
+def systemd_listen_fd() -> Optional[int]:
+    """Return the listening socket systemd passed us, if socket activated.
+
+    The variables are cleared so processes we spawn don't think the socket
+    was meant for them.
+    """
+    if os.getenv('LISTEN_PID') != str(os.getpid()) or int(os.getenv('LISTEN_FDS', '0')) < 1:
+        return None
+    for name in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(name, None)
+    return SD_LISTEN_FDS_START
+
 def run_webhook_server(host='0.0.0.0', port=5000):
     """Run the Flask server with optional ngrok tunnel."""
-    global public_url
+    global public_url, _server
+    startup = getattr(bot, 'startup', None)
+    if startup:
+        startup.begin("webhook bind")
     
     # Setup ngrok if available
-    if NGROK_AVAILABLE:
+    try:
+        from pyngrok import ngrok, conf
+    except ImportError:
+        ngrok = None
+    if ngrok:
         try:
             # Configure ngrok with auth token if provided
             ngrok_token = os.getenv('NGROK_AUTH_TOKEN')
@@ -303,8 +639,16 @@ def run_webhook_server(host='0.0.0.0', port=5000):
             print(f"Error setting up ngrok: {e}")
             print("* Continue with local server only. Webhooks from GitHub won't work without a public URL.")
     
-    # Start the Flask server
-    app.run(host=host, port=port, debug=False)
+    # Start the Flask server, on systemd's socket if we were socket activated
+    # so restarts never refuse a GitHub delivery
+    fd = systemd_listen_fd()
+    if fd is not None:
+        print("* Serving webhooks on the socket passed by systemd")
+    from werkzeug.serving import make_server
+    _server = make_server(host, port, get_app(), threaded=True, fd=fd)
+    if startup:
+        startup.end("webhook bind")
+    _server.serve_forever()
 
 async def process_pr_review(payload: Dict[str, Any], guild_id: int, channel_id: int):
     """Process a pull request review event and post to thread."""
@@ -333,6 +677,14 @@ async def process_pr_review(payload: Dict[str, Any], guild_id: int, channel_id:
         
         pr_key = (repo_name, pr_number)
         
+        # Keep the card's approvals line current before posting to the thread
+        await bot.pr_handler.record_review(pr_key, reviewer, 'dismissed' if action == 'dismissed' else review_state)
+        note_pr_activity(pr_key, closed=pr_data.get('state') == 'closed')
+        if action == 'submitted' and hasattr(bot, 'stats'):
+            bot.stats.record_review(repo_name, pr_number, channel_id,
+                                    parse_github_time(pr_data.get('created_at')),
+                                    parse_github_time(review_data.get('submitted_at')))
+        
         # Create enhanced thread update message
         if review_state == 'approved':
             emoji = "✅"
@@ -378,10 +730,17 @@ async def process_pr_comment(payload: Dict[str, Any], guild_id: int, channel_id:
             
         comment_data = payload.get('comment', {})
         action = payload.get('action', '')
+        comment_id = comment_data.get('id')
         
         pr_number = str(issue_data.get('number', ''))
         repo_name = payload.get('repository', {}).get('full_name', '')
         
+        if action == 'deleted':
+            await bot.pr_handler.delete_comment_message(comment_id)
+            return
+        if action not in ('created', 'edited'):
+            return  # Don't process other comment actions
+        
         # Comment details
         commenter = comment_data.get('user', {}).get('login', 'Unknown')
         comment_body = comment_data.get('body', '')
@@ -393,23 +752,30 @@ async def process_pr_comment(payload: Dict[str, Any], guild_id: int, channel_id:
         
         pr_key = (repo_name, pr_number)
         
-        if action == 'created':
-            emoji = "💬"
-            update_message = f"{emoji} **{commenter}** commented on PR **\"{pr_title}\"** by **{pr_author}**"
-        elif action == 'edited':
-            emoji = "✏️"
-            update_message = f"{emoji} **{commenter}** edited their comment on PR **\"{pr_title}\"**"
-        else:
-            return  # Don't process other comment actions
-        
         cleaned_comment = clean_body_text(comment_body)
+        details = ""
         if cleaned_comment:
-            update_message += f"\n\n*Comment:* {truncate_text(cleaned_comment, 400)}"
+            details += f"\n\n*Comment:* {truncate_text(cleaned_comment, 400)}"
         
         if comment_url:
-            update_message += f"\n\n[View Comment]({comment_url})"
+            details += f"\n\n[View Comment]({comment_url})"
+        
+        if action == 'edited':
+            # Rewrite the original thread message rather than posting a new one
+            edited_message = (f"💬 **{commenter}** commented on PR **\"{pr_title}\"** by **{pr_author}** "
+                              f"*(edited)*{details}")
+            if await bot.pr_handler.edit_comment_message(comment_id, edited_message):
+                print(f"Edited comment message for {repo_name} #{pr_number}")
+                return
+            # Comment predates this process (or was evicted); post it as before
+            update_message = f"✏️ **{commenter}** edited their comment on PR **\"{pr_title}\"**"
+        else:
+            update_message = f"💬 **{commenter}** commented on PR **\"{pr_title}\"** by **{pr_author}**"
         
-        await bot.pr_handler.post_thread_update(pr_key, update_message)
+        sent = await bot.pr_handler.post_thread_update(pr_key, update_message + details)
+        if sent and comment_id:
+            bot.pr_handler.remember_comment(comment_id, pr_key, sent)
+        note_pr_activity(pr_key)
         print(f"Posted comment update for {repo_name} #{pr_number}")
         
     except Exception as e:
@@ -462,6 +828,111 @@ async def process_pr_review_comment(payload: Dict[str, Any], guild_id: int, chan
     except Exception as e:
         print(f"Error processing PR review comment: {e}")
 
+async def process_check_event(payload: Dict[str, Any], guild_id: int, channel_id: int):
+    """Fold a check_run or check_suite event into the CI field of the PRs it belongs to."""
+    if not bot or not hasattr(bot, 'pr_handler'):
+        print("Error: Discord bot or PR handler not available")
+        return
+    
+    try:
+        repo_name = payload.get('repository', {}).get('full_name', '')
+        check_run = payload.get('check_run')
+        check = check_run or payload.get('check_suite', {})
+        head_sha = check.get('head_sha', '')
+        outcome = check_outcome(check.get('status', ''), check.get('conclusion'))
+        
+        # GitHub lists the PRs whose head is this commit; fork PRs aren't listed
+        for pr in check.get('pull_requests', []):
+            if pr.get('head', {}).get('sha', head_sha) != head_sha:
+                continue  # A run for an older commit on this PR
+            pr_key = (repo_name, str(pr.get('number', '')))
+            if pr_key not in bot.pr_handler.pr_records:
+                continue
+            
+            if check_run:
+                suite_id = check_run.get('check_suite', {}).get('id')
+                counted = bot.pr_handler.ci.record_run(pr_key, head_sha, check_run.get('id'), suite_id, outcome)
+            else:
+                counted = bot.pr_handler.ci.record_suite(pr_key, head_sha, check.get('id'), outcome)
+            if counted:
+                await bot.pr_handler.refresh_ci(pr_key)
+        
+    except Exception as e:
+        print(f"Error processing check event: {e}")
+
+def resolve_push_channel(guild_id: int, channel_id: int) -> Optional[int]:
+    """Channel for push and release summaries: the guild's push channel, else the webhook's."""
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        print(f"Error: Guild {guild_id} not found")
+        return None
+    target_id = bot.config_manager.get_guild_config(guild_id).get("push_channel") or channel_id
+    if not guild.get_channel(target_id):
+        print(f"Error: Channel {target_id} not found in guild {guild.name}")
+        return None
+    return target_id
+
+async def process_push(payload: Dict[str, Any], guild_id: int, channel_id: int):
+    """Fold a push into its branch's coalesced summary message."""
+    if not bot or not hasattr(bot, 'pushes'):
+        print("Error: Discord bot or push summaries not available")
+        return
+    
+    try:
+        target_id = resolve_push_channel(guild_id, channel_id)
+        if target_id:
+            repo_name = payload.get('repository', {}).get('full_name', '')
+            await bot.pushes.record_push(target_id, repo_name, payload)
+    except Exception as e:
+        print(f"Error processing push event: {e}")
+
+async def process_release(payload: Dict[str, Any], guild_id: int, channel_id: int):
+    """Post a published release, with the start of its notes."""
+    if not bot or not hasattr(bot, 'pr_handler'):
+        print("Error: Discord bot or PR handler not available")
+        return
+    
+    try:
+        if payload.get('action') != 'published':
+            return
+        target_id = resolve_push_channel(guild_id, channel_id)
+        if not target_id:
+            return
+        
+        release = payload.get('release', {})
+        repo_name = payload.get('repository', {}).get('full_name', '')
+        tag = release.get('tag_name', '')
+        name = release.get('name') or tag
+        kind = "pre-release" if release.get('prerelease') else "release"
+        author = release.get('author', {}).get('login', 'Unknown')
+        
+        message = f"🚀 **{repo_name}** {kind} **{name}**" + (f" (`{tag}`)" if tag and tag != name else "")
+        message += f" published by **{author}**"
+        notes = clean_body_text(release.get('body', ''))
+        if notes:
+            message += f"\n\n{truncate_text(notes, 500)}"
+        if release.get('html_url'):
+            message += f"\n\n[View Release]({release['html_url']})"
+        
+        await bot.pr_handler.writes.run(f"Release {tag} for {repo_name}",
+                                        lambda: bot.pr_handler._messageable(target_id).send(message),
+                                        idempotent=False)
+        print(f"Posted release {tag} for {repo_name}")
+    except Exception as e:
+        print(f"Error processing release event: {e}")
+
 def get_public_url():
     """Return the public URL for the webhook server."""
     return public_url or os.getenv('WEBHOOK_BASE_URL', 'https://your-bot-domain.com')
+
+# Event type -> coroutine that handles it; shared by live dispatch and journal replay
+EVENT_PROCESSORS = {
+    PULL_REQUEST: process_pull_request,
+    PULL_REQUEST_REVIEW: process_pr_review,
+    ISSUE_COMMENT: process_pr_comment,
+    PULL_REQUEST_REVIEW_COMMENT: process_pr_review_comment,
+    CHECK_RUN: process_check_event,
+    CHECK_SUITE: process_check_event,
+    PUSH: process_push,
+    RELEASE: process_release,
+}